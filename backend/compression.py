@@ -0,0 +1,70 @@
+"""
+Accept-Encoding negotiation for large JSON bodies sent over slow links.
+
+Brotli (in requirements.txt; gzip only if it is missing) is preferred when
+the client accepts it, gzip otherwise; bodies under COMPRESS_MIN_SIZE bytes are
+sent as they are. Used per route (the weather routes) rather than as an
+app-wide middleware, so already-small or streamed responses are untouched.
+"""
+import gzip
+import os
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError: # optional, gzip only
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+
+def accepted_encodings(accept_encoding):
+    """{coding: q} from an Accept-Encoding header value."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding):
+    """'br', 'gzip' or None (identity), by the client's q-values; br wins ties."""
+    accepted = accepted_encodings(accept_encoding)
+    available = (["br"] if brotli is not None else []) + ["gzip"]
+
+    def q(coding):
+        return accepted.get(coding, accepted.get("*", 0.0))
+
+    best = max(available, key=q)
+    return best if q(best) > 0 else None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def negotiated_response(request, body, media_type="application/json", headers=None):
+    """Response with body compressed as the request's Accept-Encoding allows."""
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    encoding = choose_encoding(request.headers.get("accept-encoding")) if len(body) >= COMPRESS_MIN_SIZE else None
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
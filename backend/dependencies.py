@@ -6,6 +6,7 @@ from .models import User
 from .auth_utils import verify_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token", auto_error=False)
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     phone = verify_token(token)
@@ -19,3 +20,18 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+def get_current_verifier(current_user: User = Depends(get_current_user)):
+    """The current user, if they hold the verifier (inspector / admin) role."""
+    if not current_user.is_verifier:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Verifier role required")
+    return current_user
+
+def get_current_user_optional(token: str = Depends(optional_oauth2_scheme), db: Session = Depends(get_db)):
+    """Like get_current_user, but returns None for anonymous or invalid tokens."""
+    if not token:
+        return None
+    phone = verify_token(token)
+    if not phone:
+        return None
+    return db.query(User).filter(User.phone == phone).first()
@@ -0,0 +1,50 @@
+"""
+Fast JSON path for large list responses.
+
+A handler with response_model=List[X] that returns Pydantic objects pays
+twice per row: once to build X, and again when FastAPI re-validates the
+list against the response model before serializing it. Hot list routes
+instead select plain column rows, shape them into dicts and return
+rows_response(...): FastAPI passes a Response through untouched, so the
+rows are serialized once by orjson. The route keeps its response_model,
+so the OpenAPI schema is unchanged; the handler is responsible for
+producing dicts in that shape (see test_fast_json.py).
+"""
+import json
+from datetime import date, datetime
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError: # optional, falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """JSON bytes; datetimes as ISO 8601 like Pydantic's output."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+
+def rows_response(rows, **kwargs):
+    """Serializes a list of already-shaped dicts, bypassing response_model validation."""
+    return FastJSONResponse(rows, **kwargs)
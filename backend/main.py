@@ -1,17 +1,39 @@
 import os
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from .database import engine, Base
+from .database import engine, SessionLocal
+from . import migrations
 from .routers import auth, users, market, ai, finance, weather, news, schemes, community, plots, carbon, contracts, insurance
+from .services.agromonitoring import satellite_service as agro_service
+from .services.providers import provider_registry
+from .services.matching import contract_matcher
+from .services.earth_engine import earth_engine_service
+from .services.warmup import warmup, SkipWarmup
+from .services import gemini
+from .metrics import registry as metrics_registry, instrument_engine, record_provider_call, MetricsMiddleware
+from .sql_profiler import SQLProfilerMiddleware
 
 load_dotenv()
 
-# Create DB Tables
-Base.metadata.create_all(bind=engine)
+# Initialize Gemini / Earth Engine in the background after startup instead of on the first request
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+
+# Create DB tables and apply pending schema migrations
+migrations.upgrade(engine)
 
 app = FastAPI(title="Krishi-Drishti API", version="1.0.0")
 
+# In-process metrics (exposed on /metrics)
+instrument_engine(engine)
+provider_registry.add_listener(record_provider_call)
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in per-request SQL profiling / N+1 detection
+if os.getenv("SQL_PROFILE"):
+    app.add_middleware(SQLProfilerMiddleware)
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +41,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(auth.router)
@@ -35,10 +58,48 @@ app.include_router(carbon.router)
 app.include_router(contracts.router)
 app.include_router(insurance.router)
 
+def _warm_gemini():
+    if not os.getenv("GEMINI_API_KEY"):
+        raise SkipWarmup("GEMINI_API_KEY not set")
+    gemini.client()
+
+if WARMUP_ON_STARTUP:
+    warmup.register("gemini", _warm_gemini)
+    warmup.register("earth_engine", earth_engine_service.initialize)
+
+@app.on_event("startup")
+def build_search_indexes():
+    db = SessionLocal()
+    try:
+        insurance.load_insurance_index(db)
+        contract_matcher.build(db)
+    finally:
+        db.close()
+    if WARMUP_ON_STARTUP:
+        warmup.start()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await agro_service.aclose()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Krishi-Drishti Backend API"}
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    providers = provider_registry.snapshot()
+    degraded = any(p["state"] != "closed" for p in providers.values())
+    return {"status": "degraded" if degraded else "ok", "providers": providers}
+
+@app.get("/ready")
+def readiness():
+    """200 once background warm-up has finished (failed providers fall back), 503 while it runs."""
+    state = warmup.snapshot()
+    body = {"status": "ready" if state["complete"] else "warming", "warmup": state["tasks"]}
+    return JSONResponse(body, status_code=200 if state["complete"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of the in-process counters."""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,291 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+from sqlalchemy import event
+from starlette.routing import compile_path
+
+# Latency buckets in seconds (Prometheus defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # per-bucket (non-cumulative) counts + overflow, sum, count
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][idx] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._values.items())
+        for labels, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, collect):
+        """collect() is called right before rendering, to refresh derived gauges."""
+        self._collectors.append(collect)
+
+    def render(self):
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# --- HTTP ---
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method", "route"))
+
+# --- Database ---
+db_statements = registry.counter(
+    "db_statements_total", "SQL statements executed", ("operation",))
+db_statement_duration = registry.histogram(
+    "db_statement_duration_seconds", "SQL statement execution time", ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+# --- External providers ---
+provider_call_duration = registry.histogram(
+    "provider_call_duration_seconds", "External provider call latency", ("provider", "outcome"))
+
+# --- Finance scheme recommendation cache (Gemini answers per profile bucket, routers/finance.py) ---
+# The only provider-backed cache: agromonitoring, Earth Engine and the forecast path call out uncached
+scheme_cache_requests = registry.counter(
+    "finance_scheme_cache_requests_total", "Finance scheme recommendation cache lookups", ("result",))
+scheme_cache_hit_ratio = registry.gauge(
+    "finance_scheme_cache_hit_ratio", "Share of finance scheme recommendation lookups served from cache")
+
+# --- Catalog response cache (services/http_cache.py) ---
+response_cache_requests = registry.counter(
+    "http_response_cache_requests_total", "Catalog route lookups: not_modified (304), hit or miss", ("route", "result"))
+
+
+def record_provider_call(provider, latency, ok):
+    provider_call_duration.observe(provider, "success" if ok else "failure", value=latency)
+
+
+def record_scheme_cache(hit):
+    """Called by the finance scheme cache on every lookup."""
+    scheme_cache_requests.inc("hit" if hit else "miss")
+
+
+def record_response_cache(route, result):
+    response_cache_requests.inc(route, result)
+
+
+def _collect_cache_ratio():
+    # No ratio until the cache has seen a lookup
+    hits = scheme_cache_requests.value("hit")
+    total = hits + scheme_cache_requests.value("miss")
+    if total:
+        scheme_cache_hit_ratio.set(value=round(hits / total, 4))
+
+
+registry.add_collector(_collect_cache_ratio)
+
+
+# --- SQLAlchemy hooks ---
+
+def _statement_operation(statement):
+    head = statement.lstrip()[:8].split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+def instrument_engine(engine):
+    """Counts and times every statement executed on the engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        operation = _statement_operation(statement)
+        db_statements.inc(operation)
+        db_statement_duration.observe(operation, value=elapsed)
+
+
+# --- ASGI middleware ---
+
+class MetricsMiddleware:
+    """
+    Records per-route latency and in-flight requests. Routes are labelled by
+    their path template (/api/plots/{plot_id}/analyze) to keep cardinality low.
+
+    The router only resolves the template while handling the request, so the
+    latency histogram reads it from scope["route"] afterwards. For the
+    in-flight gauge (needed up front) templates are learned from completed
+    requests and matched against the raw path.
+    """
+
+    ROUTE_CACHE_SIZE = 2048
+
+    def __init__(self, app):
+        self.app = app
+        self._templates = {} # template -> compiled path regex
+        self._route_cache = OrderedDict() # raw path -> template
+        self._lock = threading.Lock()
+
+    def _lookup_template(self, path):
+        with self._lock:
+            template = self._route_cache.get(path)
+            if template is not None:
+                self._route_cache.move_to_end(path)
+                return template
+            templates = list(self._templates.items())
+
+        template = "unmatched"
+        for candidate, regex in templates:
+            if regex.match(path):
+                template = candidate
+                break
+        else:
+            return template # not cached, the route may be learned later
+
+        with self._lock:
+            self._route_cache[path] = template
+            if len(self._route_cache) > self.ROUTE_CACHE_SIZE:
+                self._route_cache.popitem(last=False)
+        return template
+
+    def _learn_template(self, template):
+        if template not in self._templates:
+            regex, _, _ = compile_path(template)
+            with self._lock:
+                self._templates[template] = regex
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        in_flight_route = self._lookup_template(scope["path"])
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method, in_flight_route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec(method, in_flight_route)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                self._learn_template(route)
+            http_request_duration.observe(method, route or "unmatched", str(status["code"]), value=elapsed)
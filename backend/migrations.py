@@ -0,0 +1,176 @@
+"""
+Versioned schema migrations.
+
+create_all() only creates missing tables: it never adds a column or an
+index to a table that already exists, so older databases silently miss
+them (that is what fix_db_schema.py used to patch by hand). upgrade()
+runs at startup after create_all() and applies every migration newer
+than the version recorded in schema_migrations, one transaction each.
+
+Migrations must be idempotent: on a fresh database create_all() has
+already built the current schema and they only get recorded. New
+migrations are appended to MIGRATIONS with the next version number;
+released ones are never edited.
+
+    python -m backend.migrations            # upgrade DATABASE_URL
+    python -m backend.migrations --status
+"""
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, inspect, select, func, insert
+
+from .database import engine as default_engine, Base
+
+# Kept out of Base.metadata so drop_all()/create_all() never touch it
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String),
+    Column("applied_at", DateTime),
+)
+
+
+def add_column(conn, table, column, ddl):
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def create_index(conn, name, table, *columns, unique=False):
+    conn.exec_driver_sql(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    )
+
+
+def _0001_legacy_columns(conn):
+    """Columns added to existing tables before migrations existed (was fix_db_schema.py)."""
+    add_column(conn, "users", "crops", "TEXT DEFAULT ''")
+    add_column(conn, "users", "land_size", "REAL DEFAULT 0.0")
+    add_column(conn, "users", "category", "TEXT DEFAULT 'General'")
+    add_column(conn, "users", "farming_type", "TEXT DEFAULT 'Mixed'")
+    add_column(conn, "users", "trust_score", "INTEGER DEFAULT 500")
+    add_column(conn, "schemes", "eligibility_rules", "TEXT")
+    add_column(conn, "carbon_projects", "verification_cost_usd", "REAL DEFAULT 3000.0")
+    add_column(conn, "carbon_projects", "buffer_pool_percentage", "REAL DEFAULT 15.0")
+    add_column(conn, "carbon_projects", "vesting_end_date", "DATETIME")
+    add_column(conn, "carbon_projects", "requires_soil_sample", "BOOLEAN DEFAULT 1")
+    add_column(conn, "carbon_projects", "additionality_score", "REAL DEFAULT 0.0")
+    add_column(conn, "carbon_projects", "available_credits", "REAL DEFAULT 0.0")
+    add_column(conn, "carbon_projects", "locked_credits", "REAL DEFAULT 0.0")
+    add_column(conn, "carbon_projects", "baseline_ndvi", "REAL")
+    add_column(conn, "carbon_projects", "current_ndvi", "REAL")
+    add_column(conn, "carbon_projects", "mrv_run_id", "INTEGER")
+    add_column(conn, "carbon_evidence", "sha256", "TEXT")
+    add_column(conn, "carbon_evidence", "file_size", "INTEGER")
+    add_column(conn, "carbon_evidence", "content_type", "TEXT")
+    add_column(conn, "carbon_evidence", "thumbnail_url", "TEXT")
+    add_column(conn, "carbon_evidence", "exif_lat", "REAL")
+    add_column(conn, "carbon_evidence", "exif_lng", "REAL")
+    add_column(conn, "carbon_evidence", "gps_distance_m", "REAL")
+
+
+def _0002_model_indexes(conn):
+    """Indexes declared on the models for tables that predate them."""
+    create_index(conn, "ix_listings_seller_id", "listings", "seller_id")
+    create_index(conn, "ix_plots_user_id", "plots", "user_id")
+    create_index(conn, "ix_carbon_projects_user_id", "carbon_projects", "user_id")
+    create_index(conn, "ix_carbon_evidence_project_id", "carbon_evidence", "project_id")
+    create_index(conn, "ix_carbon_evidence_sha256", "carbon_evidence", "sha256")
+    create_index(conn, "ix_contracts_farmer_id", "contracts", "farmer_id")
+    create_index(conn, "ix_contracts_status_crop_delivery", "contracts", "status", "crop_type", "delivery_date")
+    create_index(conn, "ix_contracts_status_delivery", "contracts", "status", "delivery_date")
+
+
+def _0003_hot_path_indexes(conn):
+    """Filters / sort orders of the chat, feed, like, carbon and stress handlers."""
+    create_index(conn, "ix_carbon_projects_plot_id", "carbon_projects", "plot_id")
+    create_index(conn, "ix_chat_messages_user_timestamp", "chat_messages", "user_id", "timestamp")
+    create_index(conn, "ix_community_posts_created_at", "community_posts", "created_at")
+    create_index(conn, "ix_community_comments_post_id", "community_comments", "post_id")
+    create_index(conn, "ix_community_likes_post_user", "community_likes", "post_id", "user_id")
+    create_index(conn, "ix_stress_reports_user_id", "stress_reports", "user_id")
+
+
+def _0004_table_version_triggers(conn):
+    """Write counters behind the catalog ETags (table_versions itself comes from create_all)."""
+    from .models import VERSIONED_TABLES, version_trigger_ddl
+
+    for table, writes in VERSIONED_TABLES.items():
+        for ddl in version_trigger_ddl(table, writes):
+            conn.exec_driver_sql(ddl)
+
+
+def _0005_scheme_match_freshness(conn):
+    """Per-user scheme_matches freshness (served by GET /api/schemes/)."""
+    from .models import USERS_MATCHES_STALE_DDL
+
+    add_column(conn, "users", "schemes_matched_version", "INTEGER")
+    create_index(conn, "ix_scheme_matches_user_scheme", "scheme_matches", "user_id", "scheme_id", unique=True)
+    conn.exec_driver_sql(USERS_MATCHES_STALE_DDL)
+
+
+def _0006_verifier_role(conn):
+    """Verifier role for listing inspection and contract delivery confirmation."""
+    add_column(conn, "users", "is_verifier", "BOOLEAN DEFAULT 0")
+    add_column(conn, "listings", "verified_by", "INTEGER REFERENCES users(id)")
+
+
+MIGRATIONS = [
+    (1, "legacy_columns", _0001_legacy_columns),
+    (2, "model_indexes", _0002_model_indexes),
+    (3, "hot_path_indexes", _0003_hot_path_indexes),
+    (4, "table_version_triggers", _0004_table_version_triggers),
+    (5, "scheme_match_freshness", _0005_scheme_match_freshness),
+    (6, "verifier_role", _0006_verifier_role),
+]
+HEAD = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    _metadata.create_all(bind=conn)
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def upgrade(engine=default_engine, target=HEAD):
+    """Creates missing tables, then applies pending migrations. Returns the versions applied."""
+    from . import models # noqa: F401 (registers the tables on Base.metadata)
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    applied = []
+    for number, name, migrate in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            # Another worker may have applied it concurrently; the steps are idempotent
+            conn.execute(insert(schema_migrations).prefix_with("OR IGNORE", dialect="sqlite"),
+                         {"version": number, "name": name, "applied_at": datetime.utcnow()})
+        print(f"[Migrations] applied {number:04d}_{name}")
+        applied.append(number)
+    return applied
+
+
+def status(engine=default_engine):
+    """[(version, name, applied_at or None)] for every known migration."""
+    with engine.begin() as conn:
+        current_version(conn)
+        applied = dict(conn.execute(select(schema_migrations.c.version, schema_migrations.c.applied_at)).all())
+    return [(number, name, applied.get(number)) for number, name, _ in MIGRATIONS]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply schema migrations to DATABASE_URL")
+    parser.add_argument("--status", action="store_true", help="list migrations instead of applying them")
+    args = parser.parse_args()
+
+    if args.status:
+        for number, name, applied_at in status():
+            print(f"{number:04d}_{name:<24} {applied_at or 'pending'}")
+    else:
+        applied = upgrade()
+        print(f"Schema at version {HEAD} ({len(applied)} migration(s) applied).")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Date, UniqueConstraint, Index, DDL, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -17,8 +17,12 @@ class User(Base):
     trust_score = Column(Integer, default=500)
     created_at = Column(DateTime, default=datetime.utcnow)
     crops = Column(String, default="") # Comma-separated or JSON string
+    # schemes table version scheme_matches was built against for this user (NULL = not built / profile changed)
+    schemes_matched_version = Column(Integer, nullable=True)
+    # Inspector / admin: may verify listings and confirm contract deliveries (set by an admin, never via the API)
+    is_verifier = Column(Boolean, default=False)
 
-    listings = relationship("Listing", back_populates="seller")
+    listings = relationship("Listing", back_populates="seller", foreign_keys="Listing.seller_id")
     chats = relationship("ChatMessage", back_populates="user")
 
 
@@ -26,7 +30,7 @@ class Listing(Base):
     __tablename__ = "listings"
 
     id = Column(Integer, primary_key=True, index=True)
-    seller_id = Column(Integer, ForeignKey("users.id"))
+    seller_id = Column(Integer, ForeignKey("users.id"), index=True)
     crop_name = Column(String, index=True)
     quantity = Column(String) # e.g. "500kg"
     price = Column(String)    # e.g. "120/kg"
@@ -36,13 +40,19 @@ class Listing(Base):
     grade = Column(String, default="A")
     image_url = Column(String, nullable=True)
     verified = Column(Boolean, default=True)
+    # Verifier who inspected the listing (POST /api/market/{id}/verify); only these earn trust points
+    verified_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    seller = relationship("User", back_populates="listings")
+    seller = relationship("User", back_populates="listings", foreign_keys=[seller_id])
 
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Chat history: a farmer's latest messages
+        Index("ix_chat_messages_user_timestamp", "user_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -57,7 +67,7 @@ class StressReport(Base):
     __tablename__ = "stress_reports"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     location_lat = Column(Float)
     location_lng = Column(Float)
     crop_type = Column(String)
@@ -100,9 +110,23 @@ class Scheme(Base):
     link = Column(String, nullable=True)
     benefits = Column(String, nullable=True)
     eligibility = Column(String, nullable=True)
+    eligibility_rules = Column(String, nullable=True) # JSON, see services/eligibility.py
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class SchemeMatch(Base):
+    """Precomputed "schemes you qualify for" (maintained by services/eligibility.py)."""
+    __tablename__ = "scheme_matches"
+    __table_args__ = (
+        # A farmer's matches in scheme order, straight from the index
+        Index("ix_scheme_matches_user_scheme", "user_id", "scheme_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    scheme_id = Column(Integer, ForeignKey("schemes.id"))
+
+
 class CommunityPost(Base):
     __tablename__ = "community_posts"
 
@@ -111,7 +135,7 @@ class CommunityPost(Base):
     content = Column(String)
     image_url = Column(String, nullable=True)
     likes_count = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True) # feed order
 
     user = relationship("User", back_populates="posts")
     comments = relationship("CommunityComment", back_populates="post", cascade="all, delete-orphan")
@@ -122,7 +146,7 @@ class CommunityComment(Base):
     __tablename__ = "community_comments"
 
     id = Column(Integer, primary_key=True, index=True)
-    post_id = Column(Integer, ForeignKey("community_posts.id"))
+    post_id = Column(Integer, ForeignKey("community_posts.id"), index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     text = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -133,6 +157,10 @@ class CommunityComment(Base):
 
 class CommunityLike(Base):
     __tablename__ = "community_likes"
+    __table_args__ = (
+        # Feed join on post_id + the "already liked?" check on (post_id, user_id)
+        Index("ix_community_likes_post_user", "post_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("community_posts.id"))
@@ -148,7 +176,7 @@ class Plot(Base):
     __tablename__ = "plots"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     name = Column(String)
     
     # Storing coordinates as a JSON string for simplicity in SQLite 
@@ -173,8 +201,8 @@ class CarbonProject(Base):
     __tablename__ = "carbon_projects"
 
     id = Column(Integer, primary_key=True, index=True)
-    plot_id = Column(Integer, ForeignKey("plots.id"))
-    user_id = Column(Integer, ForeignKey("users.id")) # Denormalized for easy access
+    plot_id = Column(Integer, ForeignKey("plots.id"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True) # Denormalized for easy access
     
     methodology = Column(String) # "No-Till", "Cover-Crop", "Agroforestry"
     status = Column(String, default="Potential") # Potential, Enrolled, Evidence_Pending, Verified, Issued
@@ -193,6 +221,9 @@ class CarbonProject(Base):
     additionality_score = Column(Float, default=0.0) # 0-1, rejection if practice is common (>0.5 = common)
     available_credits = Column(Float, default=0.0) # After buffer pool deduction
     locked_credits = Column(Float, default=0.0) # Buffer pool amount
+    baseline_ndvi = Column(Float, nullable=True) # Mean NDVI over the baseline seasons (set by MRV)
+    current_ndvi = Column(Float, nullable=True) # Mean NDVI over the monitored seasons (set by MRV)
+    mrv_run_id = Column(Integer, ForeignKey("mrv_runs.id"), nullable=True)
     
     plot = relationship("Plot", back_populates="carbon_projects")
     evidence = relationship("CarbonEvidence", back_populates="project")
@@ -201,13 +232,22 @@ class CarbonEvidence(Base):
     __tablename__ = "carbon_evidence"
 
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("carbon_projects.id"))
+    project_id = Column(Integer, ForeignKey("carbon_projects.id"), index=True)
     image_url = Column(String)
     description = Column(String)
     geo_lat = Column(Float)
     geo_lng = Column(Float)
     verified = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Uploaded file (content-addressed store, see services/evidence_store.py)
+    sha256 = Column(String, nullable=True, index=True)
+    file_size = Column(Integer, nullable=True)
+    content_type = Column(String, nullable=True)
+    thumbnail_url = Column(String, nullable=True)
+    exif_lat = Column(Float, nullable=True) # GPS embedded in the photo, if any
+    exif_lng = Column(Float, nullable=True)
+    gps_distance_m = Column(Float, nullable=True) # EXIF position vs reported geo_lat/geo_lng
     
     project = relationship("CarbonProject", back_populates="evidence")
 
@@ -215,9 +255,15 @@ User.plots = relationship("Plot", back_populates="user")
 
 class Contract(Base):
     __tablename__ = "contracts"
+    __table_args__ = (
+        # Open-contract listing: status filter + crop filter, ordered by delivery date
+        Index("ix_contracts_status_crop_delivery", "status", "crop_type", "delivery_date"),
+        # Same listing without a crop filter (avoids sorting every open contract per page)
+        Index("ix_contracts_status_delivery", "status", "delivery_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    farmer_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Null if open offer
+    farmer_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True) # Null if open offer
     buyer_name = Column(String) # e.g., "ITC Agribusiness"
     crop_type = Column(String)
     quantity = Column(Float) # in tons
@@ -232,3 +278,167 @@ class Contract(Base):
 
 User.contracts = relationship("Contract", back_populates="farmer")
 
+
+
+class InsuranceScheme(Base):
+    __tablename__ = "insurance_schemes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String)
+    provider = Column(String)
+    type = Column(String) # Yield Protection, Weather Parametric, Specific Crop, ...
+    coverage = Column(String)
+    premium = Column(String)
+    description = Column(String)
+    link = Column(String)
+    crops = Column(String, default="[]") # JSON list of crop names
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class InsuranceEnrollment(Base):
+    __tablename__ = "insurance_enrollments"
+    __table_args__ = (UniqueConstraint("user_id", "scheme_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    scheme_id = Column(Integer, ForeignKey("insurance_schemes.id"))
+    farmer_name = Column(String)
+    aadhar_last4 = Column(String) # Never store the full Aadhaar number
+    survey_number = Column(String)
+    land_area = Column(Float)
+    crop = Column(String)
+    status = Column(String, default="Submitted")
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    scheme = relationship("InsuranceScheme")
+
+
+class WeatherDaily(Base):
+    """Daily weather history per archive grid cell (see services/weather_archive.py)."""
+    __tablename__ = "weather_daily"
+    __table_args__ = (UniqueConstraint("cell_lat", "cell_lng", "date"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    cell_lat = Column(Float)
+    cell_lng = Column(Float)
+    date = Column(Date, index=True)
+    precipitation_mm = Column(Float, nullable=True)
+    temperature_max = Column(Float, nullable=True)
+
+
+class ParametricPayout(Base):
+    """Latest parametric insurance evaluation per farmer (see services/parametric.py)."""
+    __tablename__ = "parametric_payouts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True)
+    window_start = Column(Date)
+    window_end = Column(Date)
+    rainfall_mm = Column(Float, nullable=True) # Observed over the window (driest plot)
+    normal_rainfall_mm = Column(Float, nullable=True) # Same window in previous years
+    deficit_pct = Column(Float, nullable=True)
+    heat_days = Column(Integer, default=0)
+    plots_evaluated = Column(Integer, default=0)
+    payout_eligible = Column(Boolean, default=False)
+    trigger = Column(String, nullable=True) # rainfall_deficit | heat_stress
+    evaluated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CarbonPortfolioSummary(Base):
+    """Per-farmer carbon credit totals, refreshed whenever one of their projects changes."""
+    __tablename__ = "carbon_portfolio_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True)
+    project_count = Column(Integer, default=0)
+    verified_project_count = Column(Integer, default=0)
+    projected_credits = Column(Float, default=0.0)
+    verified_credits = Column(Float, default=0.0)
+    available_credits = Column(Float, default=0.0)
+    locked_credits = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MRVRun(Base):
+    """A batch MRV verification run; progress is committed per chunk so a run can be resumed."""
+    __tablename__ = "mrv_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    as_of = Column(Date) # Seasons are evaluated up to this date, fixed for the whole run
+    source = Column(String) # NDVI source requested (earth_engine / simulator)
+    status = Column(String, default="running", index=True) # running, completed, failed
+    total = Column(Integer, default=0) # Evidence_Pending projects when the run started
+    processed = Column(Integer, default=0)
+    verified = Column(Integer, default=0)
+    rejected = Column(Integer, default=0)
+    skipped = Column(Integer, default=0) # left pending (missing evidence or imagery)
+    last_project_id = Column(Integer, default=0) # resume cursor
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(String, nullable=True)
+
+
+class CarbonLedgerEntry(Base):
+    """Append-only credit movements (services/ledger.py); balances on projects and summaries are derived from it."""
+    __tablename__ = "carbon_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    entry_type = Column(String) # issuance, buffer_lock, vesting_release, transfer
+    user_id = Column(Integer, ForeignKey("users.id"), index=True) # whose balance this row moves
+    project_id = Column(Integer, ForeignKey("carbon_projects.id"), nullable=True, index=True)
+    counterparty_id = Column(Integer, ForeignKey("users.id"), nullable=True) # other side of a transfer
+    amount = Column(Float)
+    available_delta = Column(Float, default=0.0)
+    locked_delta = Column(Float, default=0.0)
+    issued_delta = Column(Float, default=0.0)
+    reference = Column(String, nullable=True) # e.g. mrv_run:12, vesting, transfer id
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# The ledger is append-only: corrections are new entries, never edits
+for _action in ("UPDATE", "DELETE"):
+    event.listen(CarbonLedgerEntry.__table__, "after_create", DDL(
+        f"CREATE TRIGGER IF NOT EXISTS carbon_ledger_no_{_action.lower()} BEFORE {_action} ON carbon_ledger "
+        f"BEGIN SELECT RAISE(ABORT, 'carbon_ledger is append-only'); END"
+    ))
+
+
+class TableVersion(Base):
+    """Change counter per table, bumped by triggers on every write; catalog ETags are built from it (services/http_cache.py)."""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, default=0)
+
+# Tables behind cached catalog responses -> the writes that change those responses
+VERSIONED_TABLES = {
+    "schemes": ("INSERT", "UPDATE", "DELETE"),
+    "listings": ("INSERT", "UPDATE", "DELETE"),
+    "insurance_schemes": ("INSERT", "UPDATE", "DELETE"),
+    "insurance_enrollments": ("INSERT", "UPDATE", "DELETE"),
+    "users": ("UPDATE OF name, phone, district", "DELETE"), # seller details shown with listings
+}
+
+def version_trigger_ddl(table, writes):
+    """
+    CREATE TRIGGER statements bumping table_versions after each of the given writes to table.
+    Counters start at a random value so a recreated or restored database never repeats old ETags.
+    """
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_{write.split()[0].lower()} AFTER {write} ON {table} "
+        f"BEGIN INSERT INTO table_versions (table_name, version) VALUES ('{table}', (random() & 1073741823) + 1) "
+        f"ON CONFLICT (table_name) DO UPDATE SET version = version + 1; END"
+        for write in writes
+    ]
+
+# Profile fields eligibility rules read: changing one makes the user's scheme_matches stale
+USERS_MATCHES_STALE_DDL = (
+    "CREATE TRIGGER IF NOT EXISTS users_scheme_matches_stale "
+    "AFTER UPDATE OF district, category, farming_type, land_size, crops ON users "
+    "BEGIN UPDATE users SET schemes_matched_version = NULL WHERE id = NEW.id; END"
+)
+event.listen(User.__table__, "after_create", DDL(USERS_MATCHES_STALE_DDL))
+
+for _table, _writes in VERSIONED_TABLES.items():
+    for _ddl in version_trigger_ddl(_table, _writes):
+        event.listen(Base.metadata.tables[_table], "after_create", DDL(_ddl))
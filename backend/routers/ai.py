@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
+from typing import List
+import asyncio
+import json
 import os
-import google.generativeai as genai
+import re
+import numpy as np
 from PIL import Image
 import io
 from ..database import get_db
 from ..models import ChatMessage, User, StressReport
 from ..dependencies import get_current_user
-from ..services.satellite import get_simulated_satellite_data
+from ..services.satellite import get_simulated_satellite_data, get_simulated_satellite_batch
+from ..services.providers import provider_registry, GEMINI
+from ..services import gemini
 
 router = APIRouter(prefix="/api/ai", tags=["ai"])
 
@@ -18,6 +25,40 @@ class StressAnalysisRequest(BaseModel):
     crop_type: str
     sensor_data: dict = {}
 
+STRESS_PROMPT = """
+            You are an expert agronomist. Analyze the following crop status:
+            Crop: {crop_type}
+            Location: {location}
+            Satellite Data: {sat_data}
+            On-Ground Sensor Data: {sensor_data}
+            
+            Provide a concise assessment of the stress level (Low/Medium/High) and specific recommendations for the farmer.
+            Format response as JSON: {{ "stress_level": "...", "recommendation": "..." }}
+            """
+
+# Max concurrent Gemini calls for a single batch request
+STRESS_MODEL_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+MAX_BATCH_POINTS = 1000
+
+def _generate_stress_assessment(prompt, default_stress, default_recommendation):
+    """Blocking Gemini call + JSON parsing. Run in a thread from async handlers."""
+    model = gemini.model('gemini-2.5-flash')
+    with provider_registry.track(GEMINI):
+        response = model.generate_content(prompt)
+    
+    ai_text = response.text
+    final_stress, recommendation = default_stress, default_recommendation
+    
+    if "stress_level" in ai_text.lower() and "recommendation" in ai_text.lower():
+        try:
+            cleaned = re.sub(r'```json|```', '', ai_text).strip()
+            parsed = json.loads(cleaned)
+            final_stress = parsed.get("stress_level", final_stress)
+            recommendation = parsed.get("recommendation", recommendation)
+        except:
+            recommendation = ai_text # Fallback to raw text if parsing fails
+    return final_stress, recommendation
+
 @router.post("/analyze/stress")
 async def analyze_stress(
     request: StressAnalysisRequest,
@@ -34,34 +75,17 @@ async def analyze_stress(
     try:
         api_key = os.getenv("GEMINI_API_KEY")
         if api_key:
-            genai.configure(api_key=api_key)
-            
-            prompt = f"""
-            You are an expert agronomist. Analyze the following crop status:
-            Crop: {request.crop_type}
-            Location: {request.lat}, {request.lng}
-            Satellite Data: {sat_data}
-            On-Ground Sensor Data: {request.sensor_data}
-            
-            Provide a concise assessment of the stress level (Low/Medium/High) and specific recommendations for the farmer.
-            Format response as JSON: {{ "stress_level": "...", "recommendation": "..." }}
-            """
-            
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(prompt)
-            
-            ai_text = response.text
+            prompt = STRESS_PROMPT.format(
+                crop_type=request.crop_type,
+                location=f"{request.lat}, {request.lng}",
+                sat_data=sat_data,
+                sensor_data=request.sensor_data
+            )
             
-            if "stress_level" in ai_text.lower() and "recommendation" in ai_text.lower():
-                import json
-                import re
-                try:
-                    cleaned = re.sub(r'```json|```', '', ai_text).strip()
-                    parsed = json.loads(cleaned)
-                    final_stress = parsed.get("stress_level", final_stress)
-                    recommendation = parsed.get("recommendation", recommendation)
-                except:
-                    recommendation = ai_text # Fallback to raw text if parsing fails
+            loop = asyncio.get_event_loop()
+            final_stress, recommendation = await loop.run_in_executor(
+                None, _generate_stress_assessment, prompt, final_stress, recommendation
+            )
         else:
              print("Warning: GEMINI_API_KEY not found. Using simulation fallback.")
              
@@ -90,6 +114,126 @@ async def analyze_stress(
         }
     }
 
+class StressPoint(BaseModel):
+    lat: float
+    lng: float
+    crop_type: str
+
+class BatchStressAnalysisRequest(BaseModel):
+    points: List[StressPoint]
+    sensor_data: dict = {}
+
+@router.post("/analyze/stress/batch")
+async def analyze_stress_batch(
+    request: BatchStressAnalysisRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Crop-stress triage for many points at once.
+    Points with the same crop and indicator buckets share a single model call.
+    """
+    points = request.points
+    if not points:
+        return {"count": 0, "model_calls": 0, "results": []}
+    if len(points) > MAX_BATCH_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_POINTS} points per batch")
+
+    # 1. Satellite indicators for all points in one vectorized pass
+    lats = np.array([p.lat for p in points])
+    lngs = np.array([p.lng for p in points])
+    sat = get_simulated_satellite_batch(lats, lngs)
+
+    # 2. Bucket points: crop x stress level x NDVI band (0.1) x moisture band (10%)
+    crops, crop_idx = np.unique([p.crop_type.strip().lower() for p in points], return_inverse=True)
+    keys = np.stack([
+        crop_idx.ravel(),
+        sat["stress_code"],
+        np.floor(sat["ndvi"] * 10).astype(int),
+        (sat["soil_moisture"] // 10).astype(int),
+    ], axis=1)
+    bucket_keys, bucket_of_point = np.unique(keys, axis=0, return_inverse=True)
+    bucket_of_point = bucket_of_point.ravel()
+    _, representatives = np.unique(bucket_of_point, return_index=True) # first point of each bucket
+    bucket_sizes = np.bincount(bucket_of_point)
+
+    # Default per-bucket assessment from the satellite analysis
+    assessments = [
+        (sat["stress_level"][i], sat["satellite_analysis"][i]) for i in representatives
+    ]
+
+    # 3. One Gemini call per bucket, fanned out under a concurrency limit
+    model_calls = 0
+    api_key = os.getenv("GEMINI_API_KEY")
+    if api_key:
+        semaphore = asyncio.Semaphore(STRESS_MODEL_CONCURRENCY)
+        loop = asyncio.get_event_loop()
+
+        async def assess(bucket):
+            i = representatives[bucket]
+            ndvi_band, moisture_band = bucket_keys[bucket][2], bucket_keys[bucket][3]
+            prompt = STRESS_PROMPT.format(
+                crop_type=points[i].crop_type,
+                location=f"{int(bucket_sizes[bucket])} fields in the same district",
+                sat_data={
+                    "ndvi_range": [round(ndvi_band * 0.1, 1), round((ndvi_band + 1) * 0.1, 1)],
+                    "soil_moisture_range": [int(moisture_band * 10), int((moisture_band + 1) * 10)],
+                    "stress_level": sat["stress_level"][i],
+                },
+                sensor_data=request.sensor_data
+            )
+            async with semaphore:
+                try:
+                    return await loop.run_in_executor(
+                        None, _generate_stress_assessment, prompt, *assessments[bucket]
+                    )
+                except Exception as e:
+                    print(f"AI Analysis Failed for bucket {bucket}: {e}")
+                    return assessments[bucket]
+
+        assessments = await asyncio.gather(*[assess(b) for b in range(len(bucket_keys))])
+        model_calls = len(bucket_keys)
+    else:
+        print("Warning: GEMINI_API_KEY not found. Using simulation fallback.")
+
+    # 4. Bulk insert reports
+    rows = []
+    results = []
+    for i, p in enumerate(points):
+        stress_level, recommendation = assessments[bucket_of_point[i]]
+        rows.append({
+            "user_id": current_user.id,
+            "location_lat": p.lat,
+            "location_lng": p.lng,
+            "crop_type": p.crop_type,
+            "ndvi_score": float(sat["ndvi"][i]),
+            "stress_level": stress_level,
+            "recommendation": recommendation,
+        })
+        results.append({
+            "lat": p.lat,
+            "lng": p.lng,
+            "crop_type": p.crop_type,
+            "satellite_data": {
+                "ndvi": float(sat["ndvi"][i]),
+                "soil_moisture": float(sat["soil_moisture"][i]),
+                "temperature": float(sat["temperature"][i]),
+            },
+            "ai_analysis": {
+                "stress_level": stress_level,
+                "recommendation": recommendation
+            }
+        })
+    db.execute(insert(StressReport), rows)
+    db.commit()
+
+    return {
+        "count": len(points),
+        "buckets": len(bucket_keys),
+        "model_calls": model_calls,
+        "results": results
+    }
+
 class ChatRequest(BaseModel):
     message: str
 
@@ -101,9 +245,6 @@ async def ai_chat(
 ):
     
     try:
-        api_key = os.getenv("GEMINI_API_KEY")
-        genai.configure(api_key=api_key)
-        
         # 1. Fetch History (Last 5 messages)
         history = db.query(ChatMessage).filter(ChatMessage.user_id == current_user.id).order_by(ChatMessage.timestamp.desc()).limit(5).all()
         history.reverse()
@@ -141,8 +282,9 @@ async def ai_chat(
 
 def _generate_chat_response(prompt):
     """Helper to run blocking Gemini call in thread"""
-    model = genai.GenerativeModel('gemini-2.5-flash')
-    response = model.generate_content(prompt)
+    model = gemini.model('gemini-2.5-flash')
+    with provider_registry.track(GEMINI):
+        response = model.generate_content(prompt)
     return response.text
 
 
@@ -152,9 +294,6 @@ async def diagnose_crop(
     mode: str = Form("diagnosis"),
     current_user: User = Depends(get_current_user)
 ):
-    api_key = os.getenv("GEMINI_API_KEY")
-    genai.configure(api_key=api_key)
-    
     content = await file.read()
     image = Image.open(io.BytesIO(content))
     
@@ -185,8 +324,9 @@ async def diagnose_crop(
         }
         """
         
-    model = genai.GenerativeModel('gemini-2.5-flash')
-    response = model.generate_content([prompt, image])
+    model = gemini.model('gemini-2.5-flash')
+    with provider_registry.track(GEMINI):
+        response = model.generate_content([prompt, image])
     
     try:
         import json
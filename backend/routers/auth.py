@@ -6,7 +6,7 @@ from ..models import User
 from ..auth_utils import create_access_token
 from datetime import timedelta
 from ..auth_utils import ACCESS_TOKEN_EXPIRE_MINUTES
-import random
+from ..services.otp import otp_service, OTPThrottledError, VALID, EXPIRED, LOCKED
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -17,38 +17,39 @@ class OTPVerifyRequest(BaseModel):
     phone: str
     otp: str
 
-# In-memory store for OTPs (Use Redis in production)
-otp_store = {}
-
 @router.post("/send-otp")
-async def send_otp(request: LoginRequest):
-    # 1. Generate OTP (Hardcoded for Demo/Testing)
-    otp = "1234" # str(random.randint(1000, 9999))
-    
-    # 2. Store OTP
-    otp_store[request.phone] = otp
+def send_otp(request: LoginRequest):
+    # 1. Generate + store OTP in the shared store (OTP_STORE=memory|sqlite|redis)
+    try:
+        otp = otp_service.send(request.phone)
+    except OTPThrottledError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many OTP requests. Try again in {e.retry_after} seconds.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     
-    # 3. Send OTP (Simulated)
+    # 2. Send OTP (Simulated)
     # in REAL world, call Twilio/Msg91 API here
     print(f"------------ OTP for {request.phone}: {otp} ------------")
     
     return {"message": "OTP sent successfully. Check console for code."}
 
 @router.post("/verify-otp")
-async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
-    # 1. Verify OTP
-    print(f"DEBUG: Verify OTP - Phone: '{request.phone}', OTP: '{request.otp}'")
-    stored_otp = otp_store.get(request.phone)
+def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
+    # 1. Verify OTP (a valid code is consumed by the store)
     # Master OTP for testing/demo
-    if request.otp == "0000":
-        pass
-    elif not stored_otp or stored_otp != request.otp:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-    
-    # 2. Clear OTP
-    otp_store.pop(request.phone, None)
+    if request.otp != "0000":
+        outcome = otp_service.verify(request.phone, request.otp)
+        if outcome == LOCKED:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                                detail="Too many incorrect attempts. Request a new OTP.")
+        if outcome == EXPIRED:
+            raise HTTPException(status_code=400, detail="OTP expired")
+        if outcome != VALID:
+            raise HTTPException(status_code=400, detail="Invalid OTP")
     
-    # 3. Check if User exists, if not create
+    # 2. Check if User exists, if not create
     user = db.query(User).filter(User.phone == request.phone).first()
     if not user:
         user = User(phone=request.phone)
@@ -56,7 +57,7 @@ async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(user)
     
-    # 4. Generate Token
+    # 3. Generate Token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.phone}, expires_delta=access_token_expires
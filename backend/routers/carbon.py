@@ -1,26 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi.responses import FileResponse
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from sqlalchemy import select, func
 from datetime import datetime
 import json
 import random
-import ee
 
 from ..database import get_db
-from ..models import CarbonProject, CarbonEvidence, Plot, User
+from ..models import CarbonProject, CarbonEvidence, CarbonLedgerEntry, Plot, User
 from ..dependencies import get_current_user
+from ..services.portfolio import refresh_summary, summary_for, portfolio_totals
+from ..services import mrv
+from ..services import evidence_store
+from ..services import ledger
+from ..fast_json import rows_response
+from ..services.earth_engine import earth_engine_service
 
 router = APIRouter(prefix="/api/carbon", tags=["carbon"])
 
 # --- Earth Engine Setup ---
-EE_INITIALIZED = False
-try:
-    ee.Initialize()
-    EE_INITIALIZED = True
-except Exception as e:
-    print(f"Earth Engine Authentication Failed: {e}")
-    # In production, handle authentication (service account) here.
+# ee is imported and initialized once by earth_engine_service (first use or startup warm-up)
 
 def calculate_ndvi(image):
     """Calculates NDVI for a given image."""
@@ -37,6 +38,26 @@ class EvidenceCreate(BaseModel):
     geo_lat: float
     geo_lng: float
 
+class TransferRequest(BaseModel):
+    to_user_id: int
+    amount: float
+    reference: Optional[str] = None
+
+class LedgerEntryResponse(BaseModel):
+    id: int
+    entry_type: str
+    project_id: Optional[int]
+    counterparty_id: Optional[int]
+    amount: float
+    available_delta: float
+    locked_delta: float
+    issued_delta: float
+    reference: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class AnalysisRequest(BaseModel):
     geometry: Dict[str, Any] # GeoJSON Polygon
 
@@ -61,20 +82,93 @@ class ProjectResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PortfolioTotals(BaseModel):
+    project_count: int
+    verified_project_count: int
+    projected_credits: float
+    verified_credits: float
+    available_credits: float
+    locked_credits: float
+    price_per_credit_inr: float
+    verified_value_inr: float
+    available_value_inr: float
+
+class PortfolioResponse(BaseModel):
+    projects: List[ProjectResponse]
+    totals: PortfolioTotals
+
+def _project_response(p, plot_name, evidence_count):
+    return ProjectResponse(
+        id=p.id,
+        plot_id=p.plot_id,
+        plot_name=plot_name,
+        methodology=p.methodology,
+        status=p.status,
+        projected_credits=p.projected_sequestration,
+        verified_credits=p.verified_credits,
+        available_credits=p.available_credits,
+        locked_credits=p.locked_credits,
+        start_date=p.start_date,
+        vesting_end_date=p.vesting_end_date,
+        verification_cost_usd=p.verification_cost_usd,
+        buffer_pool_percentage=p.buffer_pool_percentage,
+        additionality_score=p.additionality_score,
+        requires_soil_sample=p.requires_soil_sample,
+        evidence_count=evidence_count
+    )
+
+# ProjectResponse field -> column, for reading projects as plain rows
+PROJECT_COLUMNS = {
+    "id": CarbonProject.id,
+    "plot_id": CarbonProject.plot_id,
+    "plot_name": Plot.name,
+    "methodology": CarbonProject.methodology,
+    "status": CarbonProject.status,
+    "projected_credits": CarbonProject.projected_sequestration,
+    "verified_credits": CarbonProject.verified_credits,
+    "available_credits": CarbonProject.available_credits,
+    "locked_credits": CarbonProject.locked_credits,
+    "start_date": CarbonProject.start_date,
+    "vesting_end_date": CarbonProject.vesting_end_date,
+    "verification_cost_usd": CarbonProject.verification_cost_usd,
+    "buffer_pool_percentage": CarbonProject.buffer_pool_percentage,
+    "additionality_score": CarbonProject.additionality_score,
+    "requires_soil_sample": CarbonProject.requires_soil_sample,
+}
+
+def _load_projects(db, user_id):
+    """A farmer's projects with plot name and evidence count, in one query, as ProjectResponse-shaped dicts."""
+    evidence_count = (
+        select(func.count(CarbonEvidence.id))
+        .where(CarbonEvidence.project_id == CarbonProject.id)
+        .correlate(CarbonProject)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(*PROJECT_COLUMNS.values(), evidence_count)
+        .join(Plot, Plot.id == CarbonProject.plot_id)
+        .where(CarbonProject.user_id == user_id)
+        .order_by(CarbonProject.id)
+    ).all()
+    fields = (*PROJECT_COLUMNS, "evidence_count")
+    return [dict(zip(fields, row)) for row in rows]
+
 # --- Endpoints ---
 
 @router.post("/analyze")
-async def analyze_farm(request: AnalysisRequest):
+def analyze_farm(request: AnalysisRequest):
     """
     Real-time Satellite Analysis for Carbon Potential.
     Expects GeoJSON Polygon.
     Returns: Eligibility, Credits, NDVI Growth Data.
+    Plain def: EE initialization, getInfo() and the simulated delay all block,
+    so FastAPI runs this in its threadpool instead of on the event loop.
     """
     try:
         geojson_polygon = request.geometry
         
         # If EE not initialized, fallback to mock (for dev environment without credentials)
-        if not EE_INITIALIZED:
+        if not earth_engine_service.initialize():
             # Simulate processing time
             import time
             time.sleep(2)
@@ -92,6 +186,7 @@ async def analyze_farm(request: AnalysisRequest):
             }
 
         # Real Earth Engine Analysis
+        ee = earth_engine_service.ee
         roi = ee.Geometry.Polygon(geojson_polygon['coordinates'][0]) # Assuming simple polygon
 
         start_date_2024 = '2024-01-01'
@@ -163,29 +258,18 @@ async def get_my_projects(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    projects = db.query(CarbonProject).filter(CarbonProject.user_id == current_user.id).all()
-    
-    results = []
-    for p in projects:
-        results.append(ProjectResponse(
-            id=p.id,
-            plot_id=p.plot_id,
-            plot_name=p.plot.name,
-            methodology=p.methodology,
-            status=p.status,
-            projected_credits=p.projected_sequestration,
-            verified_credits=p.verified_credits,
-            available_credits=p.available_credits,
-            locked_credits=p.locked_credits,
-            start_date=p.start_date,
-            vesting_end_date=p.vesting_end_date,
-            verification_cost_usd=p.verification_cost_usd,
-            buffer_pool_percentage=p.buffer_pool_percentage,
-            additionality_score=p.additionality_score,
-            requires_soil_sample=p.requires_soil_sample,
-            evidence_count=len(p.evidence)
-        ))
-    return results
+    return rows_response(_load_projects(db, current_user.id))
+
+@router.get("/portfolio", response_model=PortfolioResponse)
+async def get_portfolio(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Projects plus precomputed credit totals and their value at the current price."""
+    return {
+        "projects": _load_projects(db, current_user.id),
+        "totals": portfolio_totals(summary_for(db, current_user.id)),
+    }
 
 @router.post("/enroll", response_model=ProjectResponse)
 async def enroll_plot(
@@ -203,24 +287,17 @@ async def enroll_plot(
     if existing:
         raise HTTPException(status_code=400, detail="Plot already enrolled in a carbon project")
         
-    # 3. Calculate Potential (Simulated Digital MRV Baseline)
-    # in real life, this calls Earth Engine for 3-year history
-    base_potential_per_acre = 0.0
-    if project.methodology == "Cover-Crop":
-        base_potential_per_acre = 0.8 # tons/acre
-    elif project.methodology == "No-Till":
-        base_potential_per_acre = 1.2
-    elif project.methodology == "Agroforestry":
-        base_potential_per_acre = 2.5
-        
-    total_potential = plot.area * base_potential_per_acre
+    # 3. Calculate Potential (full methodology rate; the MRV run measures the
+    # actual uplift against the plot's 3-year NDVI history at verification)
+    total_potential = plot.area * mrv.METHODOLOGY_RATES.get(project.methodology, 0.0)
 
     # Set vesting period (5 years from enrollment)
     from datetime import timedelta
     vesting_date = datetime.utcnow() + timedelta(days=5*365)
     
-    # Simulate additionality pre-check (in production, this queries district data)
-    initial_additionality = random.uniform(0.1, 0.6) # Mock: will be verified later
+    # Additionality pre-check: share of district farmers already using this practice
+    initial_additionality = mrv.district_adoption(db, {(current_user.district, project.methodology)})[
+        (current_user.district, project.methodology)]
 
     new_project = CarbonProject(
         plot_id=plot.id,
@@ -237,53 +314,65 @@ async def enroll_plot(
     )
     
     db.add(new_project)
+    db.flush()
+    refresh_summary(db, current_user.id)
     db.commit()
     db.refresh(new_project)
     
-    return ProjectResponse(
-        id=new_project.id,
-        plot_id=new_project.plot_id,
-        plot_name=plot.name,
-        methodology=new_project.methodology,
-        status=new_project.status,
-        projected_credits=new_project.projected_sequestration,
-        verified_credits=new_project.verified_credits,
-        available_credits=new_project.available_credits,
-        locked_credits=new_project.locked_credits,
-        start_date=new_project.start_date,
-        vesting_end_date=new_project.vesting_end_date,
-        verification_cost_usd=new_project.verification_cost_usd,
-        buffer_pool_percentage=new_project.buffer_pool_percentage,
-        additionality_score=new_project.additionality_score,
-        requires_soil_sample=new_project.requires_soil_sample,
-        evidence_count=0
-    )
+    return _project_response(new_project, plot.name, 0)
 
 @router.post("/{project_id}/evidence")
 async def upload_evidence(
     project_id: int,
-    description: str,
-    geo_lat: float,
-    geo_lng: float,
-    # file: UploadFile = File(...) # Simplified for demo, acting as metadata upload
+    description: str = Form(...),
+    geo_lat: float = Form(...),
+    geo_lng: float = Form(...),
+    file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     project = db.query(CarbonProject).filter(CarbonProject.id == project_id, CarbonProject.user_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-        
-    # Create Evidence Record
+
+    # 1. Stream to the content-addressed store (hashed as it arrives)
+    try:
+        stored = await evidence_store.store_upload(file)
+    except evidence_store.EvidenceTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    duplicate = db.query(CarbonEvidence.id).filter(
+        CarbonEvidence.project_id == project.id, CarbonEvidence.sha256 == stored.sha256
+    ).first()
+    if duplicate:
+        raise HTTPException(status_code=409, detail=f"This file was already uploaded as evidence #{duplicate.id}")
+
+    # 2. EXIF GPS + thumbnail on the image worker pool
+    image = await evidence_store.process_image_async(stored)
+    exif_lat, exif_lng = image["gps"] or (None, None)
+    gps_distance = (
+        round(evidence_store.distance_m(exif_lat, exif_lng, geo_lat, geo_lng), 1) if image["gps"] else None
+    )
+
+    # 3. Create Evidence Record
     new_evidence = CarbonEvidence(
         project_id=project.id,
         description=description,
         geo_lat=geo_lat,
         geo_lng=geo_lng,
-        image_url="https://via.placeholder.com/300?text=Farm+Evidence", # Mock
-        verified=False
+        verified=False,
+        sha256=stored.sha256,
+        file_size=stored.size,
+        content_type=stored.content_type,
+        exif_lat=exif_lat,
+        exif_lng=exif_lng,
+        gps_distance_m=gps_distance
     )
-    
     db.add(new_evidence)
+    db.flush()
+    new_evidence.image_url = f"/api/carbon/evidence/{new_evidence.id}/file"
+    if image["thumbnail"]:
+        new_evidence.thumbnail_url = f"/api/carbon/evidence/{new_evidence.id}/thumbnail"
     
     # Auto-update status to "Verification Pending" if it was Enrolled
     if project.status == "Enrolled":
@@ -291,10 +380,52 @@ async def upload_evidence(
         
     db.commit()
     
-    return {"message": "Evidence uploaded successfully", "status": project.status}
+    return {
+        "message": "Evidence uploaded successfully",
+        "status": project.status,
+        "evidence_id": new_evidence.id,
+        "sha256": stored.sha256,
+        "size": stored.size,
+        "image_url": new_evidence.image_url,
+        "thumbnail_url": new_evidence.thumbnail_url,
+        "exif_location": {"lat": exif_lat, "lng": exif_lng} if image["gps"] else None,
+        "gps_distance_m": gps_distance,
+        "gps_match": gps_distance <= evidence_store.GPS_MATCH_RADIUS_M if gps_distance is not None else None
+    }
+
+def _own_evidence(db, evidence_id, user):
+    evidence = (
+        db.query(CarbonEvidence)
+        .join(CarbonProject, CarbonProject.id == CarbonEvidence.project_id)
+        .filter(CarbonEvidence.id == evidence_id, CarbonProject.user_id == user.id)
+        .first()
+    )
+    if not evidence or not evidence.sha256:
+        raise HTTPException(status_code=404, detail="Evidence file not found")
+    return evidence
+
+@router.get("/evidence/{evidence_id}/file")
+async def get_evidence_file(
+    evidence_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    evidence = _own_evidence(db, evidence_id, current_user)
+    return FileResponse(evidence_store.blob_path(evidence.sha256), media_type=evidence.content_type)
+
+@router.get("/evidence/{evidence_id}/thumbnail")
+async def get_evidence_thumbnail(
+    evidence_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    evidence = _own_evidence(db, evidence_id, current_user)
+    if not evidence.thumbnail_url:
+        raise HTTPException(status_code=404, detail="No thumbnail for this evidence")
+    return FileResponse(evidence_store.thumbnail_path(evidence.sha256), media_type="image/jpeg")
 
 @router.post("/{project_id}/verify")
-async def trigger_verification(
+def trigger_verification(
     project_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -306,59 +437,88 @@ async def trigger_verification(
     if project.status != "Evidence_Pending":
         raise HTTPException(status_code=400, detail="Project not ready for verification (Upload evidence first)")
         
-    # REALISTIC CONSTRAINT 1: Additionality Check (Reject Common Practices)
-    # Simulate check: Is this practice >50% common in the region?
-    # In production, this queries a registry database
-    regional_adoption_rate = random.uniform(0.2, 0.7) # Mock data
-    project.additionality_score = regional_adoption_rate
-    
-    if regional_adoption_rate > 0.5:
-        project.status = "Audit_Failed"
-        db.commit()
-        return {
-            "status": "REJECTED",
-            "verified_credits": 0.0,
-            "message": f"Additionality Check Failed: {project.methodology} is already common practice in your district ({int(regional_adoption_rate*100)}% adoption). Only novel practices qualify for credits."
-        }
-    
-    # REALISTIC CONSTRAINT 2: Soil Sample Requirement
-    if project.requires_soil_sample and len(project.evidence) < 2:
+    # Soil-based methodologies need at least 2 physical soil sample reports
+    evidence_count = db.scalar(select(func.count(CarbonEvidence.id)).where(CarbonEvidence.project_id == project.id))
+    if project.requires_soil_sample and evidence_count < mrv.MIN_EVIDENCE:
         raise HTTPException(
             status_code=400, 
             detail="Insufficient Evidence: Soil-based methodologies require at least 2 physical soil sample reports. Upload lab test results."
         )
-    
-    # Simulate Algorithmic Verification (Satellite + Evidence Match)
-    success = random.choice([True, True, True, False]) # 75% success
-    
-    if success:
-        project.status = "Verified"
-        raw_credits = project.projected_sequestration
-        
-        # REALISTIC CONSTRAINT 3: Buffer Pool Deduction (15%)
-        buffer_deduction = raw_credits * (project.buffer_pool_percentage / 100.0)
-        project.locked_credits = buffer_deduction
-        project.available_credits = raw_credits - buffer_deduction
-        project.verified_credits = raw_credits # Total issued
-        
-        # REALISTIC CONSTRAINT 4: Vesting Period (5 years)
-        from datetime import timedelta
-        project.vesting_end_date = project.start_date + timedelta(days=5*365)
-        
-        # Update plot for backward compatibility
-        project.plot.carbon_credits = project.available_credits
-        project.plot.organic_score = 100.0
-    else:
-        project.status = "Audit_Failed"
-        
+
+    # Same pipeline as the batch MRV run (python -m backend.services.mrv), for one project:
+    # NDVI uplift over the 3-year baseline, district additionality, 15% buffer pool, 5-year vesting
+    # (plain def: EE initialization and reduceRegions().getInfo() block, so this runs in the threadpool)
+    try:
+        counts = mrv.verify_projects(db, [project.id])
+    except mrv.ConcurrentVerificationError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Project is already being verified")
+    if counts[None]:
+        raise HTTPException(status_code=400, detail="Insufficient cloud-free satellite imagery for this plot yet")
     db.commit()
-    
+    db.refresh(project)
+    success = project.status == "Verified"
+
+    if not success:
+        return {
+            "status": "REJECTED",
+            "verified_credits": 0.0,
+            "message": (
+                f"Additionality Check Failed: {project.methodology} is already common practice in your district ({int(project.additionality_score*100)}% adoption). Only novel practices qualify for credits."
+                if project.additionality_score > mrv.ADDITIONALITY_THRESHOLD
+                else "Verification Failed - No measurable vegetation change over the baseline"
+            )
+        }
+
     return {
         "status": project.status,
-        "total_credits_issued": project.verified_credits if success else 0.0,
-        "buffer_pool_locked": project.locked_credits if success else 0.0,
-        "available_for_sale": project.available_credits if success else 0.0,
-        "vesting_end_date": project.vesting_end_date.isoformat() if success and project.vesting_end_date else None,
+        "total_credits_issued": project.verified_credits,
+        "buffer_pool_locked": project.locked_credits,
+        "available_for_sale": project.available_credits,
+        "vesting_end_date": project.vesting_end_date.isoformat() if project.vesting_end_date else None,
         "verification_cost_usd": project.verification_cost_usd,
-        "message": f"Verification Complete - {int(project.buffer_pool_percentage)}% locked in buffer pool until {project.vesting_end_date.year if project.vesting_end_date else 'N/A'}" if success else "Verification Failed - Evidence unclear"
+        "baseline_ndvi": project.baseline_ndvi,
+        "current_ndvi": project.current_ndvi,
+        "message": f"Verification Complete - {int(project.buffer_pool_percentage)}% locked in buffer pool until {project.vesting_end_date.year if project.vesting_end_date else 'N/A'}"
     }
+
+@router.post("/{project_id}/transfer")
+async def transfer_credits(
+    project_id: int,
+    request: TransferRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Transfers available (vested or unbuffered) credits from one of the user's projects."""
+    if request.amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
+    if request.to_user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="Cannot transfer credits to yourself")
+    project = db.query(CarbonProject.id).filter(CarbonProject.id == project_id, CarbonProject.user_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not db.query(User.id).filter(User.id == request.to_user_id).first():
+        raise HTTPException(status_code=404, detail="Recipient not found")
+
+    try:
+        ledger.post(db, ledger.transfer(current_user.id, request.to_user_id, project_id, request.amount, request.reference))
+    except ledger.InsufficientCreditsError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Insufficient available credits")
+    db.commit()
+
+    available = db.scalar(select(CarbonProject.available_credits).where(CarbonProject.id == project_id))
+    return {"message": "Transfer complete", "transferred": request.amount, "project_available_credits": available}
+
+@router.get("/ledger", response_model=List[LedgerEntryResponse])
+async def get_ledger(
+    project_id: Optional[int] = None,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The user's credit history, newest first."""
+    query = db.query(CarbonLedgerEntry).filter(CarbonLedgerEntry.user_id == current_user.id)
+    if project_id is not None:
+        query = query.filter(CarbonLedgerEntry.project_id == project_id)
+    return query.order_by(CarbonLedgerEntry.id.desc()).limit(min(limit, 500)).all()
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
+from sqlalchemy import select, literal
 from typing import List, Optional
 from pydantic import BaseModel
 from ..database import get_db
 from ..models import CommunityPost, CommunityComment, CommunityLike, User
 from ..dependencies import get_current_user
+from ..fast_json import rows_response
 
 router = APIRouter(prefix="/api/community", tags=["community"])
 
@@ -44,40 +46,54 @@ async def get_feed(
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user)
 ):
-    posts = db.query(CommunityPost).options(
-        joinedload(CommunityPost.user),
-        joinedload(CommunityPost.comments).joinedload(CommunityComment.user),
-        joinedload(CommunityPost.likes)
-    ).order_by(CommunityPost.created_at.desc()).all()
-    
-    results = []
-    for p in posts:
-        liked_by_me = False
-        if current_user:
-            liked_by_me = any(l.user_id == current_user.id for l in p.likes)
+    # 1. Posts with author, newest first; liked_by_me is an indexed (post_id, user_id) probe per post
+    if current_user:
+        liked = (
+            select(CommunityLike.id)
+            .where(CommunityLike.post_id == CommunityPost.id, CommunityLike.user_id == current_user.id)
+            .exists()
+        )
+    else:
+        liked = literal(False)
+    posts = db.execute(
+        select(CommunityPost.id, User.name, User.district, CommunityPost.content, CommunityPost.image_url,
+               CommunityPost.likes_count, CommunityPost.created_at, liked)
+        .outerjoin(User, User.id == CommunityPost.user_id)
+        .order_by(CommunityPost.created_at.desc())
+    ).all()
 
-        comments = []
-        for c in p.comments:
-            comments.append(CommentResponse(
-                id=c.id,
-                user_name=c.user.name or "Unknown",
-                text=c.text,
-                created_at=c.created_at.isoformat()
-            ))
+    # 2. Every comment with its author, grouped by post (rather than joinedload's posts x comments x likes rows)
+    comments_by_post = {}
+    for comment_id, post_id, user_name, text, created_at in db.execute(
+        select(CommunityComment.id, CommunityComment.post_id, User.name, CommunityComment.text,
+               CommunityComment.created_at)
+        .outerjoin(User, User.id == CommunityComment.user_id)
+        .order_by(CommunityComment.post_id, CommunityComment.id)
+    ):
+        comments_by_post.setdefault(post_id, []).append({
+            "id": comment_id,
+            "user_name": user_name or "Unknown",
+            "text": text,
+            "created_at": created_at.isoformat(),
+        })
 
-        results.append(PostResponse(
-            id=p.id,
-            user_name=p.user.name or "Unknown",
-            user_district=p.user.district,
-            content=p.content,
-            image_url=p.image_url,
-            likes_count=p.likes_count,
-            comments_count=len(p.comments),
-            created_at=p.created_at.isoformat(),
-            liked_by_me=liked_by_me,
-            comments=comments
-        ))
-    return results
+    # 3. Rows are shaped as PostResponse and serialized once (see fast_json)
+    results = []
+    for post_id, user_name, district, content, image_url, likes_count, created_at, liked_by_me in posts:
+        comments = comments_by_post.get(post_id, [])
+        results.append({
+            "id": post_id,
+            "user_name": user_name or "Unknown",
+            "user_district": district,
+            "content": content,
+            "image_url": image_url,
+            "likes_count": likes_count,
+            "comments_count": len(comments),
+            "created_at": created_at.isoformat(),
+            "liked_by_me": bool(liked_by_me),
+            "comments": comments,
+        })
+    return rows_response(results)
 
 @router.post("/", response_model=PostResponse)
 async def create_post(
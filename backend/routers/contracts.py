@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import update, tuple_, and_, or_
 from sqlalchemy.orm import Session
 from datetime import datetime
-import random
-from ..database import get_db
+import base64
+from ..database import get_db, SessionLocal
 from ..models import Contract, User
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, get_current_verifier
+from ..services.trust import record_event, CONTRACT_SIGNED, CONTRACT_FULFILLED
+from ..services.matching import contract_matcher, MAX_MATCHES
 from pydantic import BaseModel
 from typing import List, Optional
 
 router = APIRouter(prefix="/api/contracts", tags=["contracts"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 class ContractSign(BaseModel):
     contract_id: int
     signature_hash: str
@@ -20,7 +26,7 @@ class ContractResponse(BaseModel):
     crop_type: str
     quantity: float
     price_per_qt: float
-    delivery_date: datetime
+    delivery_date: Optional[datetime]
     status: str
     terms: str
     digital_signature: Optional[str]
@@ -28,50 +34,146 @@ class ContractResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ContractMatch(ContractResponse):
+    match_score: float
+
+class FarmerCandidate(BaseModel):
+    user_id: int
+    name: Optional[str]
+    district: Optional[str]
+    match_score: float
+
+def _encode_cursor(contract):
+    raw = f"{contract.delivery_date.isoformat() if contract.delivery_date else ''}|{contract.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    try:
+        delivery, contract_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (datetime.fromisoformat(delivery) if delivery else None), int(contract_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/", response_model=List[ContractResponse])
-async def get_contracts(
+def get_contracts(
+    response: Response,
     status: str = "Open",
+    crop: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # If status is Open, show all open contracts
+    # If status is Open, show all open contracts (undated first, then soonest delivery)
     # If status is Signed, show only MY signed contracts
+    # Keyset pagination: the next page cursor is returned in the X-Next-Cursor header
     if status == "Open":
-        contracts = db.query(Contract).filter(Contract.status == "Open").all()
-        # If empty (demo), create some Dummy Contracts
-        if not contracts:
-            dummies = [
-                Contract(buyer_name="ITC Agribusiness", crop_type="Wheat", quantity=10, price_per_qt=2400, delivery_date=datetime(2026, 4, 15), terms="Moisture < 12%, Max 2% Foreign Matter", status="Open"),
-                Contract(buyer_name="Pepsico India", crop_type="Potato", quantity=50, price_per_qt=1800, delivery_date=datetime(2026, 3, 1), terms="Grade A Processable, Size > 45mm", status="Open"),
-                Contract(buyer_name="Reliance Fresh", crop_type="Tomato", quantity=5, price_per_qt=1500, delivery_date=datetime(2026, 2, 28), terms="Firm Red, No bruises", status="Open"),
-            ]
-            db.add_all(dummies)
-            db.commit()
-            contracts = db.query(Contract).filter(Contract.status == "Open").all()
-        return contracts
+        query = db.query(Contract).filter(Contract.status == "Open")
+        if crop:
+            query = query.filter(Contract.crop_type == crop)
+        if cursor:
+            delivery, contract_id = _decode_cursor(cursor)
+            if delivery is None:
+                # Still among the undated contracts: the rest of them, then every dated one
+                query = query.filter(or_(and_(Contract.delivery_date.is_(None), Contract.id > contract_id),
+                                         Contract.delivery_date.isnot(None)))
+            else:
+                query = query.filter(tuple_(Contract.delivery_date, Contract.id) > (delivery, contract_id))
+        contracts = query.order_by(Contract.delivery_date.asc().nulls_first(), Contract.id).limit(limit + 1).all()
     
     elif status == "Signed":
-        return db.query(Contract).filter(Contract.farmer_id == current_user.id).all()
+        query = db.query(Contract).filter(Contract.farmer_id == current_user.id)
+        if cursor:
+            query = query.filter(Contract.id > _decode_cursor(cursor)[1])
+        contracts = query.order_by(Contract.id).limit(limit + 1).all()
     
-    return []
+    else:
+        return []
+
+    if len(contracts) > limit:
+        contracts = contracts[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(contracts[-1])
+    return contracts
+
+@router.get("/matches", response_model=List[ContractMatch])
+def get_matches(
+    limit: int = Query(20, ge=1, le=MAX_MATCHES),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Open contracts ranked by fit with the farmer's crops, plot area and crop health."""
+    contract_matcher.refresh_in_background(SessionLocal)
+    return [
+        {**contract, "status": "Open", "digital_signature": None, "match_score": score}
+        for contract, score in contract_matcher.matches_for(db, current_user.id, limit=limit)
+    ]
+
+@router.get("/{contract_id}/candidates", response_model=List[FarmerCandidate])
+def get_candidates(
+    contract_id: int,
+    limit: int = Query(20, ge=1, le=MAX_MATCHES),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Farmers best placed to supply an open contract (buyer view)."""
+    candidates = contract_matcher.candidates_for(contract_id, limit=limit)
+    if candidates is None:
+        raise HTTPException(status_code=404, detail="Open contract not found")
+    users = {u.id: u for u in db.query(User).filter(User.id.in_([uid for uid, _ in candidates]))}
+    return [
+        {"user_id": uid, "name": users[uid].name, "district": users[uid].district, "match_score": score}
+        for uid, score in candidates if uid in users
+    ]
 
 @router.post("/sign")
-async def sign_contract(
+def sign_contract(
     payload: ContractSign,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    contract = db.query(Contract).filter(Contract.id == payload.contract_id).first()
-    if not contract:
-        raise HTTPException(status_code=404, detail="Contract not found")
-    
-    if contract.status != "Open":
+    # Single conditional UPDATE: only one signer can flip an Open contract
+    result = db.execute(
+        update(Contract)
+        .where(Contract.id == payload.contract_id, Contract.status == "Open")
+        .values(status="Signed", farmer_id=current_user.id, digital_signature=payload.signature_hash)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.rollback()
+        if not db.query(Contract.id).filter(Contract.id == payload.contract_id).first():
+            raise HTTPException(status_code=404, detail="Contract not found")
         raise HTTPException(status_code=400, detail="Contract already closed/taken")
-        
-    contract.status = "Signed"
-    contract.farmer_id = current_user.id
-    contract.digital_signature = payload.signature_hash
     
+    record_event(db, current_user.id, CONTRACT_SIGNED)
     db.commit()
+    contract_matcher.remove_contract(payload.contract_id)
     
-    return {"message": "Contract Signed Successfully", "contract_id": contract.id}
+    return {"message": "Contract Signed Successfully", "contract_id": payload.contract_id}
+
+@router.post("/{contract_id}/fulfill")
+def fulfill_contract(
+    contract_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_verifier)
+):
+    """Confirms delivery of a signed contract (verifiers only; buyers are not users yet)."""
+    contract = db.query(Contract.farmer_id).filter(Contract.id == contract_id).first()
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    if contract.farmer_id == current_user.id:
+        raise HTTPException(status_code=403, detail="Farmers cannot confirm their own delivery")
+
+    # Single conditional UPDATE: Signed -> Fulfilled happens (and is credited) once
+    result = db.execute(
+        update(Contract)
+        .where(Contract.id == contract_id, Contract.status == "Signed")
+        .values(status="Fulfilled")
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Only signed contracts can be fulfilled")
+
+    record_event(db, contract.farmer_id, CONTRACT_FULFILLED)
+    db.commit()
+    return {"message": "Contract Fulfilled", "contract_id": contract_id}
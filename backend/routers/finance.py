@@ -1,42 +1,106 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
+import json
 import os
-import google.generativeai as genai
+from bisect import bisect_right
 from ..database import get_db
-from ..models import User
+from ..models import User, ParametricPayout
 from ..dependencies import get_current_user
-import random
-
+from ..metrics import record_scheme_cache
+from ..services.cache import TTLCache
+from ..services.providers import provider_registry, GEMINI
+from ..services import gemini
 router = APIRouter(prefix="/api/finance", tags=["finance"])
 
+# Land holding bands in acres (marginal < 1 ha, small 1-2 ha, semi-medium 2-4 ha, medium 4-10 ha, large)
+LAND_BAND_EDGES = [2.5, 5, 10, 25]
+LAND_BANDS = ["marginal (under 2.5 acres)", "small (2.5-5 acres)", "semi-medium (5-10 acres)",
+              "medium (10-25 acres)", "large (over 25 acres)"]
+
+# Recommendations only change with the profile bucket, so one Gemini answer serves
+# every farmer in the bucket. Stale answers are served while a refresh runs.
+SCHEME_CACHE_TTL = float(os.getenv("SCHEME_CACHE_TTL", str(24 * 3600)))
+scheme_cache = TTLCache(
+    "finance_schemes",
+    ttl=SCHEME_CACHE_TTL,
+    stale_grace=SCHEME_CACHE_TTL,
+    maxsize=20000,
+    on_lookup=record_scheme_cache,
+)
+
+# Served (uncached) when Gemini is unavailable or returns something unparsable
+FALLBACK_SCHEMES = [
+    {"name": "PM-KISAN", "benefits": "₹6,000 per year income support in three instalments.", "link": "https://pmkisan.gov.in/"},
+    {"name": "Pradhan Mantri Fasal Bima Yojana (PMFBY)", "benefits": "Crop insurance against natural calamities, pests and diseases.", "link": "https://pmfby.gov.in/"},
+    {"name": "Kisan Credit Card (KCC)", "benefits": "Short-term crop loans at subsidised interest.", "link": "https://www.myscheme.gov.in/schemes/kcc"},
+]
+
+
+def profile_bucket(user):
+    """(district, land band, category) with normalised values."""
+    district = (user.district or "unknown").strip().lower()
+    band = bisect_right(LAND_BAND_EDGES, user.land_size or 0.0)
+    category = (user.category or "General").strip().lower()
+    return district, band, category
+
+
+def _generate_recommendations(bucket):
+    district, band, category = bucket
+
+    profile_summary = f"Farmer in {district.title()}, Land: {LAND_BANDS[band]}, Category: {category.upper()}."
+
+    model = gemini.model('gemini-1.5-flash')
+    with provider_registry.track(GEMINI) as call:
+        response = model.generate_content(
+            f"Recommend 3 specific government schemes for this Indian farmer: {profile_summary}. Return strictly valid JSON array with keys: name, benefits, link."
+        )
+        # Clean cleanup of markdown json block if present
+        text = response.text.replace("```json", "").replace("```", "").strip()
+        try:
+            schemes = json.loads(text)
+        except ValueError:
+            call.fail()
+            raise
+    if not isinstance(schemes, list):
+        raise ValueError("Expected a JSON array of schemes")
+    return schemes
+
 @router.get("/status")
-async def get_finance_status(current_user: User = Depends(get_current_user)):
-    # 1. Calculate Trust Score (Mock Logic based on Profile Completeness in Real DB)
+def get_finance_status(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # 1. Trust Score (maintained incrementally, see services/trust.py)
     score = current_user.trust_score
     
-    # 2. Get Weather (Simulated Real-time fetch placeholder)
-    # In prod: Call OpenWeatherMap API with current_user.district
-    rainfall_mm = 112.5 + random.uniform(-5, 5) 
+    # 2. Parametric insurance triggers, precomputed in batch from the weather archive
+    # (python -m backend.services.parametric), so this is a single indexed lookup
+    payout = db.query(ParametricPayout).filter(ParametricPayout.user_id == current_user.id).first()
+    if not payout:
+        return {"trust_score": score, "rainfall_mm": None, "payout_eligible": False, "evaluated_at": None}
     
     return {
         "trust_score": score,
-        "rainfall_mm": rainfall_mm,
-        "payout_eligible": rainfall_mm < 100
+        "rainfall_mm": payout.rainfall_mm,
+        "normal_rainfall_mm": payout.normal_rainfall_mm,
+        "deficit_pct": payout.deficit_pct,
+        "heat_days": payout.heat_days,
+        "payout_eligible": payout.payout_eligible,
+        "trigger": payout.trigger,
+        "window_start": payout.window_start,
+        "window_end": payout.window_end,
+        "evaluated_at": payout.evaluated_at,
     }
 
 @router.get("/schemes")
-async def recommend_schemes(current_user: User = Depends(get_current_user)):
-    api_key = os.getenv("GEMINI_API_KEY")
-    genai.configure(api_key=api_key)
-    
-    profile_summary = f"Farmer in {current_user.district}, Land: {current_user.land_size} acres, Category: {current_user.category}."
-    
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    response = model.generate_content(
-        f"Recommend 3 specific government schemes for this Indian farmer: {profile_summary}. Return strictly valid JSON array with keys: name, benefits, link."
-    )
-    
-    # Clean cleanup of markdown json block if present
-    text = response.text.replace("```json", "").replace("```", "").strip()
-    
-    return {"schemes": text} # Frontend parses JSON
+def recommend_schemes(current_user: User = Depends(get_current_user)):
+    bucket = profile_bucket(current_user)
+    try:
+        schemes, cached = scheme_cache.get_or_load(bucket, lambda: _generate_recommendations(bucket))
+    except Exception as e: # includes CircuitOpenError while Gemini is down
+        print(f"Scheme recommendation error: {e}")
+        return {"schemes": FALLBACK_SCHEMES, "cached": False, "fallback": True}
+
+    return {"schemes": schemes, "cached": cached, "fallback": False}
+
+@router.get("/schemes/cache")
+def scheme_cache_stats():
+    """Hit rate of the profile-bucket recommendation cache."""
+    return scheme_cache.stats()
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query
+import json
+import re
+import threading
+from bisect import bisect_left
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import List, Optional
 from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..dependencies import get_current_user, get_current_user_optional
+from ..models import User, InsuranceScheme, InsuranceEnrollment
+from ..services.http_cache import CatalogCache
 
 router = APIRouter(prefix="/api/insurance", tags=["insurance"])
 
-class InsuranceScheme(BaseModel):
+class InsuranceSchemeResponse(BaseModel):
     id: int
     name: str
     provider: str
@@ -14,8 +24,9 @@ class InsuranceScheme(BaseModel):
     description: str
     link: str
     crops: List[str]
+    is_enrolled: bool = False
 
-# Mock Database of Insurance Schemes
+# Default schemes, seeded into the insurance_schemes table on first startup
 INSURANCE_DB = [
     {
         "id": 1,
@@ -85,31 +96,136 @@ INSURANCE_DB = [
     }
 ]
 
-@router.get("/search", response_model=List[InsuranceScheme])
-async def search_insurance(query: str = Query(None, min_length=0)):
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text):
+    return _TOKEN.findall(text.lower())
+
+
+class InsuranceSearchIndex:
     """
-    Search for insurance schemes by name, type, or crop.
+    Inverted index over insurance schemes, built once at startup.
+
+    Words from name / type / provider / crops map to scheme ids, plus a
+    separate index of whole crop names ("commercial crops"). Both keep a
+    sorted key list so a query term matches every key it is a prefix of
+    via bisect instead of scanning all schemes.
     """
-    if not query:
-        return INSURANCE_DB
-
-    q = query.lower()
-    results = [
-        scheme for scheme in INSURANCE_DB
-        if q in scheme["name"].lower() 
-        or q in scheme["type"].lower()
-        or q in scheme["provider"].lower()
-        or any(q in crop.lower() for crop in scheme["crops"])
-    ]
-    
-    # Mark enrolled schemes
-    for scheme in results:
-        scheme["is_enrolled"] = scheme["id"] in ENROLLED_SCHEMES
-        
-    return results
 
-# In-memory storage for demo persistence
-ENROLLED_SCHEMES = set()
+    def __init__(self):
+        self.schemes = {} # id -> response dict (treated as read-only)
+        self._postings = {}
+        self._tokens = []
+        self._crop_postings = {}
+        self._crops = []
+        self._lock = threading.Lock()
+
+    def build(self, db: Session):
+        schemes, postings, crop_postings = {}, {}, {}
+        for row in db.query(InsuranceScheme).order_by(InsuranceScheme.id).all():
+            crops = json.loads(row.crops or "[]")
+            schemes[row.id] = {
+                "id": row.id, "name": row.name, "provider": row.provider, "type": row.type,
+                "coverage": row.coverage, "premium": row.premium, "description": row.description,
+                "link": row.link, "crops": crops,
+            }
+            for token in _tokens(" ".join([row.name, row.type, row.provider] + crops)):
+                postings.setdefault(token, set()).add(row.id)
+            for crop in crops:
+                crop_postings.setdefault(crop.lower(), set()).add(row.id)
+
+        # Swap in the new index in one go so concurrent searches never see a half-built one
+        with self._lock:
+            self.schemes = schemes
+            self._postings, self._tokens = postings, sorted(postings)
+            self._crop_postings, self._crops = crop_postings, sorted(crop_postings)
+
+    @staticmethod
+    def _prefix_lookup(keys, postings, prefix):
+        ids = set()
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            ids |= postings[keys[i]]
+            i += 1
+        return ids
+
+    def search(self, query):
+        """Scheme dicts whose words match every query term (by prefix), or whose crop name starts with the query."""
+        with self._lock:
+            schemes, tokens, postings = self.schemes, self._tokens, self._postings
+            crops, crop_postings = self._crops, self._crop_postings
+
+        if not query or not query.strip():
+            return list(schemes.values())
+
+        terms = _tokens(query)
+        ids = None
+        for term in terms:
+            matched = self._prefix_lookup(tokens, postings, term)
+            ids = matched if ids is None else ids & matched
+        ids = ids or set()
+        ids |= self._prefix_lookup(crops, crop_postings, query.strip().lower())
+        return [schemes[i] for i in sorted(ids)]
+
+    def get(self, scheme_id):
+        return self.schemes.get(scheme_id)
+
+
+search_index = InsuranceSearchIndex()
+
+
+def seed_insurance_schemes(db: Session):
+    """Inserts the default schemes if the table is empty."""
+    if db.query(InsuranceScheme.id).first() is not None:
+        return
+    db.add_all([
+        InsuranceScheme(**{**scheme, "crops": json.dumps(scheme["crops"])}) for scheme in INSURANCE_DB
+    ])
+    db.commit()
+
+
+def load_insurance_index(db: Session):
+    seed_insurance_schemes(db)
+    search_index.build(db)
+
+
+def _rebuild_index(db: Session, changed):
+    if "insurance_schemes" in changed:
+        search_index.build(db)
+
+
+# ETag / response cache, invalidated by writes to schemes or enrollments (see services/http_cache.py)
+insurance_cache = CatalogCache("insurance", tables=("insurance_schemes", "insurance_enrollments"),
+                               on_change=_rebuild_index)
+
+
+@router.get("/search", response_model=List[InsuranceSchemeResponse], responses={304: {"description": "Not Modified"}})
+def search_insurance(
+    request: Request,
+    query: str = Query(None, min_length=0),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db),
+):
+    """
+    Search for insurance schemes by name, type, provider or crop.
+    Signed-in users also get is_enrolled for each scheme.
+    """
+    def build():
+        results = search_index.search(query)
+
+        enrolled = set()
+        if current_user and results:
+            enrolled = {
+                scheme_id for (scheme_id,) in db.query(InsuranceEnrollment.scheme_id)
+                .filter(InsuranceEnrollment.user_id == current_user.id)
+            }
+
+        # New dicts per request; the shared index entries are never mutated
+        return [{**scheme, "is_enrolled": scheme["id"] in enrolled} for scheme in results]
+
+    key = (query, current_user.id if current_user else None)
+    return insurance_cache.respond(request, db, key, build, private=current_user is not None)
 
 class EnrollmentRequest(BaseModel):
     scheme_id: int
@@ -120,24 +236,42 @@ class EnrollmentRequest(BaseModel):
     crop: str
 
 @router.post("/enroll")
-async def enroll_scheme(request: EnrollmentRequest):
+def enroll_scheme(
+    request: EnrollmentRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     """
     Process insurance enrollment.
     """
-    scheme = next((s for s in INSURANCE_DB if s["id"] == request.scheme_id), None)
+    scheme = search_index.get(request.scheme_id)
     if not scheme:
         raise HTTPException(status_code=404, detail="Scheme not found")
     
     # Mock logic: Verify Aadhar (just length check for demo)
-    if len(request.aadhar_number) != 12:
+    if len(request.aadhar_number) != 12 or not request.aadhar_number.isdigit():
          raise HTTPException(status_code=400, detail="Invalid Aadhar Number")
 
-    # Save to "Database"
-    ENROLLED_SCHEMES.add(request.scheme_id)
+    # Save enrollment (only the last 4 Aadhaar digits are kept)
+    enrollment = InsuranceEnrollment(
+        user_id=current_user.id,
+        scheme_id=request.scheme_id,
+        farmer_name=request.farmer_name,
+        aadhar_last4=request.aadhar_number[-4:],
+        survey_number=request.survey_number,
+        land_area=request.land_area,
+        crop=request.crop,
+    )
+    db.add(enrollment)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Already enrolled in {scheme['name']}")
     
     return {
         "status": "success", 
         "message": f"Application submitted for {scheme['name']}", 
-        "enrollment_id": f"INS-{request.scheme_id}-{request.aadhar_number[-4:]}",
-        "details": request
+        "enrollment_id": f"INS-{request.scheme_id}-{enrollment.id}",
+        "details": request.model_dump(exclude={"aadhar_number"})
     }
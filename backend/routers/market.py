@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
+from sqlalchemy import select, update
 from pydantic import BaseModel
 from typing import List, Optional
 import os
-import google.generativeai as genai
 from ..database import get_db
 from ..models import Listing, User
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, get_current_verifier
+from ..services.providers import provider_registry, GEMINI
+from ..services.trust import record_event, LISTING_VERIFIED
+from ..services import gemini
+from ..services.http_cache import CatalogCache
 
 router = APIRouter(prefix="/api/market", tags=["market"])
 
@@ -36,28 +40,39 @@ class ListingResponse(BaseModel):
     class Config:
         from_attributes = True
 
-@router.get("/", response_model=List[ListingResponse])
+# Listing columns returned by get_listings (ListingResponse minus the seller fields)
+LISTING_FIELDS = ("id", "crop_name", "quantity", "price", "location", "description", "is_organic", "image_url", "grade")
+
+# ETag / response cache, invalidated by writes to listings or seller details (see services/http_cache.py)
+listings_cache = CatalogCache("market", tables=("listings", "users"))
+
+def _listing_rows(db, crop=None, location=None):
+    """Listing columns plus seller details in one query, shaped as ListingResponse (see fast_json)."""
+    query = select(*[getattr(Listing, f) for f in LISTING_FIELDS], User.id, User.name, User.phone, User.district) \
+        .outerjoin(User, User.id == Listing.seller_id)
+    if crop:
+        query = query.where(Listing.crop_name.ilike(f"%{crop}%"))
+    if location:
+        query = query.where(Listing.location.ilike(f"%{location}%"))
+
+    results = []
+    for row in db.execute(query):
+        listing = dict(zip(LISTING_FIELDS, row))
+        seller_id, name, phone, district = row[len(LISTING_FIELDS):]
+        listing["seller_name"] = name if seller_id is not None else "Unknown"
+        listing["seller_phone"] = phone
+        listing["seller_district"] = district
+        results.append(listing)
+    return results
+
+@router.get("/", response_model=List[ListingResponse], responses={304: {"description": "Not Modified"}})
 async def get_listings(
+    request: Request,
     crop: Optional[str] = None, 
     location: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Listing)
-    if crop:
-        query = query.filter(Listing.crop_name.ilike(f"%{crop}%"))
-    if location:
-        query = query.filter(Listing.location.ilike(f"%{location}%"))
-    
-    listings = query.all()
-    # Manual mapping for seller_name to keep Pydantic simple or use joinedload
-    results = []
-    for l in listings:
-        resp = ListingResponse.model_validate(l)
-        resp.seller_name = l.seller.name if l.seller else "Unknown"
-        resp.seller_phone = l.seller.phone if l.seller else None
-        resp.seller_district = l.seller.district if l.seller else None
-        results.append(resp)
-    return results
+    return listings_cache.respond(request, db, (crop, location), lambda: _listing_rows(db, crop, location))
 
 @router.post("/", response_model=ListingResponse)
 async def create_listing(
@@ -81,22 +96,49 @@ async def create_listing(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+@router.post("/{listing_id}/verify")
+def verify_listing(
+    listing_id: int,
+    current_user: User = Depends(get_current_verifier),
+    db: Session = Depends(get_db)
+):
+    """Records a verifier's inspection of a listing (quality / quantity checked)."""
+    listing = db.query(Listing.seller_id).filter(Listing.id == listing_id).first()
+    if not listing:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    if listing.seller_id == current_user.id:
+        raise HTTPException(status_code=403, detail="Sellers cannot verify their own listings")
+
+    # Single conditional UPDATE: the seller is credited once, on the first inspection
+    result = db.execute(
+        update(Listing)
+        .where(Listing.id == listing_id, Listing.verified_by.is_(None))
+        .values(verified=True, verified_by=current_user.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Listing already verified")
+
+    if listing.seller_id is not None:
+        record_event(db, listing.seller_id, LISTING_VERIFIED)
+    db.commit()
+    return {"message": "Listing verified", "listing_id": listing_id}
+
 @router.get("/price-check")
 async def check_price(query: str, lat: Optional[float] = None, lng: Optional[float] = None):
-    api_key = os.getenv("GEMINI_API_KEY")
     if not query: return {"error": "Query required"}
     
     # Use Gemini with Google Search Tool
-    genai.configure(api_key=api_key)
-    
     location_context = ""
     if lat and lng:
         location_context = f"near coordinates {lat}, {lng}"
     
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    response = model.generate_content(
-        f"What is the current market price of {query} in Indian mandis {location_context}? Provide a concise summary with prices specific to the nearest known location/district.",
-        # tools='google_search_retrieval' # Uncomment if your API key supports it directly in this SDK version
-    )
+    model = gemini.model('gemini-1.5-flash')
+    with provider_registry.track(GEMINI):
+        response = model.generate_content(
+            f"What is the current market price of {query} in Indian mandis {location_context}? Provide a concise summary with prices specific to the nearest known location/district.",
+            # tools='google_search_retrieval' # Uncomment if your API key supports it directly in this SDK version
+        )
     
     return {"text": response.text, "sources": []} 
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 import os
-import google.generativeai as genai
 from pydantic import BaseModel
+from ..services.providers import provider_registry, GEMINI
+from ..services import gemini
 
 router = APIRouter(prefix="/api/news", tags=["news"])
 
@@ -17,12 +18,12 @@ async def get_news(request: NewsRequest):
              # Fallback if no API key
              return {"news": "Market prices for Soybeans are up by 4% in Nagpur mandi due to export demand. Cloudy weather expected in Vidarbha region."}
              
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        model = gemini.model('gemini-1.5-flash')
         
         prompt = f"Find the 2 most important agricultural news or price trends for {request.district} today. Keep it short and in {request.language}. Return only the text."
         
-        response = model.generate_content(prompt)
+        with provider_registry.track(GEMINI):
+            response = model.generate_content(prompt)
         return {"news": response.text}
     except Exception as e:
         print(f"News fetch error: {e}")
@@ -1,20 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional, Any
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from sqlalchemy import select, func
 from datetime import datetime
 from datetime import datetime
 import json
-# from ..services.agromonitoring import satellite_service as agro_service
+import os
+import numpy as np
+from ..services.agromonitoring import satellite_service as agro_service
 from ..services.earth_engine import earth_engine_service
+from ..services.simulator import digital_twin, plot_centroids, parse_coordinates
+from ..services.providers import provider_registry, CircuitOpenError, EARTH_ENGINE
+from ..services.matching import contract_matcher
+from ..services.portfolio import CREDIT_PRICE_INR
 import random
 
 from ..database import get_db
-from ..models import Plot, User
+from ..models import Plot, User, CarbonProject
 from ..dependencies import get_current_user
+from .. import fast_json
+from ..fast_json import rows_response
 
 router = APIRouter(prefix="/api/plots", tags=["plots"])
 
+# Satellite backend for plot analysis: "gee" (default) or "agromonitoring"
+SATELLITE_PROVIDER = os.getenv("SATELLITE_PROVIDER", "gee").lower()
+
 # --- Pydantic Models ---
 
 class Coordinate(BaseModel):
@@ -42,6 +55,38 @@ class PlotResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# --- Helpers ---
+
+def _simulate_plots(plots, source="Digital Twin Simulation"):
+    """
+    Digital twin fallback for one or many plots in a single vectorized pass.
+    Returns one analysis dict per plot, in order.
+    """
+    coordinate_lists = [parse_coordinates(p.coordinates) for p in plots]
+    lats, lngs = plot_centroids(coordinate_lists)
+    has_coords = ~np.isnan(lats)
+
+    health = np.full(len(plots), 0.5)
+    moisture = np.full(len(plots), 30.0)
+    if has_coords.any():
+        sim = digital_twin.simulate_plots(
+            lats[has_coords],
+            lngs[has_coords],
+            crop_types=[p.crop_type for p, ok in zip(plots, has_coords) if ok]
+        )
+        health[has_coords] = sim["health_score"]
+        moisture[has_coords] = sim["moisture"]
+
+    return [
+        {
+            "health_score": float(health[i]),
+            "moisture": float(moisture[i]),
+            "image_url": None,
+            "source": source
+        }
+        for i in range(len(plots))
+    ]
+
 # --- Endpoints ---
 
 @router.get("/", response_model=List[PlotResponse])
@@ -49,27 +94,32 @@ async def get_my_plots(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    plots = db.query(Plot).filter(Plot.user_id == current_user.id).all()
-    
-    # Parse JSON coordinates for response
+    rows = db.execute(
+        select(Plot.id, Plot.name, Plot.coordinates, Plot.area, Plot.crop_type, Plot.health_score, Plot.moisture,
+               Plot.created_at)
+        .where(Plot.user_id == current_user.id)
+    ).all()
+
+    # Rows are shaped as PlotResponse and serialized once (see fast_json)
     results = []
-    for p in plots:
+    for plot_id, name, coordinates, area, crop_type, health_score, moisture, created_at in rows:
         try:
-            coords = json.loads(p.coordinates)
+            coords = [{"lat": float(c["lat"]), "lng": float(c["lng"])} for c in fast_json.loads(coordinates)]
         except:
             coords = []
-            
-        results.append(PlotResponse(
-            id=p.id,
-            name=p.name,
-            coordinates=coords,
-            area=p.area,
-            crop_type=p.crop_type,
-            health_score=p.health_score,
-            moisture=p.moisture,
-            created_at=p.created_at.isoformat()
-        ))
-    return results
+        results.append({
+            "id": plot_id,
+            "name": name,
+            "coordinates": coords,
+            "area": area,
+            "crop_type": crop_type,
+            "health_score": health_score,
+            "moisture": moisture,
+            "created_at": created_at.isoformat(),
+            "image_url": None,
+            "last_scan_date": None,
+        })
+    return rows_response(results)
 
 @router.post("/", response_model=PlotResponse, status_code=status.HTTP_201_CREATED)
 async def create_plot(
@@ -96,6 +146,8 @@ async def create_plot(
         # GEE doesn't require registration, so we just generate a placeholder ID
         # This ID is legacy from AgroMonitoring but might be useful for caching keys
         polygon_id = f"gee_{random.randint(10000, 99999)}"
+        if SATELLITE_PROVIDER == "agromonitoring":
+            polygon_id = await agro_service.register_polygon(plot.name, coords_list) or polygon_id
 
         new_plot = Plot(
             user_id=current_user.id,
@@ -117,6 +169,7 @@ async def create_plot(
     db.add(new_plot)
     db.commit()
     db.refresh(new_plot)
+    contract_matcher.update_farmer(db, current_user.id)
     
     return PlotResponse(
         id=new_plot.id, 
@@ -131,6 +184,37 @@ async def create_plot(
         last_scan_date=new_plot.last_scan_date
     )
 
+@router.post("/rescan")
+async def rescan_plots(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Bulk rescan of all the user's plots with the digital twin simulator.
+    One vectorized pass, one commit - used for bulk refreshes and load tests.
+    """
+    plots = db.query(Plot).filter(Plot.user_id == current_user.id).all()
+    analyses = _simulate_plots(plots)
+
+    now = datetime.utcnow()
+    for plot, analysis in zip(plots, analyses):
+        plot.health_score = analysis['health_score']
+        plot.moisture = analysis['moisture']
+        plot.last_scan_date = now
+        plot.organic_score = min(100, plot.health_score * 100)
+
+    db.commit()
+    contract_matcher.update_farmer(db, current_user.id)
+
+    return {
+        "rescanned": len(plots),
+        "source": "Digital Twin Simulation",
+        "plots": [
+            {"plot_id": p.id, "ndvi_avg": p.health_score, "soil_moisture": p.moisture}
+            for p in plots
+        ]
+    }
+
 @router.get("/{plot_id}/analyze")
 async def analyze_plot(
     plot_id: int,
@@ -148,20 +232,31 @@ async def analyze_plot(
     except:
         pass
         
-    # Call Earth Engine Service
+    # Call Earth Engine Service (or AgroMonitoring if configured)
     # Note: geo_json in DB is a string, needs parsing
     try:
         coords = json.loads(plot.coordinates)
-        # Convert from [{lat, lng}] to [[lng, lat]] for GEE
-        gee_coords = [[c['lng'], c['lat']] for c in coords]
-        # Close loop
-        if gee_coords and gee_coords[0] != gee_coords[-1]:
-            gee_coords.append(gee_coords[0])
-            
-        analysis = earth_engine_service.get_analysis(
-            geometry_coords=gee_coords,
-            crop_type=plot.crop_type
-        )
+        if SATELLITE_PROVIDER == "agromonitoring":
+            analysis = await agro_service.get_analysis(plot.polygon_id, coords, plot.crop_type)
+        else:
+            # Convert from [{lat, lng}] to [[lng, lat]] for GEE
+            gee_coords = [[c['lng'], c['lat']] for c in coords]
+            # Close loop
+            if gee_coords and gee_coords[0] != gee_coords[-1]:
+                gee_coords.append(gee_coords[0])
+                
+            with provider_registry.track(EARTH_ENGINE) as call:
+                # Blocking EE client (lazy initialize + getInfo): keep it off the event loop
+                analysis = await run_in_threadpool(
+                    earth_engine_service.get_analysis,
+                    geometry_coords=gee_coords,
+                    crop_type=plot.crop_type
+                )
+                if not analysis or "error" in analysis:
+                    call.fail()
+    except CircuitOpenError:
+        # GEE is known to be down, don't wait for it to time out again
+        analysis = None
     except Exception as e:
         print(f"Analysis Failed: {e}")
         analysis = None
@@ -169,12 +264,7 @@ async def analyze_plot(
     if not analysis or "error" in analysis:
         # Fallback to simulation if GEE fails (e.g. not auth'd)
         print("GEE Failed, using fallback simulation")
-        analysis = {
-            "health_score": 0.5,
-            "moisture": 30.0,
-            "image_url": None,
-            "source": "Simulation (GEE Failed)"
-        }
+        analysis = _simulate_plots([plot], source="Simulation (GEE Failed)")[0]
     
     # Persist Results
     plot.health_score = analysis['health_score']
@@ -187,6 +277,7 @@ async def analyze_plot(
     plot.organic_score = min(100, plot.health_score * 100)
     
     db.commit()
+    contract_matcher.update_farmer(db, current_user.id)
 
     return {
         "plot_id": plot.id,
@@ -215,13 +306,18 @@ async def analyze_carbon(
     # 1 Credit per Acre for Healthy Crop (>0.7)
     base_rate = 1.0 if plot.health_score > 0.7 else 0.2
     potential_credits = plot.area * base_rate
+
+    # Available credits of the plot's carbon projects (ledger-maintained balance)
+    carbon_credits = db.scalar(
+        select(func.coalesce(func.sum(CarbonProject.available_credits), 0.0)).where(CarbonProject.plot_id == plot.id)
+    )
     
     return {
         "plot_id": plot.id,
-        "carbon_credits": plot.carbon_credits,
+        "carbon_credits": carbon_credits,
         "potential_credits": potential_credits,
         "organic_score": plot.organic_score,
-        "currency_value": plot.carbon_credits * 1200, 
+        "currency_value": carbon_credits * CREDIT_PRICE_INR, 
         "sequestration_rate": f"{round(potential_credits, 2)} tons/season",
         "verification_status": "Verified" if plot.organic_score > 80 else "Pending",
         "last_scan": plot.last_scan_date
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
-from pydantic import BaseModel
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, field_validator
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import Scheme, SchemeApplication, User
 from ..dependencies import get_current_user
+from ..services.eligibility import parse_rules, user_scheme_matches
+from ..services.http_cache import CatalogCache
 
 router = APIRouter(prefix="/api/schemes", tags=["schemes"])
 
@@ -16,28 +19,46 @@ class SchemeBase(BaseModel):
     link: Optional[str] = None
     benefits: Optional[str] = None
     eligibility: Optional[str] = None
+    eligibility_rules: Optional[Dict[str, Any]] = None # machine-readable, see services/eligibility.py
 
 class SchemeCreate(SchemeBase):
     pass
 
 class SchemeResponse(SchemeBase):
     id: int
+
+    @field_validator("eligibility_rules", mode="before")
+    @classmethod
+    def decode_rules(cls, value):
+        return json.loads(value) if isinstance(value, str) else value
     
     class Config:
         from_attributes = True
 
+# ETag / response cache, invalidated by writes to schemes (see services/http_cache.py)
+schemes_cache = CatalogCache("schemes", tables=("schemes",), model=List[SchemeResponse])
+
 class ApplicationRequest(BaseModel):
     scheme_id: str # Keep string to match frontend loose typing if needed, but DB is int usually. Let's keep ID as int in model but maybe string in request if frontend sends string.
     scheme_name: str
 
-@router.get("/", response_model=List[SchemeResponse])
-async def get_schemes(
+def eligibility_profile(user):
+    """The user fields eligibility rules look at; farmers with the same profile see the same list."""
+    return (user.district, user.category, user.farming_type, user.crops, user.land_size)
+
+@router.get("/", response_model=List[SchemeResponse], responses={304: {"description": "Not Modified"}})
+def get_schemes(
+    request: Request,
+    show_all: bool = False,
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user)
 ):
-    # In future: Filter by user profile (district, land size)
-    schemes = db.query(Scheme).all()
-    return schemes
+    # Only schemes the farmer qualifies for, unless ?show_all=true
+    def build():
+        return db.query(Scheme).all() if show_all else user_scheme_matches(db, current_user)
+
+    key = "all" if show_all else eligibility_profile(current_user)
+    return schemes_cache.respond(request, db, key, build, private=not show_all)
 
 @router.post("/", response_model=SchemeResponse, status_code=status.HTTP_201_CREATED)
 async def create_scheme(
@@ -45,7 +66,14 @@ async def create_scheme(
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_user) # In real app, check admin
 ):
-    db_scheme = Scheme(**scheme.dict())
+    data = scheme.dict()
+    try:
+        parse_rules(data["eligibility_rules"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if data["eligibility_rules"]:
+        data["eligibility_rules"] = json.dumps(data["eligibility_rules"])
+    db_scheme = Scheme(**data)
     db.add(db_scheme)
     db.commit()
     db.refresh(db_scheme)
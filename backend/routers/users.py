@@ -5,6 +5,8 @@ from typing import List, Optional
 from ..database import get_db
 from ..models import User
 from ..dependencies import get_current_user
+from ..services.trust import profile_snapshot, record_profile_change
+from ..services.matching import contract_matcher
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -42,6 +44,7 @@ async def update_user_me(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    before = profile_snapshot(current_user)
     if profile.name is not None: current_user.name = profile.name
     if profile.district is not None: current_user.district = profile.district
     if profile.land_size is not None: current_user.land_size = profile.land_size
@@ -49,7 +52,10 @@ async def update_user_me(
     if profile.category is not None: current_user.category = profile.category
     if profile.farming_type is not None: current_user.farming_type = profile.farming_type
     if profile.crops is not None: current_user.crops = ",".join(profile.crops)
+    record_profile_change(db, current_user.id, before, profile_snapshot(current_user))
     
     db.commit()
     db.refresh(current_user)
+    if profile.crops is not None:
+        contract_matcher.update_farmer(db, current_user.id)
     return current_user
@@ -1,26 +1,57 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
 import httpx
+from .. import fast_json
+from ..compression import negotiated_response
+from ..services import forecast
+from ..services.providers import provider_registry, CircuitOpenError, OPEN_METEO, BIGDATACLOUD
 
 router = APIRouter(prefix="/api/weather", tags=["weather"])
 
 @router.get("/current")
-async def get_weather(lat: float = 21.1458, lng: float = 79.0882):
+async def get_weather(
+    request: Request,
+    lat: float = 21.1458,
+    lng: float = 79.0882,
+    fields: Optional[str] = Query(None, description="e.g. current or current,daily.temperature_2m_max"),
+    fmt: str = Query("full", alias="format", pattern="^(full|compact)$"),
+):
     """
     Fetches real weather data from Open-Meteo API.
     Defaults to Nagpur (21.1458, 79.0882) if no coordinates provided.
+    fields= / format=compact shrink the payload (see services/forecast.py);
+    the body is gzip/brotli compressed when the client accepts it.
     """
+    try:
+        selected = forecast.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         print(f"Fetching weather for lat={lat}, lng={lng}")
-        url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lng}&current=temperature_2m,relative_humidity_2m,rain,precipitation,weather_code,is_day,wind_speed_10m,soil_temperature_0cm&hourly=temperature_2m,weather_code,is_day&daily=weather_code,temperature_2m_max,temperature_2m_min,sunrise,sunset,uv_index_max,precipitation_sum,wind_speed_10m_max&timezone=auto"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=10.0)
-            data = response.json()
+        url = forecast.forecast_url(lat, lng, selected)
+        with provider_registry.track(OPEN_METEO) as call:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(url, timeout=10.0)
+                if response.status_code >= 500:
+                    call.fail()
+                data = response.json()
             
-        return data
+        # Open-Meteo errors ({"error": true, "reason": ...}) are forwarded as they are
+        if not data.get("error"):
+            if fields:
+                data = forecast.project(data, selected)
+            if fmt == "compact":
+                data = forecast.encode_compact(data)
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="Weather provider unavailable, please retry shortly")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch weather: {str(e)}")
+    return negotiated_response(request, fast_json.dumps(data))
+
 @router.get("/search")
-async def search_location(query: str):
+async def search_location(request: Request, query: str):
     """
     Search for a location by name using Open-Meteo Geocoding API.
     """
@@ -28,16 +59,21 @@ async def search_location(query: str):
     try:
         url = f"https://geocoding-api.open-meteo.com/v1/search?name={query}&count=5&language=en&format=json"
         print(f"URL: {url}")
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            print(f"Response Status: {response.status_code}")
-            data = response.json()
-            print(f"Data: {data}")
+        with provider_registry.track(OPEN_METEO) as call:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(url)
+                print(f"Response Status: {response.status_code}")
+                if response.status_code >= 500:
+                    call.fail()
+                data = response.json()
+                print(f"Data: {data}")
         
         if "results" not in data:
             return []
             
-        return data["results"]
+        return negotiated_response(request, fast_json.dumps(data["results"]))
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="Location search unavailable, please retry shortly")
     except Exception as e:
         print(f"Search ERROR: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to search location: {str(e)}")
@@ -52,9 +88,10 @@ async def reverse_geocode(lat: float, lng: float):
     try:
         # bigdatacloud is free and simple
         url = f"https://api.bigdatacloud.net/data/reverse-geocode-client?latitude={lat}&longitude={lng}&localityLanguage=en"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            data = response.json()
+        with provider_registry.track(BIGDATACLOUD):
+            async with httpx.AsyncClient() as client:
+                response = await client.get(url)
+                data = response.json()
             
         return {
             "city": data.get("city") or data.get("locality") or "Unknown Location",
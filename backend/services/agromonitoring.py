@@ -1,17 +1,60 @@
-import requests
+import asyncio
+import httpx
 import os
-import random
-import math
 from datetime import datetime, timedelta
+from .simulator import digital_twin, plot_centroids
+from .providers import provider_registry, CircuitOpenError, AGROMONITORING
 
 API_KEY = os.getenv("AGROMONITORING_API_KEY", "")
-BASE_URL = "http://api.agromonitoring.com/agro/1.0"
+BASE_URL = os.getenv("AGROMONITORING_BASE_URL", "http://api.agromonitoring.com/agro/1.0")
+
+# Shared connection pool / timeouts for all AgroMonitoring calls
+TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.5 # seconds, doubled on every attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REGISTER_CONCURRENCY = 10
 
 class SatelliteService:
-    def __init__(self):
-        self.api_key = API_KEY
+    def __init__(self, api_key=None, base_url=None, timeout=TIMEOUT, max_retries=MAX_RETRIES, retry_backoff=RETRY_BACKOFF):
+        self.api_key = API_KEY if api_key is None else api_key
+        self.base_url = base_url or BASE_URL
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=LIMITS)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-    def register_polygon(self, name, coordinates):
+    async def _request(self, method, path, params=None, **kwargs):
+        """
+        Calls the API with bounded retries on connection errors, timeouts
+        and retryable status codes (exponential backoff).
+        """
+        params = {**(params or {}), "appid": self.api_key}
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.request(method, path, params=params, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                print(f"Agro API {path} returned {response.status_code}, retrying ({attempt + 1}/{self.max_retries})")
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"Agro Connection Error on {path}: {e!r}, retrying ({attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+    async def register_polygon(self, name, coordinates):
         """
         Registers a polygon with Agromonitoring API.
         coordinates: List of {lat, lng} dicts
@@ -43,10 +86,7 @@ class SatelliteService:
         }
 
         try:
-            response = requests.post(
-                f"{BASE_URL}/polygons?appid={self.api_key}",
-                json=payload
-            )
+            response = await self._request("POST", "/polygons", json=payload)
             if response.status_code == 201:
                 return response.json().get('id')
             else:
@@ -56,39 +96,67 @@ class SatelliteService:
             print(f"Agro Connection Error: {e}")
             return None
 
-    def get_analysis(self, polygon_id, coordinates, crop_type="Mixed"):
+    async def register_polygons(self, polygons, concurrency=REGISTER_CONCURRENCY):
+        """
+        Batch mode for register_polygon.
+        polygons: List of (name, coordinates) tuples
+        Returns: List of polygon_id (or None), in the same order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def register(name, coordinates):
+            async with semaphore:
+                return await self.register_polygon(name, coordinates)
+
+        return await asyncio.gather(*[register(name, coords) for name, coords in polygons])
+
+    async def get_analysis(self, polygon_id, coordinates, crop_type="Mixed"):
         """
         Fetches analysis (NDVI, Moisture, Image) for a polygon.
         Falls back to deterministic simulation if no API key or API fails.
         """
-        if self.api_key and not polygon_id.startswith("sim_"):
+        if self.api_key and polygon_id and not polygon_id.startswith("sim_"):
             # Try Real API
-            real_data = self._fetch_real_data(polygon_id)
+            try:
+                with provider_registry.track(AGROMONITORING) as call:
+                    real_data = await self._fetch_real_data(polygon_id)
+                    if not real_data:
+                        call.fail()
+            except CircuitOpenError:
+                real_data = None
             if real_data:
                 return real_data
         
         # Fallback / Simulation
         return self._simulate_data(coordinates, crop_type)
 
-    def _fetch_real_data(self, polygon_id):
+    async def _fetch_real_data(self, polygon_id):
+        end = int(datetime.utcnow().timestamp())
+        start = int((datetime.utcnow() - timedelta(days=30)).timestamp())
+        params = {"start": start, "end": end, "polyid": polygon_id}
+
+        # NDVI history and image search are independent, run them concurrently
+        ndvi_resp, img_resp = await asyncio.gather(
+            self._request("GET", "/ndvi/history", params=params),
+            self._request("GET", "/image/search", params=params),
+            return_exceptions=True
+        )
+
         try:
             # 1. Get NDVI
-            end = int(datetime.utcnow().timestamp())
-            start = int((datetime.utcnow() - timedelta(days=30)).timestamp())
-            ndvi_url = f"{BASE_URL}/ndvi/history?start={start}&end={end}&polyid={polygon_id}&appid={self.api_key}"
-            
             stats = None
-            ndvi_resp = requests.get(ndvi_url)
-            if ndvi_resp.status_code == 200:
+            if isinstance(ndvi_resp, Exception):
+                print(f"Agro NDVI Fetch Failed: {ndvi_resp!r}")
+            elif ndvi_resp.status_code == 200:
                 data = ndvi_resp.json()
                 if data:
                     stats = data[-1] # Latest
 
             # 2. Get Image
-            img_url = f"{BASE_URL}/image/search?start={start}&end={end}&polyid={polygon_id}&appid={self.api_key}"
             image_link = None
-            img_resp = requests.get(img_url)
-            if img_resp.status_code == 200:
+            if isinstance(img_resp, Exception):
+                print(f"Agro Image Search Failed: {img_resp!r}")
+            elif img_resp.status_code == 200:
                 images = img_resp.json()
                 if images:
                     # Filter for low clouds (<20%)
@@ -122,26 +190,10 @@ class SatelliteService:
                 "source": "Simulation (NoCoords)"
             }
 
-        # Use centroid to seed
-        lat = sum(c['lat'] for c in coordinates) / len(coordinates)
-        lng = sum(c['lng'] for c in coordinates) / len(coordinates)
-        
-        # Create a day-varying component so it changes over time slightly
-        day_of_year = datetime.now().timetuple().tm_yday
-        
-        # Seed: Stable for location, but varies slightly by day
-        seed_val = int((lat + lng) * 10000) + day_of_year
-        random.seed(seed_val)
-
-        # Base health by crop
-        base_health = 0.75
-        if crop_type and "cotton" in crop_type.lower(): base_health = 0.65
-        if crop_type and "wheat" in crop_type.lower(): base_health = 0.85
-        
-        variation = random.uniform(-0.15, 0.15)
-        health_score = max(0.1, min(0.99, base_health + variation))
-        
-        moisture = random.uniform(20, 60)
+        # Use centroid to seed. Stable for location, but varies slightly by day
+        lats, lngs = plot_centroids([coordinates])
+        sim = digital_twin.simulate_plots(lats, lngs, crop_types=[crop_type])
+        lat, lng = lats[0], lngs[0]
         
         # Generate a consistent placeholder image
         # Using specific seed for picsum to keep it consistent for this plot
@@ -149,8 +201,8 @@ class SatelliteService:
         image_url = f"https://picsum.photos/seed/{plot_seed}/500/500"
 
         return {
-            "health_score": health_score,
-            "moisture": moisture,
+            "health_score": float(sim["health_score"][0]),
+            "moisture": float(sim["moisture"][0]),
             "image_url": image_url,
             "source": "Digital Twin Simulation"
         }
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared pool for background refreshes of stale entries
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with TTL and stale-while-revalidate.
+
+    fresh  (age < ttl)              -> served from cache
+    stale  (ttl <= age < ttl+grace) -> served from cache, refreshed in the background
+    expired / missing               -> loaded inline; concurrent misses for the
+                                       same key wait for a single load
+
+    on_lookup(hit) is called for every lookup (used for /metrics).
+    """
+
+    def __init__(self, name, ttl, stale_grace=0.0, maxsize=10000, on_lookup=None, clock=time.monotonic):
+        self.name = name
+        self.ttl = ttl
+        self.stale_grace = stale_grace
+        self.maxsize = maxsize
+        self.on_lookup = on_lookup
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (value, stored_at)
+        self._loading = {} # key -> threading.Event for in-flight loads
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """
+        Returns (value, hit). loader() is only called on a miss (or in the
+        background for a stale entry). If it raises, nothing is cached.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    value, stored_at = entry
+                    age = self.clock() - stored_at
+                    if age < self.ttl + self.stale_grace:
+                        self._entries.move_to_end(key)
+                        if age >= self.ttl and key not in self._refreshing:
+                            self._refreshing.add(key)
+                            _refresh_pool.submit(self._refresh, key, loader)
+                        self._count(hit=True)
+                        return value, True
+                waiting = self._loading.get(key)
+                if waiting is None:
+                    self._loading[key] = threading.Event()
+                    break
+            # Another thread is loading this key; wait and re-check
+            waiting.wait()
+
+        try:
+            value = loader()
+            self.set(key, value)
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+                self._count(hit=False)
+        return value, False
+
+    def _refresh(self, key, loader):
+        try:
+            self.set(key, loader())
+        except Exception as e:
+            print(f"[Cache:{self.name}] background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.on_lookup:
+            self.on_lookup(hit)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -1,35 +1,66 @@
-import ee
 import datetime
 import os
+import threading
+import time
 
 # Get Project ID
 PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
+# After a failed initialization, wait this long before trying again
+INIT_RETRY_SECONDS = float(os.getenv("GEE_INIT_RETRY_SECONDS", "300"))
 
 class EarthEngineService:
+    """
+    The earthengine-api package is imported and ee.Initialize() (credential
+    lookup + network round trip) is run once, on first use or from the
+    startup warm-up, never at import time.
+    """
+
     def __init__(self):
         self.initialized = False
+        self.error = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+        self._ee = None
+
+    @property
+    def ee(self):
+        """The lazily imported `ee` module."""
+        if self._ee is None:
+            import ee
+            self._ee = ee
+        return self._ee
 
     def initialize(self):
-        if not self.initialized:
+        if self.initialized:
+            return True
+        with self._lock:
+            if self.initialized:
+                return True
+            if self._failed_at is not None and time.monotonic() - self._failed_at < INIT_RETRY_SECONDS:
+                return False
             try:
                 if PROJECT_ID:
-                    ee.Initialize(project=PROJECT_ID)
+                    self.ee.Initialize(project=PROJECT_ID)
                 else:
-                    ee.Initialize()
+                    self.ee.Initialize()
                 self.initialized = True
+                self.error = None
                 print("[GEE] Initialized successfully.")
             except Exception as e:
+                self.error = str(e)
+                self._failed_at = time.monotonic()
                 print(f"[GEE] Initialization failed: {e}")
                 print("Tip: Add GOOGLE_CLOUD_PROJECT to .env and run 'python authenticate_gee.py'")
+            return self.initialized
 
     def get_analysis(self, geometry_coords, crop_type="Mixed"):
         """
         Fetches NDVI and Soil Moisture for the given geometry.
         geometry_coords: List of [lng, lat] (GeoJSON format)
         """
-        self.initialize()
-        if not self.initialized:
+        if not self.initialize():
             return {"error": "GEE not initialized"}
+        ee = self.ee
 
         try:
             # Create Geometry
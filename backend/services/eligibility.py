@@ -0,0 +1,265 @@
+"""
+Scheme eligibility rules.
+
+A scheme's `eligibility_rules` is a JSON object; every key present must
+hold for a farmer to qualify and missing keys mean "no restriction":
+
+    {
+        "districts": ["Nagpur", "Wardha"],      # user.district in list
+        "categories": ["SC", "ST"],             # user.category in list
+        "farming_types": ["Organic"],           # user.farming_type in list
+        "crops": ["Cotton", "Soybean"],         # grows at least one of these
+        "min_land_size": 0.5,                   # acres, inclusive
+        "max_land_size": 5                      # acres, inclusive
+    }
+
+Rules are compiled once into predicates for per-user filtering, and into
+NumPy column operations for bulk evaluation across all users.
+
+GET /api/schemes/ serves a farmer's list from scheme_matches. A user's
+rows are rebuilt on read when users.schemes_matched_version no longer
+equals the schemes table version: any scheme write bumps that version,
+and a profile change clears the user's marker (trigger in models.py).
+precompute_matches() rebuilds everyone in bulk:
+
+    python -m backend.services.eligibility
+"""
+import json
+from functools import lru_cache
+
+import numpy as np
+from sqlalchemy import select, insert, delete, update
+
+SET_RULES = {"districts": "district", "categories": "category", "farming_types": "farming_type"}
+RANGE_RULES = ("min_land_size", "max_land_size")
+RULE_KEYS = set(SET_RULES) | {"crops"} | set(RANGE_RULES)
+
+BULK_CHUNK_SIZE = 100_000
+
+
+def _norm(value):
+    return (value or "").strip().lower()
+
+
+def parse_user_crops(crops):
+    """User.crops is a comma-separated string or a JSON list."""
+    if not crops:
+        return []
+    if crops.lstrip().startswith("["):
+        try:
+            return [_norm(c) for c in json.loads(crops) if c]
+        except ValueError:
+            pass
+    return [_norm(c) for c in crops.split(",") if c.strip()]
+
+
+def parse_rules(rules):
+    """Validates a rules dict / JSON string and returns a normalised dict."""
+    if not rules:
+        return {}
+    if isinstance(rules, str):
+        rules = json.loads(rules)
+    if not isinstance(rules, dict):
+        raise ValueError("eligibility_rules must be a JSON object")
+    unknown = set(rules) - RULE_KEYS
+    if unknown:
+        raise ValueError(f"Unknown eligibility rule(s): {', '.join(sorted(unknown))}")
+
+    parsed = {}
+    for key in list(SET_RULES) + ["crops"]:
+        if rules.get(key):
+            values = rules[key]
+            if not isinstance(values, list):
+                raise ValueError(f"'{key}' must be a list")
+            parsed[key] = frozenset(_norm(v) for v in values)
+    for key in RANGE_RULES:
+        if rules.get(key) is not None:
+            parsed[key] = float(rules[key])
+    return parsed
+
+
+@lru_cache(maxsize=1024)
+def compile_rules(rules_json):
+    """
+    Compiles a rules JSON string into predicate(user) -> bool. Cached by the
+    JSON text so each distinct rule set is parsed once per process.
+    """
+    rules = parse_rules(rules_json)
+    checks = []
+    for key, attr in SET_RULES.items():
+        if key in rules:
+            allowed = rules[key]
+            checks.append(lambda u, attr=attr, allowed=allowed: _norm(getattr(u, attr, None)) in allowed)
+    if "crops" in rules:
+        wanted = rules["crops"]
+        checks.append(lambda u: not wanted.isdisjoint(parse_user_crops(u.crops)))
+    if "min_land_size" in rules:
+        low = rules["min_land_size"]
+        checks.append(lambda u: (u.land_size or 0.0) >= low)
+    if "max_land_size" in rules:
+        high = rules["max_land_size"]
+        checks.append(lambda u: (u.land_size or 0.0) <= high)
+
+    if not checks:
+        return lambda user: True
+    return lambda user: all(check(user) for check in checks)
+
+
+# --- Bulk evaluation ---
+
+class _Vocab:
+    """Maps strings to small integer codes so rules compare as int arrays."""
+
+    def __init__(self):
+        self.codes = {}
+
+    def encode(self, values):
+        codes = self.codes
+        return np.fromiter((codes.setdefault(_norm(v), len(codes)) for v in values), dtype=np.int64, count=len(values))
+
+    def lookup(self, values):
+        return np.array([self.codes[v] for v in values if v in self.codes], dtype=np.int64)
+
+
+class BulkEvaluator:
+    """
+    Evaluates many schemes against column arrays of users. Each rule becomes
+    one vectorised mask (np.isin on coded columns, range compares on land
+    size, any() over a user x crop matrix), AND-ed per scheme.
+    """
+
+    def __init__(self, schemes):
+        self.vocabs = {attr: _Vocab() for attr in SET_RULES.values()}
+        self.crop_vocab = _Vocab()
+        self.schemes = [(s.id, parse_rules(s.eligibility_rules)) for s in schemes]
+        # Register rule values up front so crop matrix columns are stable
+        for _, rules in self.schemes:
+            for crop in sorted(rules.get("crops", ())):
+                self.crop_vocab.codes.setdefault(crop, len(self.crop_vocab.codes))
+
+    def evaluate(self, users):
+        """
+        users: dict of equal-length lists (district, category, farming_type,
+        land_size, crops). Returns {scheme_id: boolean mask over users}.
+        """
+        n = len(users["land_size"])
+        coded = {attr: vocab.encode(users[attr]) for attr, vocab in self.vocabs.items()}
+        land = np.array([x if x is not None else 0.0 for x in users["land_size"]], dtype=np.float64)
+
+        # Only crops that some rule mentions matter, so the matrix stays narrow
+        crop_codes = self.crop_vocab.codes
+        crop_matrix = np.zeros((n, max(len(crop_codes), 1)), dtype=bool)
+        for i, crops in enumerate(users["crops"]):
+            for crop in parse_user_crops(crops):
+                j = crop_codes.get(crop)
+                if j is not None:
+                    crop_matrix[i, j] = True
+
+        masks = {}
+        for scheme_id, rules in self.schemes:
+            mask = np.ones(n, dtype=bool)
+            for key, attr in SET_RULES.items():
+                if key in rules:
+                    mask &= np.isin(coded[attr], self.vocabs[attr].lookup(rules[key]))
+            if "crops" in rules:
+                mask &= crop_matrix[:, self.crop_vocab.lookup(rules["crops"])].any(axis=1)
+            if "min_land_size" in rules:
+                mask &= land >= rules["min_land_size"]
+            if "max_land_size" in rules:
+                mask &= land <= rules["max_land_size"]
+            masks[scheme_id] = mask
+        return masks
+
+
+def refresh_user_matches(db, user, version):
+    """
+    Re-evaluates one user against every scheme and replaces their
+    scheme_matches rows, recording the schemes version they were built for.
+    Returns the matched scheme ids.
+    """
+    from ..models import Scheme, SchemeMatch
+
+    schemes = db.execute(select(Scheme.id, Scheme.eligibility_rules).order_by(Scheme.id)).all()
+    matched = [scheme_id for scheme_id, rules in schemes if compile_rules(rules or "")(user)]
+    db.execute(delete(SchemeMatch).where(SchemeMatch.user_id == user.id))
+    if matched:
+        db.execute(insert(SchemeMatch), [{"user_id": user.id, "scheme_id": scheme_id} for scheme_id in matched])
+    user.schemes_matched_version = version
+    db.commit()
+    return matched
+
+
+def user_scheme_matches(db, user):
+    """Schemes the user qualifies for, from scheme_matches (refreshed first if stale)."""
+    from ..models import Scheme, SchemeMatch
+    from .http_cache import table_versions
+
+    user_id = user.id # read before refresh_user_matches commits (and expires) the user
+    (version,) = table_versions(db, ("schemes",))
+    if user.schemes_matched_version != version:
+        refresh_user_matches(db, user, version)
+    return (
+        db.query(Scheme).join(SchemeMatch, SchemeMatch.scheme_id == Scheme.id)
+        .filter(SchemeMatch.user_id == user_id).order_by(SchemeMatch.scheme_id).all()
+    )
+
+
+def precompute_matches(db, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Rebuilds the scheme_matches table (user_id, scheme_id) for every user.
+    Users are streamed in id order in chunks; each chunk is evaluated against
+    all schemes at once and bulk-inserted. The delete, the inserts and the
+    users' freshness markers commit as one transaction, so readers never see
+    a partly rebuilt table. Returns the number of matches.
+    """
+    from ..models import User, Scheme, SchemeMatch
+    from .http_cache import table_versions
+
+    # The delete takes the write lock first: schemes and profiles can't change mid-rebuild
+    db.execute(delete(SchemeMatch))
+    (version,) = table_versions(db, ("schemes",))
+    evaluator = BulkEvaluator(db.query(Scheme).all())
+
+    columns = (User.id, User.district, User.category, User.farming_type, User.land_size, User.crops)
+    total, last_id = 0, 0
+    try:
+        while evaluator.schemes:
+            # Keyset pagination keeps each chunk query an index range scan
+            rows = db.execute(
+                select(*columns).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            ids, district, category, farming_type, land_size, crops = (list(col) for col in zip(*rows))
+            masks = evaluator.evaluate({
+                "district": district, "category": category, "farming_type": farming_type,
+                "land_size": land_size, "crops": crops,
+            })
+            user_ids = np.asarray(ids, dtype=np.int64)
+            matches = [
+                {"user_id": int(uid), "scheme_id": scheme_id}
+                for scheme_id, mask in masks.items() for uid in user_ids[mask]
+            ]
+            if matches:
+                db.execute(insert(SchemeMatch), matches)
+            total += len(matches)
+            last_id = ids[-1]
+        db.execute(update(User).values(schemes_matched_version=version))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return total
+
+
+if __name__ == "__main__":
+    import time
+    from ..database import SessionLocal
+
+    session = SessionLocal()
+    started = time.perf_counter()
+    try:
+        count = precompute_matches(session)
+    finally:
+        session.close()
+    print(f"[Eligibility] {count} user/scheme matches in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,158 @@
+"""
+Content-addressed store for carbon evidence files.
+
+Uploads are streamed to a temp file in CHUNK_SIZE pieces while their
+SHA-256 is computed, then moved to <EVIDENCE_DIR>/<sha[:2]>/<sha>. The
+hash doubles as the dedupe key and as tamper evidence: a stored file can
+always be re-hashed and compared with its evidence row.
+
+Image work (EXIF GPS, thumbnails) runs on a small thread pool so the
+event loop never blocks on Pillow.
+"""
+import asyncio
+import hashlib
+import math
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+
+EVIDENCE_DIR = os.getenv("EVIDENCE_DIR", os.path.join("uploads", "evidence"))
+MAX_EVIDENCE_BYTES = int(os.getenv("MAX_EVIDENCE_BYTES", str(20 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+THUMBNAIL_SIZE = (320, 320)
+GPS_MATCH_RADIUS_M = 500.0 # photo must be taken within this distance of the reported location
+
+_image_pool = ThreadPoolExecutor(max_workers=int(os.getenv("EVIDENCE_WORKERS", "2")), thread_name_prefix="evidence-image")
+
+# EXIF tags
+_GPS_IFD = 0x8825
+_GPS_LAT_REF, _GPS_LAT, _GPS_LNG_REF, _GPS_LNG = 1, 2, 3, 4
+
+
+class EvidenceTooLargeError(Exception):
+    def __init__(self, limit):
+        super().__init__(f"Evidence file exceeds {limit} bytes")
+        self.limit = limit
+
+
+class StoredFile:
+    def __init__(self, sha256, size, path, content_type):
+        self.sha256 = sha256
+        self.size = size
+        self.path = path
+        self.content_type = content_type
+
+
+def blob_path(sha256):
+    return os.path.join(EVIDENCE_DIR, sha256[:2], sha256)
+
+
+def thumbnail_path(sha256):
+    return os.path.join(EVIDENCE_DIR, "thumbs", f"{sha256}.jpg")
+
+
+async def store_upload(upload, max_bytes=None):
+    """
+    Streams an UploadFile into the store. Returns a StoredFile; identical
+    content is only kept once. Raises EvidenceTooLargeError past max_bytes.
+    """
+    max_bytes = max_bytes or MAX_EVIDENCE_BYTES
+    os.makedirs(EVIDENCE_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    tmp = tempfile.NamedTemporaryFile(dir=EVIDENCE_DIR, prefix=".upload-", delete=False)
+    try:
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise EvidenceTooLargeError(max_bytes)
+            digest.update(chunk)
+            await run_in_threadpool(tmp.write, chunk)
+        tmp.close()
+
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256)
+        if os.path.exists(path):
+            os.remove(tmp.name) # already stored
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp.name, path)
+    except BaseException:
+        tmp.close()
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+    return StoredFile(sha256, size, path, upload.content_type or "application/octet-stream")
+
+
+def verify_blob(sha256):
+    """Re-hashes a stored file; False if it is missing or its content changed."""
+    path = blob_path(sha256)
+    if not os.path.exists(path):
+        return False
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest() == sha256
+
+
+def _to_degrees(dms, ref):
+    degrees, minutes, seconds = (float(x) for x in dms)
+    value = degrees + minutes / 60.0 + seconds / 3600.0
+    return -value if ref in ("S", "W") else value
+
+
+def _exif_gps(image):
+    gps = image.getexif().get_ifd(_GPS_IFD)
+    if _GPS_LAT not in gps or _GPS_LNG not in gps:
+        return None
+    try:
+        return (_to_degrees(gps[_GPS_LAT], gps.get(_GPS_LAT_REF, "N")),
+                _to_degrees(gps[_GPS_LNG], gps.get(_GPS_LNG_REF, "E")))
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def process_image(path, sha256):
+    """
+    EXIF GPS and thumbnail for a stored file (runs on the image pool).
+    Returns {"gps": (lat, lng) | None, "thumbnail": path | None}; files
+    that are not images (e.g. PDF lab reports) get neither.
+    """
+    try:
+        from PIL import Image, ImageOps, UnidentifiedImageError
+    except ImportError:
+        return {"gps": None, "thumbnail": None}
+
+    try:
+        with Image.open(path) as image:
+            gps = _exif_gps(image)
+            thumb = thumbnail_path(sha256)
+            if not os.path.exists(thumb):
+                os.makedirs(os.path.dirname(thumb), exist_ok=True)
+                small = ImageOps.exif_transpose(image)
+                small.thumbnail(THUMBNAIL_SIZE)
+                small.convert("RGB").save(thumb, "JPEG", quality=80)
+    except (UnidentifiedImageError, OSError) as e:
+        print(f"[Evidence] No image metadata for {sha256[:12]}: {e}")
+        return {"gps": None, "thumbnail": None}
+    return {"gps": gps, "thumbnail": thumb}
+
+
+async def process_image_async(stored):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_image_pool, process_image, stored.path, stored.sha256)
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Haversine distance in metres."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6_371_000 * math.asin(math.sqrt(a))
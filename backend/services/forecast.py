@@ -0,0 +1,198 @@
+"""
+Open-Meteo forecast requests, field projection and the compact encoding
+served by GET /api/weather/current.
+
+fields= selects whole sections or single variables:
+
+    fields=current
+    fields=current,daily.temperature_2m_max,daily.temperature_2m_min
+
+Only the selected variables are requested upstream and returned, with
+the location metadata; without fields= the full forecast is forwarded
+as before.
+
+format=compact re-encodes the (projected) forecast for slow links:
+
+    {"v": 1, "lat": 21.125, "lng": 79.125, "tz": "Asia/Kolkata",
+     "t0": 1770834600,                        # epoch seconds, shared time base
+     "decimals": {"temperature_2m": 1, ...},  # value = integer / 10**decimals
+     "current": {"time": 660, "temperature_2m": 275, ...},
+     "hourly": {"start": 0, "step": 60, "temperature_2m": [172, 168, ...]},
+     "daily": {"start": 0, "step": 1440, "sunrise": [405, 1845, ...], ...}}
+
+Every timestamp (time, sunrise, sunset) is minutes since t0. Regularly
+spaced series carry start/step instead of a time array; irregular ones
+keep "time" as a list of offsets. Numbers are fixed-point integers at
+the precision Open-Meteo reports them. Units are dropped (they never
+change for a given variable).
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+CURRENT = ("temperature_2m", "relative_humidity_2m", "rain", "precipitation", "weather_code", "is_day",
+           "wind_speed_10m", "soil_temperature_0cm")
+HOURLY = ("temperature_2m", "weather_code", "is_day")
+DAILY = ("weather_code", "temperature_2m_max", "temperature_2m_min", "sunrise", "sunset", "uv_index_max",
+         "precipitation_sum", "wind_speed_10m_max")
+SECTIONS = {"current": CURRENT, "hourly": HOURLY, "daily": DAILY}
+
+# Location metadata kept by a projection (generationtime_ms, elevation etc. are dropped)
+METADATA = ("latitude", "longitude", "utc_offset_seconds", "timezone")
+
+TIME_VARIABLES = {"time", "sunrise", "sunset"}
+DECIMALS = {
+    "temperature_2m": 1, "temperature_2m_max": 1, "temperature_2m_min": 1, "soil_temperature_0cm": 1,
+    "relative_humidity_2m": 0, "weather_code": 0, "is_day": 0,
+    "rain": 1, "precipitation": 1, "precipitation_sum": 1,
+    "wind_speed_10m": 1, "wind_speed_10m_max": 1, "uv_index_max": 2,
+}
+COMPACT_VERSION = 1
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_fields(fields):
+    """
+    'current,daily.sunrise' -> {"current": CURRENT, "daily": ("sunrise",)}.
+    Empty / None selects everything. Raises ValueError for unknown fields.
+    """
+    if not fields or not fields.strip():
+        return dict(SECTIONS)
+
+    chosen = {}
+    for field in fields.split(","):
+        field = field.strip()
+        if not field:
+            continue
+        section, _, variable = field.partition(".")
+        if section not in SECTIONS or (variable and variable not in SECTIONS[section]):
+            raise ValueError(f"Unknown weather field '{field}'. Use a section ({', '.join(SECTIONS)}) "
+                             f"or section.variable")
+        chosen.setdefault(section, set()).update([variable] if variable else SECTIONS[section])
+
+    # Upstream order, so equal selections build equal URLs
+    return {section: tuple(v for v in variables if v in chosen[section])
+            for section, variables in SECTIONS.items() if section in chosen}
+
+
+def forecast_url(lat, lng, selected):
+    params = "&".join(f"{section}={','.join(variables)}" for section, variables in selected.items())
+    return f"{FORECAST_URL}?latitude={lat}&longitude={lng}&{params}&timezone=auto"
+
+
+def project(data, selected):
+    """Metadata plus the selected variables (and their units) of an Open-Meteo response."""
+    out = {key: data[key] for key in METADATA if key in data}
+    for section, variables in selected.items():
+        keep = {"time", "interval", *variables}
+        for key in (section, f"{section}_units"):
+            if isinstance(data.get(key), dict):
+                out[key] = {name: value for name, value in data[key].items() if name in keep}
+    return out
+
+
+def _minutes(values, offset):
+    """
+    Local ISO date/time(s) -> int64 minutes since the Unix epoch (UTC), and the
+    mask of missing (None) entries. One numpy parse for a whole series is ~6x
+    faster than datetime.fromisoformat per item.
+    """
+    local = np.array(values, dtype="datetime64[m]")
+    return (local.astype(np.int64) * 60 - offset) // 60, np.isnat(local)
+
+
+def _to_list(ints, missing):
+    if not missing.any():
+        return ints.tolist()
+    return [None if m else v for v, m in zip(ints.tolist(), missing.tolist())]
+
+
+def _fixed(name, value):
+    decimals = DECIMALS.get(name)
+    if decimals is None:
+        return value
+    scale = 10 ** decimals
+    if not isinstance(value, list):
+        return None if value is None else round(value * scale)
+    scaled = np.rint(np.array(value, dtype=float) * scale) # None -> nan; rounds half to even like round()
+    missing = np.isnan(scaled)
+    return _to_list(np.where(missing, 0, scaled).astype(np.int64), missing)
+
+
+def _encode_section(values, offset, t0):
+    out = {}
+    for name, value in values.items():
+        if name not in TIME_VARIABLES:
+            out[name] = _fixed(name, value)
+            continue
+        minutes, missing = _minutes(value, offset)
+        minutes = minutes - t0
+        if not isinstance(value, list):
+            out[name] = None if missing else int(minutes)
+            continue
+        steps = np.diff(minutes)
+        if name == "time" and len(minutes) and not missing.any() and (steps == (steps[0] if len(steps) else 0)).all():
+            out["start"], out["step"] = int(minutes[0]), int(steps[0]) if len(steps) else 0
+        else:
+            out[name] = _to_list(minutes, missing)
+    return out
+
+
+def encode_compact(data):
+    """Compact encoding of an Open-Meteo response (see module docstring)."""
+    offset = data.get("utc_offset_seconds") or 0
+    sections = {s: data[s] for s in SECTIONS if isinstance(data.get(s), dict)}
+
+    # 1. Shared time base: the earliest timestamp of any section
+    firsts = []
+    for values in sections.values():
+        time = values.get("time")
+        first = time[0] if isinstance(time, list) and time else time
+        if isinstance(first, str):
+            firsts.append(int(_minutes(first, offset)[0]))
+    t0 = min(firsts) if firsts else 0
+
+    # 2. Fixed-point values, time offsets, start/step for regular series
+    out = {"v": COMPACT_VERSION, "lat": data.get("latitude"), "lng": data.get("longitude"),
+           "tz": data.get("timezone"), "t0": t0 * 60,
+           "decimals": {name: DECIMALS[name] for values in sections.values() for name in values if name in DECIMALS}}
+    for section, values in sections.items():
+        out[section] = _encode_section(values, offset, t0)
+    return out
+
+
+def decode_compact(payload, utc_offset_seconds=0):
+    """
+    Inverse of encode_compact for checks and tooling: times become local
+    datetimes (utc_offset_seconds as in the original response), numbers floats.
+    """
+    base = EPOCH + timedelta(seconds=payload["t0"] + utc_offset_seconds)
+    decimals = payload["decimals"]
+
+    def time(minutes):
+        return None if minutes is None else base + timedelta(minutes=minutes)
+
+    def number(name, value):
+        return None if value is None else value / 10 ** decimals[name]
+
+    out = {"latitude": payload["lat"], "longitude": payload["lng"], "timezone": payload["tz"]}
+    for section in SECTIONS:
+        if section not in payload:
+            continue
+        values = dict(payload[section])
+        if "step" in values:
+            start, step = values.pop("start"), values.pop("step")
+            length = max((len(v) for v in values.values() if isinstance(v, list)), default=0)
+            values = {"time": [start + i * step for i in range(length)], **values}
+        decoded = {}
+        for name, value in values.items():
+            if name in TIME_VARIABLES:
+                decoded[name] = [time(v) for v in value] if isinstance(value, list) else time(value)
+            elif name in decimals:
+                decoded[name] = [number(name, v) for v in value] if isinstance(value, list) else number(name, value)
+            else:
+                decoded[name] = value
+        out[section] = decoded
+    return out
@@ -0,0 +1,33 @@
+"""
+Lazy access to the Gemini SDK.
+
+google.generativeai takes most of a second to import, so routers go
+through this module instead of importing it at load time. The SDK is
+imported and configured with GEMINI_API_KEY once, on first use or from
+the startup warm-up.
+"""
+import os
+import threading
+
+_lock = threading.Lock()
+_genai = None
+
+
+def client():
+    """The imported and configured google.generativeai module."""
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _genai = genai
+    return _genai
+
+
+def model(name):
+    return client().GenerativeModel(name)
+
+
+def is_loaded():
+    return _genai is not None
@@ -0,0 +1,115 @@
+"""
+Conditional GET and server-side response caching for read-mostly catalog
+routes (schemes, insurance search, market listings).
+
+Every write to a tracked table bumps its row in table_versions (SQLite
+triggers, see models.VERSIONED_TABLES), whichever code path made it. A
+route's ETag is a hash of the versions of the tables it reads plus the
+request parameters that shape the response, so answering a request
+costs one primary-key lookup:
+
+  If-None-Match matches   -> 304, the catalog query never runs
+  ETag seen before        -> cached JSON bytes
+  otherwise               -> build, serialize once, cache under the ETag
+
+Cached entries are keyed by ETag, so a write can never serve stale data;
+when a route notices its versions moved it also drops the entries built
+against the old ones.
+"""
+import hashlib
+import os
+import threading
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from .cache import TTLCache
+from .. import fast_json
+from ..metrics import record_response_cache
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+
+
+def table_versions(db, tables):
+    """Current change counter of each table, in order (0 = never written since tracking began)."""
+    from ..models import TableVersion
+
+    rows = dict(db.execute(
+        select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+    ).all())
+    return tuple(rows.get(table, 0) for table in tables)
+
+
+def make_etag(name, versions, key):
+    digest = hashlib.sha1(repr((name, versions, key)).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison against an If-None-Match header value."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class CatalogCache:
+    """
+    ETags and cached response bodies for one route.
+
+    tables:    the tables the response is built from
+    model:     optional response type to validate/serialize with (e.g.
+               List[SchemeResponse]); without it the built rows are already
+               response-shaped dicts and go straight to fast_json
+    on_change: optional fn(db, changed_tables) run when a write is noticed,
+               for in-memory structures derived from those tables
+    """
+
+    def __init__(self, name, tables, model=None, on_change=None, ttl=RESPONSE_CACHE_TTL, maxsize=RESPONSE_CACHE_SIZE):
+        self.name = name
+        self.tables = tuple(tables)
+        self.adapter = TypeAdapter(model) if model is not None else None
+        self.on_change = on_change
+        self.cache = TTLCache(f"http_{name}", ttl=ttl, maxsize=maxsize)
+        self._seen = None
+        self._lock = threading.Lock()
+
+    def _observe(self, db, versions):
+        with self._lock:
+            previous, self._seen = self._seen, versions
+        if previous is None or previous == versions:
+            return
+        self.cache.invalidate()
+        if self.on_change:
+            changed = {t for t, old, new in zip(self.tables, previous, versions) if old != new}
+            self.on_change(db, changed)
+
+    def _serialize(self, content):
+        if self.adapter is None:
+            return fast_json.dumps(content)
+        return self.adapter.dump_json(self.adapter.validate_python(content, from_attributes=True))
+
+    def respond(self, request, db, key, build, private=False):
+        """
+        304, cached or freshly built JSON response for this request.
+        key: hashable request parameters the response depends on; build(): the response content.
+        """
+        versions = table_versions(db, self.tables)
+        self._observe(db, versions)
+        etag = make_etag(self.name, versions, key)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache" if private else "no-cache"}
+        if private:
+            headers["Vary"] = "Authorization"
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            record_response_cache(self.name, "not_modified")
+            return Response(status_code=304, headers=headers)
+
+        body, hit = self.cache.get_or_load(etag, lambda: self._serialize(build()))
+        record_response_cache(self.name, "hit" if hit else "miss")
+        headers["X-Cache"] = "HIT" if hit else "MISS"
+        return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,312 @@
+"""
+Append-only carbon credit ledger.
+
+Every credit movement is a row in carbon_ledger (SQLite triggers reject
+UPDATE and DELETE on it):
+
+    issuance         credits issued to a verified project   available +amount, issued +amount
+    buffer_lock      share moved into the buffer pool       available -amount, locked +amount
+    vesting_release  buffer released after vesting         locked -amount, available +amount
+    transfer         one row per side; the sender's row carries the project
+
+Balances are materialized on carbon_projects (per project) and
+carbon_portfolio_summaries (per user). post() inserts the entries and
+applies the deltas with atomic "balance = balance + delta" UPDATEs in the
+caller's transaction; debits are guarded so two concurrent writers can
+never take a balance below zero. verify_balances() replays the whole
+ledger and reports any materialized balance that disagrees with it.
+
+    python -m backend.services.ledger --verify
+    python -m backend.services.ledger --release-vested
+    python -m backend.services.ledger --backfill    # projects verified before the ledger existed
+"""
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import select, update, func, bindparam, and_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+ISSUANCE = "issuance"
+BUFFER_LOCK = "buffer_lock"
+VESTING_RELEASE = "vesting_release"
+TRANSFER = "transfer"
+
+EPSILON = 1e-6
+VERIFY_CHUNK_SIZE = 100_000
+MAX_REPORTED_MISMATCHES = 100
+
+
+class InsufficientCreditsError(Exception):
+    """A debit would take a project or user balance below zero."""
+
+
+def _entry(entry_type, user_id, amount, project_id=None, available=0.0, locked=0.0, issued=0.0,
+           counterparty_id=None, reference=None):
+    return {
+        "entry_type": entry_type,
+        "user_id": user_id,
+        "project_id": project_id,
+        "counterparty_id": counterparty_id,
+        "amount": round(float(amount), 4),
+        "available_delta": round(float(available), 4),
+        "locked_delta": round(float(locked), 4),
+        "issued_delta": round(float(issued), 4),
+        "reference": reference,
+    }
+
+
+def issuance(user_id, project_id, amount, reference=None):
+    return _entry(ISSUANCE, user_id, amount, project_id, available=amount, issued=amount, reference=reference)
+
+
+def buffer_lock(user_id, project_id, amount, reference=None):
+    return _entry(BUFFER_LOCK, user_id, amount, project_id, available=-amount, locked=amount, reference=reference)
+
+
+def vesting_release(user_id, project_id, amount, reference=None):
+    return _entry(VESTING_RELEASE, user_id, amount, project_id, available=amount, locked=-amount, reference=reference)
+
+
+def transfer(from_user_id, to_user_id, project_id, amount, reference=None):
+    """Both sides of a transfer; only the sender's row moves the project balance."""
+    return [
+        _entry(TRANSFER, from_user_id, amount, project_id, available=-amount, counterparty_id=to_user_id, reference=reference),
+        _entry(TRANSFER, to_user_id, amount, None, available=amount, counterparty_id=from_user_id, reference=reference),
+    ]
+
+
+def _sum_deltas(entries, key):
+    totals = {}
+    for e in entries:
+        if e[key] is None:
+            continue
+        t = totals.setdefault(e[key], [0.0, 0.0, 0.0])
+        t[0] += e["available_delta"]
+        t[1] += e["locked_delta"]
+        t[2] += e["issued_delta"]
+    return [{"target": k, "da": round(a, 4), "dl": round(l, 4), "di": round(i, 4)} for k, (a, l, i) in totals.items()]
+
+
+def _guarded_update(db, table, key_col, rows):
+    """balance += delta for each row, only where no balance would go negative."""
+    if not rows:
+        return
+    available = func.coalesce(table.c.available_credits, 0.0)
+    locked = func.coalesce(table.c.locked_credits, 0.0)
+    issued = func.coalesce(table.c.verified_credits, 0.0)
+    result = db.execute(
+        update(table)
+        .where(and_(
+            key_col == bindparam("target"),
+            available + bindparam("da") >= -EPSILON,
+            locked + bindparam("dl") >= -EPSILON,
+        ))
+        .values(
+            available_credits=available + bindparam("da"),
+            locked_credits=locked + bindparam("dl"),
+            verified_credits=issued + bindparam("di"),
+        ),
+        rows,
+    )
+    if result.rowcount != len(rows):
+        raise InsufficientCreditsError(f"Insufficient credits for {table.name} update")
+
+
+def post(db, entries):
+    """
+    Appends entries and updates the materialized balances. Caller commits
+    (and rolls back on InsufficientCreditsError).
+    """
+    from ..models import CarbonLedgerEntry, CarbonProject, CarbonPortfolioSummary
+
+    if not entries:
+        return
+    now = datetime.utcnow()
+    for e in entries:
+        e.setdefault("created_at", now)
+
+    _guarded_update(db, CarbonProject.__table__, CarbonProject.__table__.c.id, _sum_deltas(entries, "project_id"))
+
+    summaries = CarbonPortfolioSummary.__table__
+    user_rows = _sum_deltas(entries, "user_id")
+    debits = [r for r in user_rows if r["da"] < 0 or r["dl"] < 0]
+    credits = [r for r in user_rows if not (r["da"] < 0 or r["dl"] < 0)]
+    _guarded_update(db, summaries, summaries.c.user_id, debits)
+    if credits:
+        stmt = sqlite_insert(summaries).values(
+            user_id=bindparam("target"), available_credits=bindparam("da"),
+            locked_credits=bindparam("dl"), verified_credits=bindparam("di"), updated_at=now,
+        )
+        db.execute(stmt.on_conflict_do_update(index_elements=["user_id"], set_={
+            "available_credits": summaries.c.available_credits + stmt.excluded.available_credits,
+            "locked_credits": summaries.c.locked_credits + stmt.excluded.locked_credits,
+            "verified_credits": summaries.c.verified_credits + stmt.excluded.verified_credits,
+            "updated_at": now,
+        }), credits)
+
+    db.execute(CarbonLedgerEntry.__table__.insert(), entries)
+
+
+def release_vested(db, now=None):
+    """Posts vesting_release entries for every project whose vesting period ended. Caller commits."""
+    from ..models import CarbonProject
+
+    now = now or datetime.utcnow()
+    due = db.execute(
+        select(CarbonProject.id, CarbonProject.user_id, CarbonProject.locked_credits)
+        .where(CarbonProject.vesting_end_date <= now, CarbonProject.locked_credits > EPSILON)
+    ).all()
+    post(db, [vesting_release(user_id, project_id, locked, reference="vesting")
+              for project_id, user_id, locked in due])
+    return len(due)
+
+
+def backfill_from_projects(db):
+    """
+    Writes issuance / buffer_lock entries for verified projects that have
+    credits but no ledger history (verified before the ledger existed).
+    Their balances are reset first so posting lands on the same values.
+    """
+    from ..models import CarbonProject, CarbonLedgerEntry, CarbonPortfolioSummary
+
+    has_entries = select(CarbonLedgerEntry.id).where(CarbonLedgerEntry.project_id == CarbonProject.id).exists()
+    legacy = db.execute(
+        select(CarbonProject.id, CarbonProject.user_id, CarbonProject.verified_credits, CarbonProject.locked_credits)
+        .where(CarbonProject.verified_credits > 0, ~has_entries)
+    ).all()
+    if not legacy:
+        return 0
+    db.execute(
+        update(CarbonProject).where(CarbonProject.id.in_([row[0] for row in legacy]))
+        .values(available_credits=0.0, locked_credits=0.0, verified_credits=0.0)
+        .execution_options(synchronize_session=False)
+    )
+    entries = []
+    for project_id, user_id, issued, locked in legacy:
+        entries.append(issuance(user_id, project_id, issued, reference="backfill"))
+        if locked:
+            entries.append(buffer_lock(user_id, project_id, locked, reference="backfill"))
+    post(db, entries)
+
+    # User totals held pre-ledger project sums; rebuild them from their ledger rows
+    users = {row[1] for row in legacy}
+    summaries = CarbonPortfolioSummary.__table__
+    replayed = db.execute(
+        select(CarbonLedgerEntry.user_id, func.sum(CarbonLedgerEntry.available_delta),
+               func.sum(CarbonLedgerEntry.locked_delta), func.sum(CarbonLedgerEntry.issued_delta))
+        .where(CarbonLedgerEntry.user_id.in_(users)).group_by(CarbonLedgerEntry.user_id)
+    ).all()
+    db.execute(
+        update(summaries).where(summaries.c.user_id == bindparam("target"))
+        .values(available_credits=bindparam("da"), locked_credits=bindparam("dl"), verified_credits=bindparam("di")),
+        [{"target": u, "da": a, "dl": l, "di": i} for u, a, l, i in replayed],
+    )
+    return len(legacy)
+
+
+def _accumulate(totals, ids, deltas):
+    """Adds per-row deltas into {id: [available, locked, issued]} (one np.add.at per chunk)."""
+    keep = ids >= 0
+    ids, deltas = ids[keep], deltas[keep]
+    if not len(ids):
+        return
+    unique, inverse = np.unique(ids, return_inverse=True)
+    sums = np.zeros((len(unique), 3))
+    np.add.at(sums, inverse, deltas)
+    for key, row in zip(unique.tolist(), sums):
+        if key in totals:
+            totals[key] += row
+        else:
+            totals[key] = row
+
+
+def _compare(kind, replayed, materialized, mismatches):
+    fields = ("available_credits", "locked_credits", "verified_credits")
+    checked = 0
+    for key, values in materialized:
+        checked += 1
+        expected = replayed.pop(key, np.zeros(3))
+        for field, want, have in zip(fields, expected, values):
+            if abs(want - (have or 0.0)) > EPSILON:
+                mismatches.append({"kind": kind, "id": key, "field": field,
+                                   "ledger": round(float(want), 4), "materialized": have})
+    for key, values in replayed.items(): # ledger rows for a project / user without a balance row
+        if np.abs(values).max() > EPSILON:
+            mismatches.append({"kind": kind, "id": key, "field": "missing", "ledger": values.round(4).tolist(),
+                               "materialized": None})
+    return checked
+
+
+def verify_balances(db, chunk_size=VERIFY_CHUNK_SIZE):
+    """
+    Replays the ledger in id order, chunk_size rows at a time, and compares
+    the totals with the materialized project and user balances.
+    """
+    from ..models import CarbonLedgerEntry as L, CarbonProject, CarbonPortfolioSummary
+
+    by_project, by_user, entries, last_id = {}, {}, 0, 0
+    while True:
+        rows = db.execute(
+            select(L.id, L.user_id, func.coalesce(L.project_id, -1), L.available_delta, L.locked_delta, L.issued_delta)
+            .where(L.id > last_id).order_by(L.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        data = np.array(rows, dtype=np.float64)
+        deltas = data[:, 3:6]
+        _accumulate(by_user, data[:, 1].astype(np.int64), deltas)
+        _accumulate(by_project, data[:, 2].astype(np.int64), deltas)
+        entries += len(rows)
+        last_id = rows[-1][0]
+
+    mismatches = []
+    projects = _compare("project", by_project, (
+        (row[0], row[1:]) for row in db.execute(select(
+            CarbonProject.id, CarbonProject.available_credits, CarbonProject.locked_credits, CarbonProject.verified_credits))
+    ), mismatches)
+    users = _compare("user", by_user, (
+        (row[0], row[1:]) for row in db.execute(select(
+            CarbonPortfolioSummary.user_id, CarbonPortfolioSummary.available_credits,
+            CarbonPortfolioSummary.locked_credits, CarbonPortfolioSummary.verified_credits))
+    ), mismatches)
+    return {
+        "ok": not mismatches,
+        "entries": entries,
+        "projects": projects,
+        "users": users,
+        "mismatch_count": len(mismatches),
+        "mismatches": mismatches[:MAX_REPORTED_MISMATCHES],
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+    from ..database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Carbon credit ledger maintenance")
+    parser.add_argument("--verify", action="store_true", help="replay the ledger and check materialized balances")
+    parser.add_argument("--release-vested", action="store_true", help="release buffer credits whose vesting ended")
+    parser.add_argument("--backfill", action="store_true", help="write entries for projects verified before the ledger")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.backfill:
+            print(f"[Ledger] Backfilled {backfill_from_projects(session)} projects")
+            session.commit()
+        if args.release_vested:
+            print(f"[Ledger] Released vesting for {release_vested(session)} projects")
+            session.commit()
+        if args.verify or not (args.backfill or args.release_vested):
+            started = time.perf_counter()
+            report = verify_balances(session)
+            print(json.dumps({k: v for k, v in report.items() if k != "mismatches"}))
+            for mismatch in report["mismatches"]:
+                print(f"[Ledger] Mismatch: {mismatch}")
+            print(f"[Ledger] Replayed {report['entries']} entries in {time.perf_counter() - started:.1f}s")
+            if not report["ok"]:
+                raise SystemExit(1)
+    finally:
+        session.close()
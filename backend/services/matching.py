@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select, func
+
+from .eligibility import parse_user_crops
+
+# Only contracts delivering within this many days are offered
+MATCH_HORIZON_DAYS = int(os.getenv("MATCH_HORIZON_DAYS", "365"))
+# Full rebuild interval, picks up changes made by other worker processes
+MATCH_REFRESH_SECONDS = float(os.getenv("MATCH_REFRESH_SECONDS", "300"))
+MAX_MATCHES = 50
+
+# Rough yields in tonnes per acre, used to estimate what a farmer can supply
+YIELD_TONS_PER_ACRE = {
+    "wheat": 1.4, "rice": 1.6, "cotton": 0.6, "soybean": 0.4, "corn": 1.2, "maize": 1.2,
+    "sugarcane": 30.0, "potato": 8.0, "tomato": 10.0, "onion": 7.0, "orange": 4.0, "grapes": 8.0,
+}
+DEFAULT_YIELD = 1.0
+DEFAULT_HEALTH = 0.6 # for crops a farmer lists but has no scanned plot for
+
+# Score weights (sum to 1)
+W_CAPACITY = 0.5
+W_HEALTH = 0.3
+W_PLANTED = 0.2
+
+
+def _norm(crop):
+    return (crop or "").strip().lower()
+
+
+def score_matches(area, health, planted, crop, quantities):
+    """
+    Vectorised match score in [0, 1].
+    capacity: estimated harvest (area x yield, scaled by health) vs contract quantity
+    health:   recent NDVI-based plot health
+    planted:  1 if the crop is on a registered plot, 0.5 if only listed in the profile
+    """
+    area, health, planted, quantities = (np.asarray(x, dtype=np.float64) for x in (area, health, planted, quantities))
+    expected_tons = area * YIELD_TONS_PER_ACRE.get(crop, DEFAULT_YIELD) * (0.5 + 0.5 * health)
+    capacity = np.minimum(1.0, expected_tons / np.maximum(quantities, 1e-6))
+    return np.round(W_CAPACITY * capacity + W_HEALTH * health + W_PLANTED * np.where(planted > 0, 1.0, 0.5), 4)
+
+
+class _CropBook:
+    """Open contracts for one crop, sorted by (delivery day, id)."""
+
+    def __init__(self):
+        self.keys = [] # (delivery ordinal, contract id)
+        self._arrays = None
+
+    def add(self, ordinal, contract_id):
+        insort(self.keys, (ordinal, contract_id))
+        self._arrays = None
+
+    def remove(self, ordinal, contract_id):
+        i = bisect_left(self.keys, (ordinal, contract_id))
+        if i < len(self.keys) and self.keys[i] == (ordinal, contract_id):
+            del self.keys[i]
+            self._arrays = None
+
+    def window(self, start, end):
+        """(ids, positions) of contracts delivering in [start, end] (ordinals)."""
+        lo = bisect_left(self.keys, (start, -1))
+        hi = bisect_left(self.keys, (end + 1, -1))
+        if self._arrays is None:
+            self._arrays = np.array([k[1] for k in self.keys], dtype=np.int64)
+        return self._arrays[lo:hi]
+
+
+class ContractMatcher:
+    """
+    In-memory matching index between open contracts and farmers.
+
+    Contracts are indexed by crop and delivery date; farmers by the crops
+    they list or grow, with planted area and average plot health per crop.
+    Changes are applied incrementally (a signed contract, a new or
+    rescanned plot, a profile edit) and bump per-crop / per-farmer
+    versions, so a farmer's cached ranking is only recomputed when
+    something it depends on changed.
+    """
+
+    def __init__(self, horizon_days=MATCH_HORIZON_DAYS):
+        self.horizon_days = horizon_days
+        self._lock = threading.RLock()
+        self._reset()
+        self._rebuilding = False
+
+    _INDEX_ATTRS = ("_contracts", "_books", "_farmers", "_farmers_by_crop",
+                    "_crop_versions", "_farmer_versions", "_match_cache")
+
+    def _reset(self):
+        self._contracts = {} # id -> contract dict
+        self._books = {} # crop -> _CropBook
+        self._farmers = {} # user_id -> {crop: (area, health, planted)}
+        self._farmers_by_crop = {} # crop -> set of user ids
+        self._crop_versions = {}
+        self._farmer_versions = {}
+        self._match_cache = {} # user_id -> (cache key, matches)
+        self.built_at = None
+
+    # --- Loading ---
+
+    def build(self, db):
+        """Loads every open contract and farmer profile; swaps the index in at the end."""
+        from ..models import Contract, Plot, User
+
+        fresh = ContractMatcher(self.horizon_days)
+        for contract in db.query(Contract).filter(Contract.status == "Open"):
+            fresh._add_contract(contract)
+
+        profiles = {}
+        for user_id, crops in db.execute(select(User.id, User.crops).where(User.crops.is_not(None), User.crops != "")):
+            for crop in parse_user_crops(crops):
+                profiles.setdefault(user_id, {})[crop] = (0.0, DEFAULT_HEALTH, 0)
+        for user_id, crop, area, health in db.execute(self._plot_aggregate(Plot)):
+            profiles.setdefault(user_id, {})[_norm(crop)] = (area or 0.0, health if health is not None else DEFAULT_HEALTH, 1)
+        for user_id, profile in profiles.items():
+            fresh._set_farmer(user_id, profile)
+
+        with self._lock:
+            for attr in self._INDEX_ATTRS:
+                setattr(self, attr, getattr(fresh, attr))
+            self.built_at = time.monotonic()
+
+    @staticmethod
+    def _plot_aggregate(Plot):
+        return (
+            select(Plot.user_id, Plot.crop_type, func.sum(Plot.area), func.avg(Plot.health_score))
+            .where(Plot.crop_type.is_not(None), Plot.crop_type != "")
+            .group_by(Plot.user_id, Plot.crop_type)
+        )
+
+    def refresh_in_background(self, session_factory):
+        """Starts a full rebuild if the index is older than MATCH_REFRESH_SECONDS."""
+        with self._lock:
+            if self._rebuilding or (self.built_at and time.monotonic() - self.built_at < MATCH_REFRESH_SECONDS):
+                return
+            self._rebuilding = True
+
+        def _run():
+            db = session_factory()
+            try:
+                self.build(db)
+            except Exception as e:
+                print(f"[Matching] Rebuild failed: {e}")
+            finally:
+                db.close()
+                self._rebuilding = False
+
+        threading.Thread(target=_run, name="contract-matcher-rebuild", daemon=True).start()
+
+    # --- Incremental updates ---
+
+    def _bump(self, versions, key):
+        versions[key] = versions.get(key, 0) + 1
+
+    def _add_contract(self, contract):
+        if not contract.delivery_date:
+            return
+        crop = _norm(contract.crop_type)
+        self._contracts[contract.id] = {
+            "id": contract.id, "crop": crop, "crop_type": contract.crop_type, "buyer_name": contract.buyer_name,
+            "quantity": contract.quantity or 0.0, "price_per_qt": contract.price_per_qt,
+            "delivery_date": contract.delivery_date, "ordinal": contract.delivery_date.toordinal(),
+            "terms": contract.terms,
+        }
+        self._books.setdefault(crop, _CropBook()).add(contract.delivery_date.toordinal(), contract.id)
+        self._bump(self._crop_versions, crop)
+
+    def upsert_contract(self, contract):
+        with self._lock:
+            self.remove_contract(contract.id)
+            if contract.status == "Open":
+                self._add_contract(contract)
+
+    def remove_contract(self, contract_id):
+        with self._lock:
+            existing = self._contracts.pop(contract_id, None)
+            if existing:
+                self._books[existing["crop"]].remove(existing["ordinal"], contract_id)
+                self._bump(self._crop_versions, existing["crop"])
+
+    def _set_farmer(self, user_id, profile):
+        for crop in self._farmers.get(user_id, {}):
+            self._farmers_by_crop.get(crop, set()).discard(user_id)
+        if profile:
+            self._farmers[user_id] = profile
+            for crop in profile:
+                self._farmers_by_crop.setdefault(crop, set()).add(user_id)
+        else:
+            self._farmers.pop(user_id, None)
+        self._bump(self._farmer_versions, user_id)
+
+    def update_farmer(self, db, user_id):
+        """Reloads one farmer's crops / plots (after a plot or profile change)."""
+        from ..models import Plot, User
+
+        profile = {}
+        crops = db.execute(select(User.crops).where(User.id == user_id)).scalar()
+        for crop in parse_user_crops(crops):
+            profile[crop] = (0.0, DEFAULT_HEALTH, 0)
+        for _, crop, area, health in db.execute(self._plot_aggregate(Plot).where(Plot.user_id == user_id)):
+            profile[_norm(crop)] = (area or 0.0, health if health is not None else DEFAULT_HEALTH, 1)
+        with self._lock:
+            self._set_farmer(user_id, profile)
+
+    # --- Queries ---
+
+    def matches_for(self, db, user_id, limit=MAX_MATCHES, today=None):
+        """Ranked open contracts for a farmer: [(contract dict, score), ...]."""
+        today = today or date.today()
+        with self._lock:
+            if user_id not in self._farmers and user_id not in self._farmer_versions:
+                self.update_farmer(db, user_id) # not indexed yet (e.g. signed up after the last build)
+            profile = self._farmers.get(user_id, {})
+            key = (today, self._farmer_versions.get(user_id, 0),
+                   tuple((crop, self._crop_versions.get(crop, 0)) for crop in sorted(profile)))
+            cached = self._match_cache.get(user_id)
+            if cached and cached[0] == key:
+                return cached[1][:limit]
+
+            start = today.toordinal()
+            ids, scores = [], []
+            for crop, (area, health, planted) in profile.items():
+                book = self._books.get(crop)
+                if not book:
+                    continue
+                window = book.window(start, start + self.horizon_days)
+                if not len(window):
+                    continue
+                quantities = [self._contracts[i]["quantity"] for i in window]
+                ids.append(window)
+                scores.append(score_matches(area, health, planted, crop, quantities))
+
+            matches = []
+            if ids:
+                ids, scores = np.concatenate(ids), np.concatenate(scores)
+                order = np.lexsort((ids, -scores))[:MAX_MATCHES]
+                matches = [(self._contracts[int(ids[i])], float(scores[i])) for i in order]
+            self._match_cache[user_id] = (key, matches)
+            return matches[:limit]
+
+    def candidates_for(self, contract_id, limit=MAX_MATCHES):
+        """Best-placed farmers to supply a contract: [(user_id, score), ...], or None if not open."""
+        with self._lock:
+            contract = self._contracts.get(contract_id)
+            if not contract:
+                return None
+            crop = contract["crop"]
+            farmer_ids = np.array(sorted(self._farmers_by_crop.get(crop, ())), dtype=np.int64)
+            if not len(farmer_ids):
+                return []
+            stats = np.array([self._farmers[u][crop] for u in farmer_ids], dtype=np.float64)
+        scores = score_matches(stats[:, 0], stats[:, 1], stats[:, 2], crop, np.full(len(farmer_ids), contract["quantity"]))
+        order = np.lexsort((farmer_ids, -scores))[:limit]
+        return [(int(farmer_ids[i]), float(scores[i])) for i in order]
+
+
+contract_matcher = ContractMatcher()
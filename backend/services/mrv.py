@@ -0,0 +1,441 @@
+"""
+Batch MRV (measurement, reporting, verification) for carbon projects.
+
+Every Evidence_Pending project is verified against its plot's NDVI
+history: HISTORY_YEARS of Rabi/Kharif seasons form the baseline and the
+last MONITORED_SEASONS seasons are compared with it. Credits scale with
+the NDVI uplift; additionality is the share of farmers in the district
+already running the same practice. Histories are fetched for a whole
+chunk of plots at once (one Earth Engine reduceRegions per group, or the
+digital twin simulator when Earth Engine is unavailable), so the same
+inputs always give the same result.
+
+Progress is stored in mrv_runs after every chunk; an interrupted run
+resumes from its cursor with the same as_of date.
+
+    python -m backend.services.mrv                  # start (or resume) a run
+    python -m backend.services.mrv --source simulator --as-of 2025-12-01
+"""
+import os
+import warnings
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select, update, func, bindparam
+
+from .simulator import digital_twin, plot_centroids, parse_coordinates
+from .providers import provider_registry, EARTH_ENGINE
+from .earth_engine import earth_engine_service
+from .trust import record_event, CARBON_VERIFIED
+from .portfolio import refresh_summary
+from . import ledger
+
+# Sequestration potential at full uplift, tons CO2e per acre
+METHODOLOGY_RATES = {"Cover-Crop": 0.8, "No-Till": 1.2, "Agroforestry": 2.5}
+
+HISTORY_YEARS = 3
+MONITORED_SEASONS = 2 # the most recent Rabi + Kharif
+# (month, day) windows of the two cropping seasons; Kharif NDVI peaks Aug-Oct, Rabi Jan-Mar
+SEASONS = (((1, 1), (3, 31)), ((8, 1), (10, 31)))
+
+FULL_UPLIFT = 0.10 # NDVI gain over baseline that earns the full methodology rate
+MIN_UPLIFT = 0.02 # below this there is no measurable practice change
+ADDITIONALITY_THRESHOLD = 0.5 # practice already used by more than half the district
+MIN_EVIDENCE = 2 # soil sample reports required for soil-based methodologies
+MIN_SEASON_COVERAGE = 0.5 # share of seasons that need a cloud-free composite
+VESTING_DAYS = 5 * 365
+
+CHUNK_SIZE = int(os.getenv("MRV_CHUNK_SIZE", "500"))
+EE_BATCH_SIZE = 200 # plots per reduceRegions call
+NDVI_SOURCE = os.getenv("MRV_NDVI_SOURCE", "earth_engine") # earth_engine | simulator
+
+class ConcurrentVerificationError(Exception):
+    """A project in the chunk was verified by someone else in the meantime."""
+
+
+# Run outcomes per project
+VERIFIED = "Verified"
+REJECTED = "Audit_Failed"
+ADOPTED_STATUSES = (VERIFIED, "Issued") # counted as established practice for additionality
+
+
+def season_windows(as_of, history_years=HISTORY_YEARS):
+    """
+    (start, end) of the last (history_years x 2 + MONITORED_SEASONS) seasons
+    that ended on or before as_of, oldest first.
+    """
+    needed = history_years * len(SEASONS) + MONITORED_SEASONS
+    windows = []
+    year = as_of.year
+    while len(windows) < needed:
+        for (sm, sd), (em, ed) in reversed(SEASONS):
+            end = date(year, em, ed)
+            if end <= as_of and len(windows) < needed:
+                windows.append((date(year, sm, sd), end))
+        year -= 1
+    return windows[::-1]
+
+
+# --- NDVI sources ---
+
+class SimulatedNDVISource:
+    """Deterministic NDVI histories from the digital twin (per-plot level, trend and season noise)."""
+    name = "Digital Twin Simulation"
+
+    def histories(self, rings, lats, lngs, seasons):
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        u = digital_twin.uniforms(digital_twin.location_seeds(lats, lngs), 2)
+        level = 0.3 + u[:, 0] * 0.3
+        trend = -0.02 + u[:, 1] * 0.08 # NDVI change per year
+        first = seasons[0][1].toordinal()
+        years = np.array([(end.toordinal() - first) / 365.0 for _, end in seasons])
+        noise = np.column_stack([
+            digital_twin.uniforms(digital_twin.location_seeds(lats, lngs, salt=end.toordinal()), 1)[:, 0]
+            for _, end in seasons
+        ])
+        return np.round(np.clip(level[:, None] + trend[:, None] * years + (noise - 0.5) * 0.04, 0.0, 1.0), 4)
+
+
+def _s2_ndvi(image):
+    return image.normalizedDifference(['B8', 'B4']).rename('NDVI')
+
+
+class EarthEngineNDVISource:
+    """
+    Seasonal Sentinel-2 NDVI composites. Each group of EE_BATCH_SIZE plots
+    is one job: the season medians are stacked as bands of one image and
+    reduced over all plot polygons in a single reduceRegions call.
+    """
+    name = "Google Earth Engine (Sentinel-2)"
+
+    def __init__(self, service=earth_engine_service, batch_size=EE_BATCH_SIZE):
+        self.service = service
+        self.batch_size = batch_size
+
+    def histories(self, rings, lats, lngs, seasons):
+        if not self.service.initialize():
+            raise RuntimeError("Earth Engine not initialized")
+        ee = self.service.ee
+
+        out = np.full((len(rings), len(seasons)), np.nan)
+        for i in range(0, len(rings), self.batch_size):
+            features = ee.FeatureCollection([
+                ee.Feature(ee.Geometry.Polygon([ring]), {"row": row})
+                for row, ring in enumerate(rings[i:i + self.batch_size], start=i)
+            ])
+            bands = [
+                ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
+                .filterBounds(features)
+                .filterDate(start.isoformat(), (end + timedelta(days=1)).isoformat())
+                .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20))
+                .map(_s2_ndvi)
+                .median()
+                .rename(f"s{k}")
+                for k, (start, end) in enumerate(seasons)
+            ]
+            with provider_registry.track(EARTH_ENGINE):
+                result = ee.Image.cat(bands).reduceRegions(
+                    collection=features, reducer=ee.Reducer.mean(), scale=10
+                ).getInfo()
+            for feature in result["features"]:
+                props = feature["properties"]
+                for k in range(len(seasons)):
+                    value = props.get(f"s{k}")
+                    if value is not None:
+                        out[props["row"], k] = value
+        return out
+
+
+simulated_source = SimulatedNDVISource()
+
+SOURCES = {
+    "earth_engine": EarthEngineNDVISource,
+    "simulator": SimulatedNDVISource,
+}
+
+
+def fetch_histories(source, rings, lats, lngs, seasons):
+    """(histories, source name). Falls back to the simulator if Earth Engine fails or its circuit is open."""
+    try:
+        return source.histories(rings, lats, lngs, seasons), source.name
+    except Exception as e:
+        if isinstance(source, SimulatedNDVISource):
+            raise
+        print(f"[MRV] {source.name} unavailable ({e}), using simulation")
+        return simulated_source.histories(rings, lats, lngs, seasons), simulated_source.name
+
+
+# --- Scoring ---
+
+def assess(histories, areas, rates, adoption, buffer_pct, evidence_counts, requires_soil):
+    """
+    Vectorised MRV decision for a chunk of projects.
+
+    Returns a dict of arrays: baseline/current NDVI, credits, locked and
+    available credits, and outcome (VERIFIED, REJECTED or None to leave
+    the project pending).
+    """
+    histories = np.asarray(histories, dtype=np.float64)
+    baseline_part = histories[:, :-MONITORED_SEASONS]
+    current_part = histories[:, -MONITORED_SEASONS:]
+    observed = ~np.isnan(histories)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning) # all-NaN rows (no imagery)
+        baseline = np.nanmean(baseline_part, axis=1)
+        current = np.nanmean(current_part, axis=1)
+    enough_imagery = (
+        (observed[:, :-MONITORED_SEASONS].mean(axis=1) >= MIN_SEASON_COVERAGE)
+        & observed[:, -MONITORED_SEASONS:].any(axis=1)
+    )
+    enough_evidence = ~np.asarray(requires_soil, dtype=bool) | (np.asarray(evidence_counts) >= MIN_EVIDENCE)
+
+    uplift = np.where(enough_imagery, current - baseline, 0.0)
+    credits = np.round(np.asarray(areas) * np.asarray(rates) * np.clip(uplift / FULL_UPLIFT, 0.0, 1.0), 4)
+    locked = np.round(credits * np.asarray(buffer_pct) / 100.0, 4)
+
+    additional = np.asarray(adoption) <= ADDITIONALITY_THRESHOLD
+    passed = additional & (uplift >= MIN_UPLIFT)
+    outcome = np.where(passed, VERIFIED, REJECTED).astype(object)
+    outcome[~(enough_imagery & enough_evidence)] = None
+    credits = np.where(outcome == VERIFIED, credits, 0.0)
+    locked = np.where(outcome == VERIFIED, locked, 0.0)
+    return {
+        "baseline": baseline, "current": current, "outcome": outcome,
+        "credits": credits, "locked": locked, "available": np.round(credits - locked, 4),
+    }
+
+
+def district_adoption(db, district_methods):
+    """
+    Share of farmers in each district whose projects with a methodology are
+    already verified: {(district, methodology): rate}.
+    """
+    from ..models import User, CarbonProject
+
+    districts = {d for d, _ in district_methods}
+    farmers = dict(db.execute(
+        select(User.district, func.count(User.id)).where(User.district.in_(districts)).group_by(User.district)
+    ).all())
+    adopters = db.execute(
+        select(User.district, CarbonProject.methodology, func.count(func.distinct(CarbonProject.user_id)))
+        .join(User, User.id == CarbonProject.user_id)
+        .where(User.district.in_(districts), CarbonProject.status.in_(ADOPTED_STATUSES))
+        .group_by(User.district, CarbonProject.methodology)
+    ).all()
+    rates = {key: 0.0 for key in district_methods}
+    for district, methodology, count in adopters:
+        if (district, methodology) in rates and farmers.get(district):
+            rates[(district, methodology)] = count / farmers[district]
+    return rates
+
+
+# --- Runs ---
+
+def _pending(db, after_id, limit, project_ids=None):
+    from ..models import CarbonProject, CarbonEvidence, Plot, User
+
+    evidence_count = (
+        select(func.count(CarbonEvidence.id))
+        .where(CarbonEvidence.project_id == CarbonProject.id)
+        .correlate(CarbonProject)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(CarbonProject.id, CarbonProject.user_id, CarbonProject.plot_id, CarbonProject.methodology,
+               CarbonProject.buffer_pool_percentage, CarbonProject.requires_soil_sample, CarbonProject.start_date,
+               CarbonProject.vesting_end_date,
+               Plot.area, Plot.coordinates, User.district, evidence_count)
+        .join(Plot, Plot.id == CarbonProject.plot_id)
+        .join(User, User.id == CarbonProject.user_id)
+        .where(CarbonProject.status == "Evidence_Pending", CarbonProject.id > after_id)
+        .order_by(CarbonProject.id)
+        .limit(limit)
+    )
+    if project_ids is not None:
+        stmt = stmt.where(CarbonProject.id.in_(project_ids))
+    return db.execute(stmt).all()
+
+
+def _ring(coords):
+    """[{lat, lng}, ...] -> closed [[lng, lat], ...] ring for Earth Engine."""
+    ring = [[c['lng'], c['lat']] for c in coords]
+    if ring and ring[0] != ring[-1]:
+        ring.append(ring[0])
+    return ring
+
+
+def process_chunk(db, rows, as_of, source, run_id=None):
+    """
+    Verifies one chunk of pending project rows: statuses are written with
+    one executemany UPDATE (guarded on Evidence_Pending) and credits are
+    posted to the ledger. Caller commits. Returns {outcome: count}.
+    """
+    from ..models import CarbonProject, Plot
+
+    coords = [parse_coordinates(r.coordinates) for r in rows] # bad plots stay unlocated (pending)
+    lats, lngs = plot_centroids(coords)
+    located = ~np.isnan(lats)
+    seasons = season_windows(as_of)
+    histories = np.full((len(rows), len(seasons)), np.nan)
+    if located.any():
+        idx = np.flatnonzero(located)
+        fetched, _ = fetch_histories(source, [_ring(coords[i]) for i in idx], lats[idx], lngs[idx], seasons)
+        histories[idx] = fetched
+
+    adoption = district_adoption(db, {(r.district, r.methodology) for r in rows})
+    result = assess(
+        histories,
+        areas=[r.area or 0.0 for r in rows],
+        rates=[METHODOLOGY_RATES.get(r.methodology, 0.0) for r in rows],
+        adoption=[adoption[(r.district, r.methodology)] for r in rows],
+        buffer_pct=[r.buffer_pool_percentage or 0.0 for r in rows],
+        evidence_counts=[r[-1] for r in rows],
+        requires_soil=[r.requires_soil_sample for r in rows],
+    )
+
+    def _num(x):
+        return None if np.isnan(x) else round(float(x), 4)
+
+    project_updates, plot_ids, entries = [], [], []
+    verified_by_user, touched_users = {}, set()
+    reference = f"mrv_run:{run_id}" if run_id else "mrv"
+    for i, row in enumerate(rows):
+        outcome = result["outcome"][i]
+        if outcome is None:
+            continue
+        touched_users.add(row.user_id)
+        update_row = {
+            "project_id": row.id,
+            "status": outcome,
+            "additionality_score": round(adoption[(row.district, row.methodology)], 4),
+            "baseline_ndvi": _num(result["baseline"][i]),
+            "current_ndvi": _num(result["current"][i]),
+            "vesting_end_date": (
+                (row.start_date or datetime.utcnow()) + timedelta(days=VESTING_DAYS)
+                if outcome == VERIFIED else row.vesting_end_date
+            ),
+            "mrv_run_id": run_id,
+        }
+        project_updates.append(update_row)
+        if outcome == VERIFIED:
+            verified_by_user[row.user_id] = verified_by_user.get(row.user_id, 0) + 1
+            plot_ids.append(row.plot_id)
+            entries.append(ledger.issuance(row.user_id, row.id, result["credits"][i], reference))
+            if result["locked"][i] > 0:
+                entries.append(ledger.buffer_lock(row.user_id, row.id, result["locked"][i], reference))
+
+    table = CarbonProject.__table__
+    if project_updates:
+        updated = db.execute(
+            update(table)
+            .where(table.c.id == bindparam("project_id"), table.c.status == "Evidence_Pending")
+            .values(**{k: bindparam(k) for k in project_updates[0] if k != "project_id"}),
+            project_updates,
+        ).rowcount
+        if updated != len(project_updates):
+            raise ConcurrentVerificationError(f"{len(project_updates) - updated} project(s) already verified")
+    ledger.post(db, entries)
+    if plot_ids:
+        db.execute(update(Plot).where(Plot.id.in_(plot_ids)).values(organic_score=100.0)
+                   .execution_options(synchronize_session=False))
+    for user_id, count in verified_by_user.items():
+        record_event(db, user_id, CARBON_VERIFIED, count=count)
+    for user_id in touched_users:
+        refresh_summary(db, user_id)
+
+    counts = {VERIFIED: 0, REJECTED: 0, None: 0}
+    for outcome in result["outcome"]:
+        counts[outcome] += 1
+    return counts
+
+
+def verify_projects(db, project_ids, as_of=None, source=None):
+    """Runs MRV for specific projects inline (used by the single-project endpoint). Caller commits."""
+    rows = _pending(db, 0, len(project_ids), project_ids)
+    if not rows:
+        return {VERIFIED: 0, REJECTED: 0, None: 0}
+    return process_chunk(db, rows, as_of or date.today(), source or SOURCES[NDVI_SOURCE]())
+
+
+def run_batch(db, as_of=None, source_name=None, chunk_size=CHUNK_SIZE, resume=True, max_chunks=None):
+    """
+    Verifies every Evidence_Pending project in id order, CHUNK_SIZE at a
+    time, committing results and run progress together after each chunk.
+    With resume=True an unfinished (interrupted or failed) run is continued
+    from its cursor, with its original as_of and source, instead of
+    starting a new one.
+    Returns the MRVRun row.
+    """
+    from ..models import MRVRun, CarbonProject
+
+    run = None
+    if resume:
+        run = db.execute(
+            select(MRVRun).where(MRVRun.status.in_(("running", "failed"))).order_by(MRVRun.id.desc()).limit(1)
+        ).scalar()
+    if run is None:
+        run = MRVRun(
+            as_of=as_of or date.today(),
+            source=source_name or NDVI_SOURCE,
+            status="running",
+            total=db.scalar(select(func.count(CarbonProject.id)).where(CarbonProject.status == "Evidence_Pending")),
+        )
+        db.add(run)
+        db.commit()
+    else:
+        run.status, run.error = "running", None
+        print(f"[MRV] Resuming run {run.id} after project {run.last_project_id} ({run.processed}/{run.total})")
+
+    source = SOURCES[run.source]()
+    chunks = 0
+    try:
+        while max_chunks is None or chunks < max_chunks:
+            rows = _pending(db, run.last_project_id, chunk_size)
+            if not rows:
+                run.status = "completed"
+                run.finished_at = datetime.utcnow()
+                break
+            counts = process_chunk(db, rows, run.as_of, source, run.id)
+            run.processed += len(rows)
+            run.verified += counts[VERIFIED]
+            run.rejected += counts[REJECTED]
+            run.skipped += counts[None]
+            run.last_project_id = rows[-1].id
+            run.updated_at = datetime.utcnow()
+            db.commit()
+            chunks += 1
+            print(f"[MRV] Run {run.id}: {run.processed}/{run.total} projects "
+                  f"({run.verified} verified, {run.rejected} rejected, {run.skipped} pending)")
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        run.status = "failed"
+        run.error = str(e)
+        run.updated_at = datetime.utcnow()
+        db.commit()
+        raise
+    return run
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from ..database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Batch MRV verification of pending carbon projects")
+    parser.add_argument("--source", choices=sorted(SOURCES), default=None)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--new", action="store_true", help="start a new run instead of resuming an unfinished one")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        started = time.perf_counter()
+        run = run_batch(session, as_of=args.as_of, source_name=args.source,
+                        chunk_size=args.chunk_size, resume=not args.new)
+        print(f"[MRV] Run {run.id} {run.status}: {run.verified} verified, {run.rejected} rejected, "
+              f"{run.skipped} pending in {time.perf_counter() - started:.1f}s")
+    finally:
+        session.close()
@@ -0,0 +1,277 @@
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# OTP lifetime and abuse limits (per phone number)
+OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", "300"))
+MAX_VERIFY_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+SEND_COOLDOWN_SECONDS = int(os.getenv("OTP_SEND_COOLDOWN", "30")) # min gap between two sends
+SEND_WINDOW_SECONDS = int(os.getenv("OTP_SEND_WINDOW", "3600"))
+MAX_SENDS_PER_WINDOW = int(os.getenv("OTP_MAX_SENDS", "5"))
+
+# Fixed code for the demo build; set OTP_DEMO_CODE="" to generate random codes
+DEMO_CODE = os.getenv("OTP_DEMO_CODE", "1234")
+
+# Outcomes of OTPStore.check()
+VALID = "valid"
+INVALID = "invalid"
+EXPIRED = "expired"
+LOCKED = "locked"
+
+
+class OTPThrottledError(Exception):
+    """Raised when a phone asks for OTPs faster than the send limits allow."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many OTP requests, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _retry_after(now, last_sent_at, window_start, send_count):
+    """Seconds until another send is allowed, or 0 if it is allowed now."""
+    wait = 0
+    if last_sent_at is not None:
+        wait = max(wait, last_sent_at + SEND_COOLDOWN_SECONDS - now)
+    if window_start is not None and now - window_start < SEND_WINDOW_SECONDS and send_count >= MAX_SENDS_PER_WINDOW:
+        wait = max(wait, window_start + SEND_WINDOW_SECONDS - now)
+    return int(wait + 0.999) if wait > 0 else 0
+
+
+def _check_code(stored_code, expires_at, attempts, otp, now):
+    """Shared verification rules. Returns (outcome, new_attempts)."""
+    if stored_code is None:
+        return INVALID, attempts
+    if attempts >= MAX_VERIFY_ATTEMPTS:
+        return LOCKED, attempts
+    if now >= expires_at:
+        return EXPIRED, attempts
+    if hmac.compare_digest(stored_code, otp):
+        return VALID, attempts
+    return INVALID, attempts + 1
+
+
+class MemoryOTPStore:
+    """Process-local store. Fine for a single worker and for tests."""
+
+    def __init__(self):
+        self._entries = {} # phone -> dict(code, expires_at, attempts, last_sent_at, window_start, send_count)
+        self._lock = threading.Lock()
+
+    def issue(self, phone, code, now):
+        with self._lock:
+            entry = self._entries.get(phone) or {"window_start": None, "send_count": 0, "last_sent_at": None}
+            wait = _retry_after(now, entry["last_sent_at"], entry["window_start"], entry["send_count"])
+            if wait:
+                raise OTPThrottledError(wait)
+            if entry["window_start"] is None or now - entry["window_start"] >= SEND_WINDOW_SECONDS:
+                entry["window_start"], entry["send_count"] = now, 0
+            entry.update(code=code, expires_at=now + OTP_TTL_SECONDS, attempts=0,
+                         last_sent_at=now, send_count=entry["send_count"] + 1)
+            self._entries[phone] = entry
+            self._purge(now)
+
+    def check(self, phone, otp, now):
+        with self._lock:
+            entry = self._entries.get(phone)
+            if entry is None:
+                return INVALID
+            outcome, entry["attempts"] = _check_code(entry.get("code"), entry.get("expires_at", 0),
+                                                     entry.get("attempts", 0), otp, now)
+            if outcome in (VALID, EXPIRED):
+                entry["code"] = None # single use; throttle counters are kept
+            return outcome
+
+    def _purge(self, now):
+        stale = [p for p, e in self._entries.items()
+                 if now >= e["expires_at"] and now - e["window_start"] >= SEND_WINDOW_SECONDS]
+        for phone in stale:
+            del self._entries[phone]
+
+
+class SQLiteOTPStore:
+    """
+    File-backed store shared by every worker process on the host. Each
+    operation runs in a BEGIN IMMEDIATE transaction so read-modify-write
+    cycles from concurrent workers serialise on SQLite's write lock.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS otp_codes (
+            phone TEXT PRIMARY KEY,
+            code TEXT,
+            expires_at REAL NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_sent_at REAL,
+            window_start REAL,
+            send_count INTEGER NOT NULL DEFAULT 0
+        )
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("OTP_STORE_PATH", "./otp_store.db")
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(self.SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def issue(self, phone, code, now):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT last_sent_at, window_start, send_count FROM otp_codes WHERE phone = ?", (phone,)
+            ).fetchone()
+            last_sent_at, window_start, send_count = row or (None, None, 0)
+            wait = _retry_after(now, last_sent_at, window_start, send_count)
+            if wait:
+                raise OTPThrottledError(wait)
+            if window_start is None or now - window_start >= SEND_WINDOW_SECONDS:
+                window_start, send_count = now, 0
+            conn.execute(
+                """INSERT OR REPLACE INTO otp_codes
+                   (phone, code, expires_at, attempts, last_sent_at, window_start, send_count)
+                   VALUES (?, ?, ?, 0, ?, ?, ?)""",
+                (phone, code, now + OTP_TTL_SECONDS, now, window_start, send_count + 1),
+            )
+            conn.execute("DELETE FROM otp_codes WHERE expires_at <= ? AND window_start <= ?",
+                         (now, now - SEND_WINDOW_SECONDS))
+
+    def check(self, phone, otp, now):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT code, expires_at, attempts FROM otp_codes WHERE phone = ?", (phone,)
+            ).fetchone()
+            if row is None:
+                return INVALID
+            outcome, attempts = _check_code(row[0], row[1], row[2], otp, now)
+            code = None if outcome in (VALID, EXPIRED) else row[0]
+            conn.execute("UPDATE otp_codes SET code = ?, attempts = ? WHERE phone = ?", (code, attempts, phone))
+            return outcome
+
+
+class RedisOTPStore:
+    """
+    Redis-backed store for multi-host deployments. Issue and check run as
+    Lua scripts so each is atomic on the server; keys expire on their own.
+    """
+
+    # KEYS: code hash, send-throttle hash. ARGV: code, now, ttl, cooldown, window, max_sends
+    ISSUE_SCRIPT = """
+        local last = tonumber(redis.call('HGET', KEYS[2], 'last_sent_at'))
+        local start = tonumber(redis.call('HGET', KEYS[2], 'window_start'))
+        local count = tonumber(redis.call('HGET', KEYS[2], 'send_count') or '0')
+        local now, cooldown, window, max_sends = tonumber(ARGV[2]), tonumber(ARGV[4]), tonumber(ARGV[5]), tonumber(ARGV[6])
+        local wait = 0
+        if last and last + cooldown > now then wait = last + cooldown - now end
+        if start and now - start < window and count >= max_sends then
+            wait = math.max(wait, start + window - now)
+        end
+        if wait > 0 then return tostring(wait) end
+        if (not start) or now - start >= window then start = now; count = 0 end
+        redis.call('HSET', KEYS[2], 'last_sent_at', now, 'window_start', start, 'send_count', count + 1)
+        redis.call('EXPIRE', KEYS[2], window)
+        redis.call('HSET', KEYS[1], 'code', ARGV[1], 'attempts', 0)
+        redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+        return '0'
+    """
+
+    # KEYS: code hash. ARGV: otp, max_attempts
+    CHECK_SCRIPT = """
+        local code = redis.call('HGET', KEYS[1], 'code')
+        if not code then return 'invalid' end
+        local attempts = tonumber(redis.call('HGET', KEYS[1], 'attempts') or '0')
+        if attempts >= tonumber(ARGV[2]) then return 'locked' end
+        if code == ARGV[1] then
+            redis.call('DEL', KEYS[1])
+            return 'valid'
+        end
+        redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+        return 'invalid'
+    """
+
+    def __init__(self, url=None):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("OTP_STORE=redis requires the 'redis' package (pip install redis)")
+        self.client = redis.Redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        self._issue = self.client.register_script(self.ISSUE_SCRIPT)
+        self._check = self.client.register_script(self.CHECK_SCRIPT)
+
+    def issue(self, phone, code, now):
+        wait = float(self._issue(
+            keys=[f"otp:code:{phone}", f"otp:sends:{phone}"],
+            args=[code, now, OTP_TTL_SECONDS, SEND_COOLDOWN_SECONDS, SEND_WINDOW_SECONDS, MAX_SENDS_PER_WINDOW],
+        ))
+        if wait > 0:
+            raise OTPThrottledError(int(wait + 0.999))
+
+    def check(self, phone, otp, now):
+        # Expired codes are simply gone (Redis TTL), so they read as invalid
+        outcome = self._check(keys=[f"otp:code:{phone}"], args=[otp, MAX_VERIFY_ATTEMPTS])
+        return outcome.decode() if isinstance(outcome, bytes) else outcome
+
+
+STORES = {
+    "memory": MemoryOTPStore,
+    "sqlite": SQLiteOTPStore,
+    "redis": RedisOTPStore,
+}
+
+
+def create_store(kind=None):
+    kind = (kind or os.getenv("OTP_STORE", "memory")).lower()
+    if kind not in STORES:
+        raise ValueError(f"Unknown OTP_STORE '{kind}', expected one of {', '.join(STORES)}")
+    return STORES[kind]()
+
+
+class OTPService:
+    """Issues and verifies one-time login codes against a pluggable store."""
+
+    def __init__(self, store=None, clock=time.time):
+        self._store = store
+        self.clock = clock
+
+    @property
+    def store(self):
+        # Created lazily so OTP_STORE can be set after import (tests, scripts)
+        if self._store is None:
+            self._store = create_store()
+        return self._store
+
+    def generate_code(self):
+        return DEMO_CODE or f"{secrets.randbelow(10000):04d}"
+
+    def send(self, phone):
+        """Stores a fresh code for the phone and returns it. Raises OTPThrottledError."""
+        code = self.generate_code()
+        self.store.issue(phone, code, self.clock())
+        return code
+
+    def verify(self, phone, otp):
+        """Returns VALID, INVALID, EXPIRED or LOCKED. A valid code is consumed."""
+        return self.store.check(phone, otp, self.clock())
+
+
+otp_service = OTPService()
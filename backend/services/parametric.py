@@ -0,0 +1,199 @@
+"""
+Parametric insurance triggers over the local weather archive.
+
+For every plot the archive cell's rainfall over the last WINDOW_DAYS is
+compared with the same window in previous years, and days above
+HEAT_TEMP_C are counted. All plots are evaluated together with NumPy and
+the per-farmer result is stored in parametric_payouts, so
+/api/finance/status is a single indexed lookup.
+
+    python -m backend.services.parametric --ingest --years 5     # fetch archive, then evaluate
+    python -m backend.services.parametric --replay archive.json  # evaluate from a recorded file
+"""
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select, insert, delete
+
+from .simulator import plot_centroids, parse_coordinates
+from .weather_archive import GRID_SIZE
+
+WINDOW_DAYS = int(os.getenv("PAYOUT_WINDOW_DAYS", "30"))
+NORMAL_YEARS = 5 # previous years averaged into the "normal" rainfall
+DEFICIT_TRIGGER = 0.4 # pays out at >= 40% below normal rainfall
+MIN_NORMAL_MM = 20.0 # ignore deficits in windows that are normally dry anyway
+HEAT_TEMP_C = 40.0
+HEAT_DAYS_TRIGGER = 5
+MIN_COVERAGE = 0.8 # share of window days that must be in the archive
+
+RAINFALL_DEFICIT = "rainfall_deficit"
+HEAT_STRESS = "heat_stress"
+
+
+def _years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError: # 29 Feb
+        return day.replace(year=day.year - years, day=28)
+
+
+def _cell_keys(lats, lngs):
+    """Integer key per archive cell, identical for plot centroids and cell centres."""
+    i = np.floor(np.asarray(lats) / GRID_SIZE).astype(np.int64)
+    j = np.floor(np.asarray(lngs) / GRID_SIZE).astype(np.int64)
+    return i * 100_000 + j
+
+
+def cell_indicators(db, cell_keys, as_of, window_days=WINDOW_DAYS, normal_years=NORMAL_YEARS):
+    """
+    Rainfall, normal rainfall and heat days per cell (aligned with cell_keys).
+    Cells without enough archive coverage get NaN rainfall.
+    """
+    from ..models import WeatherDaily
+
+    n = len(cell_keys)
+    position = {int(k): idx for idx, k in enumerate(cell_keys)}
+    earliest = _years_before(as_of, normal_years) - timedelta(days=window_days)
+    rows = db.execute(
+        select(WeatherDaily.cell_lat, WeatherDaily.cell_lng, WeatherDaily.date,
+               WeatherDaily.precipitation_mm, WeatherDaily.temperature_max)
+        .where(WeatherDaily.date > earliest, WeatherDaily.date <= as_of)
+    ).all()
+
+    if rows:
+        lat, lng, day, rain, tmax = zip(*rows)
+        keys = _cell_keys(lat, lng)
+        idx = np.array([position.get(int(k), -1) for k in keys], dtype=np.int64)
+        ordinal = np.array([d.toordinal() for d in day], dtype=np.int64)
+        rain = np.array([np.nan if r is None else r for r in rain], dtype=np.float64)
+        tmax = np.array([np.nan if t is None else t for t in tmax], dtype=np.float64)
+        known = (idx >= 0) & ~np.isnan(rain)
+        idx, ordinal, rain, tmax = idx[known], ordinal[known], rain[known], tmax[known]
+    else:
+        idx = ordinal = np.zeros(0, dtype=np.int64)
+        rain = tmax = np.zeros(0)
+
+    # Window sums for this year (y=0) and each previous year, via bincount per year
+    sums = np.full((normal_years + 1, n), np.nan)
+    heat_days = np.zeros(n, dtype=np.int64)
+    for y in range(normal_years + 1):
+        end = _years_before(as_of, y).toordinal()
+        in_window = (ordinal > end - window_days) & (ordinal <= end)
+        days = np.bincount(idx[in_window], minlength=n)
+        total = np.bincount(idx[in_window], weights=rain[in_window], minlength=n)
+        covered = days >= MIN_COVERAGE * window_days
+        sums[y, covered] = total[covered]
+        if y == 0:
+            hot = in_window & (tmax >= HEAT_TEMP_C)
+            heat_days = np.bincount(idx[hot], minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        previous = sums[1:]
+        has_normal = (~np.isnan(previous)).any(axis=0)
+        normal = np.full(n, np.nan)
+        normal[has_normal] = np.nanmean(previous[:, has_normal], axis=0)
+        deficit = np.where(normal >= MIN_NORMAL_MM, (normal - sums[0]) / normal, np.nan)
+
+    return {"rainfall": sums[0], "normal": normal, "deficit": deficit, "heat_days": heat_days}
+
+
+def evaluate_payouts(db, as_of=None, window_days=WINDOW_DAYS):
+    """Evaluates triggers for every plot and rewrites parametric_payouts. Returns rows written."""
+    from ..models import Plot, ParametricPayout
+
+    as_of = as_of or date.today()
+    plots = db.execute(select(Plot.user_id, Plot.coordinates).where(Plot.user_id.is_not(None))).all()
+    user_ids = np.array([p[0] for p in plots], dtype=np.int64)
+    lats, lngs = plot_centroids([parse_coordinates(p[1]) for p in plots])
+    located = ~np.isnan(lats)
+    user_ids, lats, lngs = user_ids[located], lats[located], lngs[located]
+
+    cells, plot_cell = np.unique(_cell_keys(lats, lngs), return_inverse=True)
+    ind = cell_indicators(db, cells, as_of, window_days)
+
+    # Per plot
+    rainfall = ind["rainfall"][plot_cell]
+    deficit = ind["deficit"][plot_cell]
+    heat_days = ind["heat_days"][plot_cell]
+    with np.errstate(invalid="ignore"):
+        drought = deficit >= DEFICIT_TRIGGER
+    heat = heat_days >= HEAT_DAYS_TRIGGER
+
+    # Per farmer: any plot triggers; report the driest plot
+    users, owner = np.unique(user_ids, return_inverse=True)
+    any_drought = np.zeros(len(users), dtype=bool)
+    any_heat = np.zeros(len(users), dtype=bool)
+    max_heat = np.zeros(len(users), dtype=np.int64)
+    plot_count = np.bincount(owner, minlength=len(users))
+    np.logical_or.at(any_drought, owner, drought)
+    np.logical_or.at(any_heat, owner, heat)
+    np.maximum.at(max_heat, owner, heat_days)
+    severity = np.where(np.isnan(deficit), -np.inf, deficit)
+    order = np.lexsort((-severity, owner))
+    _, first = np.unique(owner[order], return_index=True)
+    worst = order[first]
+
+    window_start = as_of - timedelta(days=window_days - 1)
+    now = datetime.utcnow()
+
+    def _num(x):
+        return None if np.isnan(x) else round(float(x), 2)
+
+    rows = [
+        {
+            "user_id": int(users[u]),
+            "window_start": window_start,
+            "window_end": as_of,
+            "rainfall_mm": _num(rainfall[worst[u]]),
+            "normal_rainfall_mm": _num(ind["normal"][plot_cell[worst[u]]]),
+            "deficit_pct": _num(deficit[worst[u]] * 100),
+            "heat_days": int(max_heat[u]),
+            "plots_evaluated": int(plot_count[u]),
+            "payout_eligible": bool(any_drought[u] or any_heat[u]),
+            "trigger": RAINFALL_DEFICIT if any_drought[u] else HEAT_STRESS if any_heat[u] else None,
+            "evaluated_at": now,
+        }
+        for u in range(len(users))
+    ]
+
+    db.execute(delete(ParametricPayout))
+    for i in range(0, len(rows), 10_000):
+        db.execute(insert(ParametricPayout), rows[i:i + 10_000])
+    db.commit()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from ..database import SessionLocal
+    from . import weather_archive
+
+    parser = argparse.ArgumentParser(description="Ingest weather history and evaluate parametric payouts")
+    parser.add_argument("--ingest", action="store_true", help="fetch history for all plot cells from Open-Meteo")
+    parser.add_argument("--years", type=int, default=NORMAL_YEARS, help="years of history to fetch")
+    parser.add_argument("--record", help="save fetched archive payloads to this file")
+    parser.add_argument("--replay", help="ingest archive payloads from a recorded file instead of the API")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        started = time.perf_counter()
+        as_of = args.as_of or date.today() - timedelta(days=5) # archive lags a few days
+        payloads = None
+        if args.replay:
+            payloads = weather_archive.load_archive_file(args.replay)
+        elif args.ingest:
+            cells = weather_archive.plot_cells(session)
+            start = _years_before(as_of, args.years) - timedelta(days=WINDOW_DAYS)
+            payloads = weather_archive.fetch_archive(cells, start, as_of)
+            if args.record:
+                weather_archive.save_archive_file(args.record, payloads)
+        if payloads:
+            print(f"[Parametric] Ingested {weather_archive.ingest(session, payloads)} daily rows")
+        count = evaluate_payouts(session, as_of=as_of)
+        print(f"[Parametric] Evaluated {count} farmers in {time.perf_counter() - started:.1f}s")
+    finally:
+        session.close()
@@ -0,0 +1,65 @@
+"""
+Per-farmer carbon portfolio totals.
+
+carbon_portfolio_summaries holds one row per farmer. Project counts are
+refreshed by refresh_summary() inside the transaction that changes a
+project (enrolment, verification); credit balances are maintained by the
+carbon ledger (services/ledger.py). Reading the totals is a single
+indexed lookup instead of an aggregate over every project.
+"""
+import os
+from datetime import datetime
+
+from sqlalchemy import select, func, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# Market price per credit (tCO2e), matches the Carbon Vault screen
+CREDIT_PRICE_INR = float(os.getenv("CARBON_CREDIT_PRICE_INR", "1200"))
+
+COUNT_FIELDS = ("project_count", "verified_project_count", "projected_credits")
+BALANCE_FIELDS = ("verified_credits", "available_credits", "locked_credits") # ledger-maintained
+SUMMARY_FIELDS = COUNT_FIELDS + BALANCE_FIELDS
+
+
+def refresh_summary(db, user_id):
+    """Recomputes one farmer's project counts and upserts the row. Caller commits."""
+    from ..models import CarbonProject, CarbonPortfolioSummary
+
+    totals = db.execute(
+        select(
+            func.count(CarbonProject.id),
+            func.sum(case((CarbonProject.status == "Verified", 1), else_=0)),
+            func.sum(CarbonProject.projected_sequestration),
+        ).where(CarbonProject.user_id == user_id)
+    ).one()
+    values = {field: value or 0 for field, value in zip(COUNT_FIELDS, totals)}
+    values["updated_at"] = datetime.utcnow()
+
+    stmt = sqlite_insert(CarbonPortfolioSummary).values(user_id=user_id, **values)
+    db.execute(stmt.on_conflict_do_update(index_elements=["user_id"], set_=values))
+    return values
+
+
+def summary_for(db, user_id):
+    """The stored totals for a farmer, built on first use for farmers enrolled before the table existed."""
+    from ..models import CarbonPortfolioSummary
+
+    row = db.execute(
+        select(*[getattr(CarbonPortfolioSummary, f) for f in SUMMARY_FIELDS])
+        .where(CarbonPortfolioSummary.user_id == user_id)
+    ).first()
+    if row is None:
+        values = refresh_summary(db, user_id)
+        db.commit()
+        return {**{f: 0.0 for f in BALANCE_FIELDS}, **{f: values[f] for f in COUNT_FIELDS}}
+    return dict(zip(SUMMARY_FIELDS, row))
+
+
+def portfolio_totals(summary, price=CREDIT_PRICE_INR):
+    """Adds the INR value of the farmer's credits at the current price."""
+    return {
+        **summary,
+        "price_per_credit_inr": price,
+        "verified_value_inr": round(summary["verified_credits"] * price, 2),
+        "available_value_inr": round(summary["available_credits"] * price, 2),
+    }
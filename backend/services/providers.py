@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Circuit breaker defaults (per provider)
+FAILURE_THRESHOLD = 5 # consecutive failures before the circuit opens
+RECOVERY_TIMEOUT = 30.0 # seconds to wait before letting a probe request through
+WINDOW_SIZE = 100 # rolling window of recent calls used for latency / error rate
+
+# External backends we track
+EARTH_ENGINE = "earth_engine"
+GEMINI = "gemini"
+OPEN_METEO = "open_meteo"
+AGROMONITORING = "agromonitoring"
+BIGDATACLOUD = "bigdatacloud"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is attempted while the provider's circuit is open."""
+
+    def __init__(self, provider):
+        super().__init__(f"Circuit open for provider '{provider}'")
+        self.provider = provider
+
+
+class ProviderHealth:
+    """
+    Rolling health stats + circuit breaker for a single external provider.
+
+    closed    -> calls flow normally, consecutive failures are counted
+    open      -> calls are rejected immediately until the recovery timeout passes
+    half_open -> a single probe call is allowed; success closes, failure re-opens
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, recovery_timeout=RECOVERY_TIMEOUT, window=WINDOW_SIZE):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.total_calls = 0
+        self.total_failures = 0
+        self.rejected_calls = 0
+        self._probe_in_flight = False
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def is_available(self):
+        """Side-effect free check: would a call be let through right now?"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at < self.recovery_timeout:
+                return False
+            return not self._probe_in_flight
+
+    def release(self):
+        """Frees the half-open probe slot without recording an outcome (e.g. cancelled call)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self, latency):
+        with self._lock:
+            self._record(latency, ok=True)
+            self.consecutive_failures = 0
+            self.state = "closed"
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self, latency):
+        with self._lock:
+            self._record(latency, ok=False)
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"[Providers] Circuit OPEN for {self.name} after {self.consecutive_failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def _record(self, latency, ok):
+        self.total_calls += 1
+        self._latencies.append(latency)
+        self._outcomes.append(ok)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            outcomes = list(self._outcomes)
+            retry_in = None
+            if self.state == "open":
+                retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+            return {
+                "state": self.state,
+                "calls": self.total_calls,
+                "failures": self.total_failures,
+                "rejected": self.rejected_calls,
+                "consecutive_failures": self.consecutive_failures,
+                "error_rate": round(outcomes.count(False) / len(outcomes), 3) if outcomes else 0.0,
+                "latency_ms_p50": _percentile_ms(latencies, 0.50),
+                "latency_ms_p95": _percentile_ms(latencies, 0.95),
+                "retry_in_s": round(retry_in, 1) if retry_in is not None else None,
+            }
+
+
+def _percentile_ms(sorted_values, q):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return round(sorted_values[idx] * 1000, 1)
+
+
+class _Call:
+    """Handle yielded by ProviderRegistry.track() to flag soft failures."""
+
+    def __init__(self):
+        self.failed = False
+
+    def fail(self):
+        self.failed = True
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self._providers = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def get(self, name):
+        with self._lock:
+            if name not in self._providers:
+                self._providers[name] = ProviderHealth(name)
+            return self._providers[name]
+
+    def available(self, name):
+        """True if a call to this provider may be attempted right now."""
+        return self.get(name).is_available()
+
+    def add_listener(self, callback):
+        """callback(provider, latency_seconds, ok) is invoked after every tracked call."""
+        self._listeners.append(callback)
+
+    @contextmanager
+    def track(self, name):
+        """
+        Wraps a provider call. Raises CircuitOpenError without calling the
+        provider while its circuit is open. Exceptions count as failures;
+        call.fail() marks a soft failure (e.g. an error payload).
+
+            with provider_registry.track(GEMINI) as call:
+                ...
+        """
+        provider = self.get(name)
+        if not provider.allow_request():
+            raise CircuitOpenError(name)
+
+        call = _Call()
+        started = time.perf_counter()
+        try:
+            yield call
+        except Exception:
+            self._finish(provider, time.perf_counter() - started, ok=False)
+            raise
+        except BaseException:
+            provider.release()
+            raise
+        self._finish(provider, time.perf_counter() - started, ok=not call.failed)
+
+    def _finish(self, provider, latency, ok):
+        if ok:
+            provider.record_success(latency)
+        else:
+            provider.record_failure(latency)
+        for callback in self._listeners:
+            callback(provider.name, latency, ok)
+
+    def snapshot(self):
+        with self._lock:
+            providers = list(self._providers.values())
+        return {p.name: p.snapshot() for p in providers}
+
+    def reset(self):
+        with self._lock:
+            self._providers.clear()
+
+
+provider_registry = ProviderRegistry()
@@ -1,4 +1,4 @@
-import random
+from .simulator import digital_twin
 
 def get_simulated_satellite_data(lat: float, lng: float):
     """
@@ -6,28 +6,21 @@ def get_simulated_satellite_data(lat: float, lng: float):
     In a real app, this would call ESA Sentinel-2 or USGS Landsat APIs.
     """
     
-    # Deterministic simulation based on coordinates to return consistent results for same location
-    random.seed(lat + lng)
+    # Deterministic simulation based on coordinates to return consistent results for same location.
+    # Uses a per-location stream, so concurrent requests don't disturb each other.
+    sim = digital_twin.simulate_points([lat], [lng])
     
-    ndvi = round(random.uniform(0.1, 0.9), 2)
-    soil_moisture = round(random.uniform(10, 60), 1) # %
-    temperature = round(random.uniform(20, 35), 1) # Celsius
-    
-    # Analyze the simulated data
-    if ndvi > 0.6:
-        stress_level = "Low"
-        analysis = "Vegetation is healthy. High biomass density."
-    elif ndvi > 0.3:
-        stress_level = "Medium"
-        analysis = "Moderate vegetation health. Potential mild stress."
-    else:
-        stress_level = "High"
-        analysis = "Low vegetation index. Critical stress or bare soil detected."
-        
     return {
-        "ndvi": ndvi,
-        "soil_moisture": soil_moisture,
-        "temperature": temperature,
-        "stress_level": stress_level,
-        "satellite_analysis": analysis
+        "ndvi": float(sim["ndvi"][0]),
+        "soil_moisture": float(sim["soil_moisture"][0]), # %
+        "temperature": float(sim["temperature"][0]), # Celsius
+        "stress_level": sim["stress_level"][0],
+        "satellite_analysis": sim["satellite_analysis"][0]
     }
+
+def get_simulated_satellite_batch(lats, lngs):
+    """
+    Vectorized variant of get_simulated_satellite_data for many points at once.
+    Returns a dict of NumPy arrays (see DigitalTwinSimulator.simulate_points).
+    """
+    return digital_twin.simulate_points(lats, lngs)
@@ -0,0 +1,152 @@
+import json
+
+import numpy as np
+from datetime import datetime
+
+# Coordinates are quantised to ~11m before seeding so the same plot/point always
+# lands on the same stream regardless of float noise in the request.
+COORD_SCALE = 10000
+
+STRESS_LEVELS = np.array(["Low", "Medium", "High"], dtype=object)
+STRESS_ANALYSIS = np.array([
+    "Vegetation is healthy. High biomass density.",
+    "Moderate vegetation health. Potential mild stress.",
+    "Low vegetation index. Critical stress or bare soil detected.",
+], dtype=object)
+
+# Base health by crop (matches the old per-plot simulation)
+CROP_BASE_HEALTH = {"cotton": 0.65, "wheat": 0.85}
+DEFAULT_BASE_HEALTH = 0.75
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _splitmix64(x):
+    """Stateless 64-bit mixer (SplitMix64 finaliser) applied element-wise."""
+    z = x + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX_1
+    z = (z ^ (z >> np.uint64(27))) * _MIX_2
+    return z ^ (z >> np.uint64(31))
+
+
+class DigitalTwinSimulator:
+    """
+    Deterministic, thread-safe simulation of satellite indicators.
+
+    Every location gets its own random stream derived from its quantised
+    coordinates (plus an optional salt such as the day of year). Draws are
+    produced by a counter-based hash rather than the global `random` module,
+    so concurrent requests never share state and whole arrays of points can
+    be simulated in one call.
+    """
+
+    def location_seeds(self, lats, lngs, salt=0):
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        lat_q = np.rint(lats * COORD_SCALE).astype(np.int64).astype(np.uint64)
+        lng_q = np.rint(lngs * COORD_SCALE).astype(np.int64).astype(np.uint64)
+        salt = np.asarray(salt, dtype=np.int64).astype(np.uint64)
+        with np.errstate(over="ignore"):
+            return _splitmix64(_splitmix64(_splitmix64(lat_q) ^ lng_q) ^ salt)
+
+    def uniforms(self, seeds, n):
+        """Returns an array of shape (len(seeds), n) of uniforms in [0, 1)."""
+        seeds = np.asarray(seeds, dtype=np.uint64).reshape(-1, 1)
+        counters = np.arange(1, n + 1, dtype=np.uint64).reshape(1, -1)
+        with np.errstate(over="ignore"):
+            bits = _splitmix64(seeds ^ (counters * _GOLDEN))
+        return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+    def rng(self, lat, lng, salt=0):
+        """A NumPy Generator seeded for a single location (for ad-hoc streams)."""
+        seed = int(self.location_seeds([lat], [lng], salt)[0])
+        return np.random.default_rng(seed)
+
+    def simulate_points(self, lats, lngs):
+        """
+        Simulates NDVI, soil moisture and temperature for arrays of points.
+        Stable for a location across calls (no day component).
+        """
+        u = self.uniforms(self.location_seeds(lats, lngs), 3)
+
+        ndvi = np.round(0.1 + u[:, 0] * 0.8, 2)
+        soil_moisture = np.round(10 + u[:, 1] * 50, 1)
+        temperature = np.round(20 + u[:, 2] * 15, 1)
+
+        # 0 = Low, 1 = Medium, 2 = High stress
+        stress_code = np.where(ndvi > 0.6, 0, np.where(ndvi > 0.3, 1, 2))
+
+        return {
+            "ndvi": ndvi,
+            "soil_moisture": soil_moisture,
+            "temperature": temperature,
+            "stress_code": stress_code,
+            "stress_level": STRESS_LEVELS[stress_code],
+            "satellite_analysis": STRESS_ANALYSIS[stress_code],
+        }
+
+    def simulate_plots(self, lats, lngs, crop_types=None, day_of_year=None):
+        """
+        Simulates health score and moisture for arrays of plot centroids.
+        Stable for a plot within a day, drifting slightly day to day.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        if day_of_year is None:
+            day_of_year = datetime.now().timetuple().tm_yday
+
+        u = self.uniforms(self.location_seeds(lats, lngs, salt=day_of_year), 2)
+
+        base_health = np.full(lats.shape[0], DEFAULT_BASE_HEALTH)
+        if crop_types is not None:
+            base_health = np.array([_base_health(c) for c in crop_types], dtype=np.float64)
+
+        health_score = np.clip(base_health + (u[:, 0] * 0.3 - 0.15), 0.1, 0.99)
+        moisture = 20 + u[:, 1] * 40
+
+        return {
+            "health_score": health_score,
+            "moisture": moisture,
+        }
+
+
+def _base_health(crop_type):
+    if not crop_type:
+        return DEFAULT_BASE_HEALTH
+    crop = crop_type.lower()
+    for name, health in CROP_BASE_HEALTH.items():
+        if name in crop:
+            return health
+    return DEFAULT_BASE_HEALTH
+
+
+def plot_centroids(coordinate_lists):
+    """
+    Centroids for a list of plots, each a list of {lat, lng} dicts.
+    Plots without coordinates get NaN so callers can mask them out.
+    """
+    lats = np.full(len(coordinate_lists), np.nan)
+    lngs = np.full(len(coordinate_lists), np.nan)
+    for i, coords in enumerate(coordinate_lists):
+        if coords:
+            lats[i] = sum(c['lat'] for c in coords) / len(coords)
+            lngs[i] = sum(c['lng'] for c in coords) / len(coords)
+    return lats, lngs
+
+
+def parse_coordinates(raw):
+    """
+    Plot.coordinates JSON -> [{lat, lng}, ...] as floats. Malformed JSON or the
+    wrong shape (anything but a list of lat/lng objects) is a plot without a
+    location ([]), so one bad row never fails a batch over many plots.
+    """
+    if not raw:
+        return []
+    try:
+        return [{"lat": float(c["lat"]), "lng": float(c["lng"])} for c in json.loads(raw)]
+    except (ValueError, TypeError, KeyError):
+        return []
+
+
+digital_twin = DigitalTwinSimulator()
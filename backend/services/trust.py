@@ -0,0 +1,156 @@
+"""
+Trust score engine.
+
+score = BASE_SCORE + profile points + sum(event weight x event count),
+clamped to [MIN_SCORE, MAX_SCORE].
+
+Routers apply event deltas as a single atomic UPDATE inside their own
+transaction, so a score never needs the user's full history to change.
+rebuild_scores() recomputes every score from the source tables in one
+streaming pass and is the source of truth if the two ever drift (e.g.
+after the weights change).
+"""
+import numpy as np
+from sqlalchemy import select, update, func, case, bindparam
+
+BASE_SCORE = 500 # matches the User.trust_score column default
+MIN_SCORE = 300
+MAX_SCORE = 900
+
+# Events and their score deltas
+CONTRACT_SIGNED = "contract_signed"
+CONTRACT_FULFILLED = "contract_fulfilled"
+LISTING_VERIFIED = "listing_verified"
+CARBON_VERIFIED = "carbon_verified"
+
+EVENT_WEIGHTS = {
+    CONTRACT_SIGNED: 20,
+    CONTRACT_FULFILLED: 40,
+    LISTING_VERIFIED: 5,
+    CARBON_VERIFIED: 50,
+}
+
+# Points per completed profile field
+PROFILE_FIELD_POINTS = 15
+PROFILE_FIELDS = ("name", "district", "land_size", "crops")
+
+REBUILD_CHUNK_SIZE = 50_000
+
+
+def _clamped(expr):
+    return func.min(MAX_SCORE, func.max(MIN_SCORE, expr))
+
+
+def apply_delta(db, user_id, delta):
+    """Atomically adds delta to a user's score (clamped). Caller commits."""
+    from ..models import User
+
+    if not delta:
+        return
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(trust_score=_clamped(func.coalesce(User.trust_score, BASE_SCORE) + delta))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def record_event(db, user_id, event, count=1):
+    apply_delta(db, user_id, EVENT_WEIGHTS[event] * count)
+
+
+def profile_points(profile):
+    """profile: a User or a dict of its fields."""
+    get = profile.get if isinstance(profile, dict) else lambda f: getattr(profile, f, None)
+    return PROFILE_FIELD_POINTS * sum(1 for field in PROFILE_FIELDS if get(field))
+
+
+def profile_snapshot(user):
+    return {field: getattr(user, field) for field in PROFILE_FIELDS}
+
+
+def record_profile_change(db, user_id, before, after):
+    """before/after: profile_snapshot() dicts taken around an update."""
+    apply_delta(db, user_id, profile_points(after) - profile_points(before))
+
+
+def compute_scores(profile_pts, contracts_signed, contracts_fulfilled, listings_verified, carbon_verified):
+    """Vectorised score formula over equal-length arrays (one entry per user)."""
+    raw = (
+        BASE_SCORE
+        + np.asarray(profile_pts)
+        + EVENT_WEIGHTS[CONTRACT_SIGNED] * np.asarray(contracts_signed)
+        + EVENT_WEIGHTS[CONTRACT_FULFILLED] * np.asarray(contracts_fulfilled)
+        + EVENT_WEIGHTS[LISTING_VERIFIED] * np.asarray(listings_verified)
+        + EVENT_WEIGHTS[CARBON_VERIFIED] * np.asarray(carbon_verified)
+    )
+    return np.clip(raw, MIN_SCORE, MAX_SCORE).astype(np.int64)
+
+
+def _counts_by_user(db, stmt, lo, hi, user_col):
+    rows = db.execute(stmt.where(user_col.between(lo, hi)).group_by(user_col)).all()
+    return {row[0]: row[1:] for row in rows}
+
+
+def rebuild_scores(db, chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Recomputes every user's score from scratch. Users are walked in id
+    order; for each chunk the activity tables are aggregated over the same
+    id range (GROUP BY user), scored with NumPy and written back with one
+    executemany UPDATE. Returns the number of users rescored.
+    """
+    from ..models import User, Contract, Listing, CarbonProject
+
+    contracts = select(
+        Contract.farmer_id,
+        func.count(),
+        func.sum(case((Contract.status == "Fulfilled", 1), else_=0)),
+    ).where(Contract.status.in_(("Signed", "Fulfilled")))
+    listings = select(Listing.seller_id, func.count()).where(Listing.verified_by.isnot(None))
+    carbon = select(CarbonProject.user_id, func.count()).where(CarbonProject.status == "Verified")
+
+    score_update = (
+        update(User.__table__)
+        .where(User.__table__.c.id == bindparam("user_id"))
+        .values(trust_score=bindparam("score"))
+    )
+
+    total, last_id = 0, 0
+    while True:
+        users = db.execute(
+            select(User.id, *[getattr(User, f) for f in PROFILE_FIELDS])
+            .where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).all()
+        if not users:
+            break
+        lo, hi = users[0][0], users[-1][0]
+        signed = _counts_by_user(db, contracts, lo, hi, Contract.farmer_id)
+        listed = _counts_by_user(db, listings, lo, hi, Listing.seller_id)
+        verified = _counts_by_user(db, carbon, lo, hi, CarbonProject.user_id)
+
+        ids = [u[0] for u in users]
+        scores = compute_scores(
+            [PROFILE_FIELD_POINTS * sum(1 for v in u[1:] if v) for u in users],
+            [signed.get(i, (0, 0))[0] for i in ids],
+            [signed.get(i, (0, 0))[1] or 0 for i in ids],
+            [listed.get(i, (0,))[0] for i in ids],
+            [verified.get(i, (0,))[0] for i in ids],
+        )
+        db.execute(score_update, [{"user_id": i, "score": int(s)} for i, s in zip(ids, scores)])
+        db.commit()
+        total += len(ids)
+        last_id = hi
+    return total
+
+
+if __name__ == "__main__":
+    import time
+    from ..database import SessionLocal
+
+    session = SessionLocal()
+    started = time.perf_counter()
+    try:
+        count = rebuild_scores(session)
+    finally:
+        session.close()
+    print(f"[Trust] Rebuilt {count} trust scores in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,76 @@
+"""
+Background warm-up of slow dependencies.
+
+Heavy SDKs (Gemini, Earth Engine) are imported lazily so the API starts
+fast; at startup this runs their one-time initialization on a daemon
+thread, so the first real request does not pay for it either. /ready
+reports the state of every task.
+"""
+import threading
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+FINISHED = (READY, FAILED, SKIPPED)
+
+
+class SkipWarmup(Exception):
+    """Raised by a task that has nothing to do (e.g. no credentials configured)."""
+
+
+class Warmup:
+    def __init__(self):
+        self._tasks = {} # name -> fn
+        self._state = {} # name -> {"state", "seconds", "detail"}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.started_at = None
+
+    def register(self, name, fn):
+        with self._lock:
+            self._tasks[name] = fn
+            self._state[name] = {"state": PENDING, "seconds": None, "detail": None}
+
+    def _set(self, name, **values):
+        with self._lock:
+            self._state[name].update(values)
+
+    def run(self):
+        """Runs every task in order (the background thread calls this)."""
+        for name, fn in list(self._tasks.items()):
+            self._set(name, state=RUNNING)
+            started = time.perf_counter()
+            try:
+                result = fn()
+                state, detail = (READY, None) if result is not False else (FAILED, "initialization failed")
+            except SkipWarmup as e:
+                state, detail = SKIPPED, str(e)
+            except Exception as e:
+                state, detail = FAILED, str(e)
+                print(f"[Warmup] {name} failed: {e}")
+            self._set(name, state=state, seconds=round(time.perf_counter() - started, 3), detail=detail)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self._thread
+            self.started_at = time.monotonic()
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def snapshot(self):
+        with self._lock:
+            tasks = {name: dict(state) for name, state in self._state.items()}
+        return {"complete": all(t["state"] in FINISHED for t in tasks.values()), "tasks": tasks}
+
+
+warmup = Warmup()
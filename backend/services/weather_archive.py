@@ -0,0 +1,119 @@
+import json
+import os
+from datetime import date
+
+import httpx
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .providers import provider_registry, OPEN_METEO
+
+ARCHIVE_URL = os.getenv("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+DAILY_VARIABLES = ("precipitation_sum", "temperature_2m_max")
+
+# Archive grid in degrees (~28km, close to the ERA5 reanalysis resolution)
+GRID_SIZE = 0.25
+# Open-Meteo accepts several comma-separated coordinates per request
+CELLS_PER_REQUEST = 50
+TIMEOUT = 60.0
+
+
+def grid_cells(lats, lngs):
+    """Snaps coordinates to the centre of their archive grid cell (vectorised)."""
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    half = GRID_SIZE / 2
+    cell_lat = np.round(np.floor(lats / GRID_SIZE) * GRID_SIZE + half, 4)
+    cell_lng = np.round(np.floor(lngs / GRID_SIZE) * GRID_SIZE + half, 4)
+    return cell_lat, cell_lng
+
+
+def fetch_archive(cells, start, end, client=None):
+    """
+    Downloads daily history for [(cell_lat, cell_lng), ...] from the
+    Open-Meteo archive API, CELLS_PER_REQUEST cells per call. Returns one
+    payload per cell, each tagged with the requested cell coordinates (the
+    API answers with its own snapped model coordinates).
+    """
+    cells = list(cells)
+    own_client = client is None
+    client = client or httpx.Client(timeout=TIMEOUT)
+    payloads = []
+    try:
+        for i in range(0, len(cells), CELLS_PER_REQUEST):
+            batch = cells[i:i + CELLS_PER_REQUEST]
+            params = {
+                "latitude": ",".join(f"{lat:.4f}" for lat, _ in batch),
+                "longitude": ",".join(f"{lng:.4f}" for _, lng in batch),
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "daily": ",".join(DAILY_VARIABLES),
+                "timezone": "Asia/Kolkata",
+            }
+            with provider_registry.track(OPEN_METEO) as call:
+                response = client.get(ARCHIVE_URL, params=params)
+                if response.status_code >= 500:
+                    call.fail()
+                response.raise_for_status()
+            data = response.json()
+            results = data if isinstance(data, list) else [data]
+            for (lat, lng), result in zip(batch, results):
+                payloads.append({"cell_lat": lat, "cell_lng": lng, "daily": result["daily"]})
+            print(f"[WeatherArchive] Fetched {min(i + CELLS_PER_REQUEST, len(cells))}/{len(cells)} cells")
+    finally:
+        if own_client:
+            client.close()
+    return payloads
+
+
+def save_archive_file(path, payloads):
+    """Records fetched payloads so later runs (and tests) can replay them offline."""
+    with open(path, "w") as f:
+        json.dump(payloads, f)
+
+
+def load_archive_file(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def ingest(db, payloads):
+    """Upserts payloads into weather_daily. Returns the number of day rows written."""
+    from ..models import WeatherDaily
+
+    rows = []
+    for payload in payloads:
+        daily = payload["daily"]
+        for day, rain, tmax in zip(daily["time"], daily["precipitation_sum"], daily["temperature_2m_max"]):
+            rows.append({
+                "cell_lat": payload["cell_lat"],
+                "cell_lng": payload["cell_lng"],
+                "date": date.fromisoformat(day),
+                "precipitation_mm": rain,
+                "temperature_max": tmax,
+            })
+    if not rows:
+        return 0
+
+    stmt = sqlite_insert(WeatherDaily)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["cell_lat", "cell_lng", "date"],
+        set_={"precipitation_mm": stmt.excluded.precipitation_mm, "temperature_max": stmt.excluded.temperature_max},
+    )
+    for i in range(0, len(rows), 10_000):
+        db.execute(stmt, rows[i:i + 10_000])
+    db.commit()
+    return len(rows)
+
+
+def plot_cells(db):
+    """Distinct archive cells covering every plot with coordinates."""
+    from ..models import Plot
+    from .simulator import plot_centroids, parse_coordinates
+
+    coords = [parse_coordinates(c) for (c,) in db.execute(select(Plot.coordinates))]
+    lats, lngs = plot_centroids(coords)
+    valid = ~np.isnan(lats)
+    cell_lat, cell_lng = grid_cells(lats[valid], lngs[valid])
+    return sorted(set(zip(cell_lat.tolist(), cell_lng.tolist())))
@@ -0,0 +1,208 @@
+import os
+import re
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from .database import engine as default_engine
+
+# Same SELECT repeated this many times in one request => likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_PROFILE_N_PLUS_ONE", "5"))
+# Statements slower than this are logged with their query plan
+SLOW_QUERY_MS = float(os.getenv("SQL_PROFILE_SLOW_MS", "100"))
+
+_current_profile = ContextVar("sql_profile", default=None)
+_global_captures = [] # profiles capturing every statement (used by tests)
+_installed_engines = set()
+_lock = threading.Lock()
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_NAMED_PARAM = re.compile(r"(%\(\w+\)s|:\w+|\$\d+)")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*(?:\?\s*,\s*)*\?\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+# EXPLAIN QUERY PLAN steps that read a whole table or build a throwaway index / sort
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+def normalize_sql(statement):
+    """Collapses literals, bind params and IN lists so repeated shapes group together."""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _NAMED_PARAM.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("IN (?)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryProfile:
+    """Statements executed during one request (or one test block)."""
+
+    def __init__(self, label=""):
+        self.label = label
+        self.statements = [] # (normalized, statement, parameters, seconds)
+        self._lock = threading.Lock()
+
+    def record(self, statement, parameters, seconds):
+        with self._lock:
+            self.statements.append((normalize_sql(statement), statement, parameters, seconds))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total_seconds(self):
+        return sum(s[3] for s in self.statements)
+
+    def grouped(self):
+        """{normalized_sql: count}, most frequent first."""
+        return dict(Counter(s[0] for s in self.statements).most_common())
+
+    def n_plus_one_suspects(self, threshold=None):
+        threshold = threshold or N_PLUS_ONE_THRESHOLD
+        return {
+            sql: n for sql, n in self.grouped().items()
+            if n >= threshold and sql.upper().startswith("SELECT")
+        }
+
+    def slow_queries(self, slow_ms=None):
+        slow_ms = SLOW_QUERY_MS if slow_ms is None else slow_ms
+        return [s for s in self.statements if s[3] * 1000 >= slow_ms]
+
+    def report(self):
+        lines = [f"[SQL] {self.label}: {self.count} statements in {self.total_seconds * 1000:.1f}ms"]
+        for sql, n in self.n_plus_one_suspects().items():
+            lines.append(f"[SQL]   possible N+1 ({n}x): {sql}")
+        return "\n".join(lines)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiler_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["profiler_query_start"].pop()
+    if conn.info.get("profiler_explaining"):
+        return
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, parameters, elapsed)
+    for capture in _global_captures:
+        capture.record(statement, parameters, elapsed)
+
+
+def install(engine=default_engine):
+    """Attaches the profiler hooks to an engine (idempotent)."""
+    with _lock:
+        if engine in _installed_engines:
+            return
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        _installed_engines.add(engine)
+
+
+def explain_query_plan(statement, parameters, engine=default_engine):
+    """Returns SQLite's EXPLAIN QUERY PLAN rows as strings (empty on other dialects)."""
+    if engine.dialect.name != "sqlite":
+        return []
+    with engine.connect() as conn:
+        conn.info["profiler_explaining"] = True
+        try:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+        finally:
+            conn.info["profiler_explaining"] = False
+    return [row[-1] for row in rows]
+
+
+def plan_regressions(plan):
+    """
+    [(table or None, step)] for the plan steps an index should have avoided:
+    full table scans, automatic (per-query) indexes and temp B-tree sorts.
+    """
+    problems = []
+    for step in plan:
+        scan = _FULL_SCAN.match(step)
+        if scan:
+            problems.append((scan.group(1), step))
+        elif "AUTOMATIC" in step:
+            problems.append((step.split()[1], step))
+        elif step.startswith("USE TEMP B-TREE FOR ORDER BY"):
+            problems.append((None, step))
+    return problems
+
+
+def log_slow_queries(profile, engine=default_engine):
+    for normalized, statement, parameters, seconds in profile.slow_queries():
+        print(f"[SQL] slow query ({seconds * 1000:.1f}ms): {normalized}")
+        try:
+            for step in explain_query_plan(statement, parameters, engine):
+                print(f"[SQL]     plan: {step}")
+        except Exception as e:
+            print(f"[SQL]     plan unavailable: {e}")
+
+
+class SQLProfilerMiddleware:
+    """
+    Opt-in (SQL_PROFILE=1) per-request statement profiler. Logs the statement
+    count, likely N+1 patterns and slow queries with their query plan, and
+    adds X-SQL-Queries / X-SQL-Time-Ms response headers.
+    """
+
+    def __init__(self, app, engine=default_engine):
+        self.app = app
+        self.engine = engine
+        install(engine)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = QueryProfile(f"{scope['method']} {scope['path']}")
+        token = _current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-queries", str(profile.count).encode()))
+                headers.append((b"x-sql-time-ms", f"{profile.total_seconds * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            if profile.count:
+                print(profile.report())
+                log_slow_queries(profile, self.engine)
+
+
+@contextmanager
+def capture_queries(engine=default_engine):
+    """Records every statement run on the engine inside the block, from any thread."""
+    install(engine)
+    profile = QueryProfile("capture")
+    _global_captures.append(profile)
+    try:
+        yield profile
+    finally:
+        _global_captures.remove(profile)
+
+
+@contextmanager
+def assert_max_queries(max_queries, engine=default_engine):
+    """
+    Test helper: fails if the block runs more than max_queries statements.
+
+        with assert_max_queries(3):
+            client.get("/api/market/")
+    """
+    with capture_queries(engine) as profile:
+        yield profile
+    if profile.count > max_queries:
+        grouped = "\n".join(f"  {n}x {sql}" for sql, n in profile.grouped().items())
+        raise AssertionError(f"Expected at most {max_queries} queries, got {profile.count}:\n{grouped}")
@@ -0,0 +1,135 @@
+"""
+Deterministic local stand-ins for the external providers, with configurable
+latency, so benchmarks measure our backend rather than Google's.
+
+    restore = install_fakes(ProviderLatency(gemini=0.8, earth_engine=1.5))
+    ...
+    restore()
+"""
+import asyncio
+import json
+import time
+import types
+from dataclasses import dataclass
+
+import httpx
+
+from backend.services.simulator import digital_twin
+
+
+@dataclass
+class ProviderLatency:
+    """Simulated response time per provider, in seconds."""
+    gemini: float = 0.5
+    earth_engine: float = 1.0
+    open_meteo: float = 0.15
+    bigdatacloud: float = 0.1
+
+
+class FakeGeminiModel:
+    latency = 0.5
+
+    def __init__(self, model_name, *args, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, *args, **kwargs):
+        # The real SDK call is blocking, so is the fake
+        time.sleep(self.latency)
+        text = prompt if isinstance(prompt, str) else str(prompt[0])
+        if "stress_level" in text:
+            body = '```json {"stress_level": "Medium", "recommendation": "Irrigate lightly and scout for pests."} ```'
+        elif "JSON array" in text:
+            body = json.dumps([{"name": "PM-KISAN", "benefits": "Rs 6000/year", "link": "https://pmkisan.gov.in/"}])
+        elif "diagnosis" in text:
+            body = json.dumps({"diagnosis": "Healthy", "confidence": 90, "summary": "No disease.", "health_score": 88, "remedies": []})
+        else:
+            body = "Soybean prices are steady in Nagpur mandi. Light rain expected this week."
+        return types.SimpleNamespace(text=body)
+
+
+def fake_earth_engine(latency):
+    def get_analysis(geometry_coords, crop_type="Mixed"):
+        time.sleep(latency)
+        lngs = [c[0] for c in geometry_coords]
+        lats = [c[1] for c in geometry_coords]
+        sim = digital_twin.simulate_plots([sum(lats) / len(lats)], [sum(lngs) / len(lngs)], [crop_type])
+        return {
+            "health_score": float(sim["health_score"][0]),
+            "moisture": float(sim["moisture"][0]),
+            "image_url": None,
+            "source": "Benchmark Fake (Earth Engine)"
+        }
+    return get_analysis
+
+
+def _forecast_payload(lat, lng):
+    sim = digital_twin.simulate_points([lat], [lng])
+    temp = float(sim["temperature"][0])
+    days = [f"2026-01-{d:02d}" for d in range(1, 8)]
+    hours = [f"{day}T{h:02d}:00" for day in days for h in range(24)]
+    return {
+        "latitude": lat,
+        "longitude": lng,
+        "utc_offset_seconds": 19800,
+        "timezone": "Asia/Kolkata",
+        "current": {"time": "2026-01-01T12:00", "temperature_2m": temp, "relative_humidity_2m": 55,
+                    "rain": 0.0, "precipitation": 0.0, "weather_code": 1, "is_day": 1,
+                    "wind_speed_10m": 7.2, "soil_temperature_0cm": temp + 2},
+        "hourly": {"time": hours, "temperature_2m": [temp] * len(hours),
+                   "weather_code": [1] * len(hours), "is_day": [1] * len(hours)},
+        "daily": {"time": days, "weather_code": [1] * 7, "temperature_2m_max": [temp + 5] * 7,
+                  "temperature_2m_min": [temp - 6] * 7, "sunrise": [f"{day}T06:10" for day in days],
+                  "sunset": [f"{day}T18:40" for day in days],
+                  "uv_index_max": [7.5] * 7, "precipitation_sum": [0.0] * 7, "wind_speed_10m_max": [12.0] * 7},
+    }
+
+
+def fake_http_transport(latency):
+    """httpx transport answering Open-Meteo and BigDataCloud URLs locally."""
+
+    async def handler(request):
+        params = request.url.params
+        if "open-meteo.com" in request.url.host and "geocoding" in request.url.host:
+            await asyncio.sleep(latency.open_meteo)
+            return httpx.Response(200, json={"results": [{"id": 1, "name": params.get("name", ""), "country": "India",
+                                                          "latitude": 21.1458, "longitude": 79.0882}]})
+        if "open-meteo.com" in request.url.host:
+            await asyncio.sleep(latency.open_meteo)
+            return httpx.Response(200, json=_forecast_payload(float(params["latitude"]), float(params["longitude"])))
+        if "bigdatacloud" in request.url.host:
+            await asyncio.sleep(latency.bigdatacloud)
+            return httpx.Response(200, json={"city": "Nagpur", "principalSubdivision": "Maharashtra"})
+        return httpx.Response(404, json={})
+
+    return httpx.MockTransport(handler)
+
+
+def install_fakes(latency=None):
+    """Patches provider entry points in-process. Returns a function that undoes it."""
+    from backend.routers import weather
+    from backend.services import gemini
+    from backend.services.earth_engine import earth_engine_service
+
+    latency = latency or ProviderLatency()
+    FakeGeminiModel.latency = latency.gemini
+    transport = fake_http_transport(latency)
+
+    class FakeAsyncClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    saved = [
+        (gemini, "model", gemini.model),
+        (earth_engine_service, "get_analysis", earth_engine_service.get_analysis),
+        (weather, "httpx", weather.httpx),
+    ]
+    gemini.model = FakeGeminiModel
+    earth_engine_service.get_analysis = fake_earth_engine(latency.earth_engine)
+    weather.httpx = types.SimpleNamespace(AsyncClient=FakeAsyncClient)
+
+    def restore():
+        for target, name, original in saved:
+            setattr(target, name, original)
+
+    return restore
@@ -0,0 +1,293 @@
+"""
+Load test / throughput benchmark for the FastAPI backend.
+
+Boots the app in-process against a freshly seeded SQLite database, swaps the
+external providers for local fakes (see fakes.py) and drives a weighted mix
+of dashboard, feed, marketplace, chat and plot-scan traffic at each
+concurrency level. Reports p50/p95/p99 latency and requests/second and
+writes a JSON baseline that later runs can be compared against.
+
+    python -m benchmarks.load_test --concurrency 1 8 32 --requests 400 --out bench_baseline.json
+    python -m benchmarks.load_test --compare bench_baseline.json
+    python -m benchmarks.load_test --scale 0.01   # on a seed_data.seed_large dataset
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Scenario name -> (weight, list of request builders). Weights mirror the
+# screens farmers open most: dashboard and feed dominate, chat/scans are rarer.
+DEFAULT_MIX = {
+    "dashboard": 35,
+    "feed": 25,
+    "marketplace": 20,
+    "chat": 10,
+    "plot_scan": 10,
+}
+
+REGRESSION_TOLERANCE = 0.20 # 20% worse p95 / throughput counts as a regression
+
+
+def _prepare_database(path):
+    """Must run before backend.database is imported."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+
+def seed(users=200, listings=500, posts=300, seed_value=42):
+    """Bulk-seeds a realistic small dataset. Returns [(user_id, phone, [plot_ids])]."""
+    from sqlalchemy import insert
+    from backend.database import Base, engine
+    from backend.models import User, Plot, Listing, CommunityPost, CommunityComment, CommunityLike, Scheme
+
+    rng = random.Random(seed_value)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    now = datetime.utcnow()
+    crops = ["Wheat", "Cotton", "Soybean", "Rice", "Orange", "Onion"]
+    districts = ["Nagpur", "Amravati", "Nashik", "Pune", "Wardha"]
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "phone": f"9{i:09d}", "name": f"Farmer {i}", "district": rng.choice(districts),
+             "land_size": round(rng.uniform(0.5, 12), 1), "crops": ",".join(rng.sample(crops, 2)), "created_at": now}
+            for i in range(1, users + 1)
+        ])
+
+        plots = []
+        for user_id in range(1, users + 1):
+            for _ in range(2):
+                lat, lng = rng.uniform(19.5, 21.5), rng.uniform(75.5, 79.5)
+                coords = [{"lat": lat, "lng": lng}, {"lat": lat + 0.002, "lng": lng},
+                          {"lat": lat + 0.002, "lng": lng + 0.002}, {"lat": lat, "lng": lng + 0.002}]
+                plots.append({"user_id": user_id, "name": f"Plot {len(plots) + 1}", "coordinates": json.dumps(coords),
+                              "area": round(rng.uniform(0.5, 6), 2), "crop_type": rng.choice(crops),
+                              "health_score": 0.8, "moisture": 30.0, "created_at": now})
+        conn.execute(insert(Plot), plots)
+
+        conn.execute(insert(Listing), [
+            {"seller_id": rng.randint(1, users), "crop_name": rng.choice(crops), "quantity": f"{rng.randint(1, 50) * 100}kg",
+             "price": f"{rng.randint(15, 60)}/kg", "location": rng.choice(districts), "description": "Fresh harvest",
+             "is_organic": rng.random() < 0.3, "grade": rng.choice("ABC"), "verified": True, "created_at": now}
+            for _ in range(listings)
+        ])
+
+        conn.execute(insert(CommunityPost), [
+            {"id": i, "user_id": rng.randint(1, users), "content": f"Field update #{i}", "likes_count": 0,
+             "created_at": now - timedelta(minutes=i)}
+            for i in range(1, posts + 1)
+        ])
+        conn.execute(insert(CommunityComment), [
+            {"post_id": rng.randint(1, posts), "user_id": rng.randint(1, users), "text": "Great work!", "created_at": now}
+            for _ in range(posts * 2)
+        ])
+        conn.execute(insert(CommunityLike), [
+            {"post_id": rng.randint(1, posts), "user_id": rng.randint(1, users)} for _ in range(posts * 5)
+        ])
+        conn.execute(insert(Scheme), [
+            {"title": f"Scheme {i}", "description": "Support for farmers", "tag": "NEW", "created_at": now}
+            for i in range(1, 21)
+        ])
+
+        rows = conn.exec_driver_sql("SELECT user_id, id FROM plots").fetchall()
+
+    plots_by_user = {}
+    for user_id, plot_id in rows:
+        plots_by_user.setdefault(user_id, []).append(plot_id)
+    return [(i, f"9{i:09d}", plots_by_user.get(i, [])) for i in range(1, users + 1)]
+
+
+def load_users(limit, seed_value=42):
+    """Samples benchmark users (with their plots) from an already seeded database."""
+    from backend.database import engine
+
+    with engine.connect() as conn:
+        total = conn.exec_driver_sql("SELECT MAX(id) FROM users").scalar() or 0
+        rng = random.Random(seed_value)
+        ids = sorted(rng.sample(range(1, total + 1), min(limit, total)))
+        users = []
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            phones = dict(conn.exec_driver_sql(f"SELECT id, phone FROM users WHERE id IN ({marks})", tuple(chunk)).fetchall())
+            plots = {}
+            for user_id, plot_id in conn.exec_driver_sql(f"SELECT user_id, id FROM plots WHERE user_id IN ({marks})", tuple(chunk)):
+                plots.setdefault(user_id, []).append(plot_id)
+            users.extend((u, phones[u], plots.get(u, [])) for u in chunk if u in phones)
+    return users
+
+
+def _scenario_requests(name, user, rng):
+    """Returns the (method, path, json) calls one scenario makes."""
+    _, _, plot_ids = user
+    lat, lng = round(rng.uniform(19.5, 21.5), 4), round(rng.uniform(75.5, 79.5), 4)
+    if name == "dashboard":
+        return [("GET", "/api/users/me", None),
+                ("GET", f"/api/weather/current?lat={lat}&lng={lng}", None),
+                ("GET", f"/api/weather/reverse?lat={lat}&lng={lng}", None),
+                ("GET", "/api/plots/", None),
+                ("POST", "/api/news/", {"district": "Nagpur", "language": "English"})]
+    if name == "feed":
+        return [("GET", "/api/community/", None)]
+    if name == "marketplace":
+        crop = rng.choice(["", "Wheat", "Cotton", "Onion"])
+        return [("GET", f"/api/market/?crop={crop}" if crop else "/api/market/", None)]
+    if name == "chat":
+        return [("POST", "/api/ai/chat", {"message": "When should I irrigate my cotton?"})]
+    if name == "plot_scan":
+        return [("GET", f"/api/plots/{rng.choice(plot_ids)}/analyze", None)] if plot_ids else []
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+async def run_level(app, users, tokens, concurrency, total_requests, mix, seed_value):
+    import httpx
+
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    latencies = {n: [] for n in names}
+    errors = {n: 0 for n in names}
+    remaining = [total_requests]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+
+        async def worker(worker_id):
+            rng = random.Random(seed_value * 1000 + worker_id)
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                scenario = rng.choices(names, weights)[0]
+                user = rng.choice(users)
+                headers = {"Authorization": f"Bearer {tokens[user[0]]}"}
+                for method, path, body in _scenario_requests(scenario, user, rng):
+                    started = time.perf_counter()
+                    try:
+                        resp = await client.request(method, path, json=body, headers=headers)
+                        if resp.status_code >= 400:
+                            errors[scenario] += 1
+                    except Exception:
+                        errors[scenario] += 1
+                    latencies[scenario].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(i) for i in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    all_latencies = np.array([v for vs in latencies.values() for v in vs])
+    return {
+        "concurrency": concurrency,
+        "requests": int(all_latencies.size),
+        "errors": sum(errors.values()),
+        "duration_s": round(elapsed, 3),
+        "rps": round(all_latencies.size / elapsed, 2),
+        **_percentiles(all_latencies),
+        "scenarios": {
+            n: {"requests": len(latencies[n]), "errors": errors[n], **_percentiles(np.array(latencies[n]))}
+            for n in names if latencies[n]
+        },
+    }
+
+
+def _percentiles(values):
+    if values.size == 0:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(values * 1000, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2)}
+
+
+def compare(current, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Returns human readable regressions of current vs baseline, per concurrency level."""
+    regressions = []
+    base_levels = {lvl["concurrency"]: lvl for lvl in baseline["levels"]}
+    for lvl in current["levels"]:
+        base = base_levels.get(lvl["concurrency"])
+        if not base:
+            continue
+        if base["p95_ms"] and lvl["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"c={lvl['concurrency']}: p95 {base['p95_ms']}ms -> {lvl['p95_ms']}ms")
+        if lvl["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"c={lvl['concurrency']}: rps {base['rps']} -> {lvl['rps']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=300, help="scenario runs per concurrency level")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--scale", type=float, default=None,
+                        help="seed with seed_data.seed_large at this scale instead of the small built-in dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help='JSON weights, e.g. \'{"feed": 1}\'')
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--gee-latency", type=float, default=1.0)
+    parser.add_argument("--weather-latency", type=float, default=0.15)
+    parser.add_argument("--geocode-latency", type=float, default=0.1)
+    parser.add_argument("--out", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against (exit 1 on regression)")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    db_dir = tempfile.mkdtemp(prefix="krishi_bench_")
+    _prepare_database(os.path.join(db_dir, "bench.db"))
+
+    from backend.auth_utils import create_access_token
+    from backend.main import app
+    from .fakes import install_fakes, ProviderLatency
+
+    if args.scale:
+        from seed_data import seed_large
+        seed_large(scale=args.scale, seed=args.seed)
+        users = load_users(args.users, seed_value=args.seed)
+    else:
+        users = seed(users=args.users, seed_value=args.seed)
+    tokens = {u[0]: create_access_token({"sub": u[1]}, expires_delta=timedelta(hours=2)) for u in users}
+    restore = install_fakes(ProviderLatency(
+        gemini=args.gemini_latency, earth_engine=args.gee_latency,
+        open_meteo=args.weather_latency, bigdatacloud=args.geocode_latency))
+
+    async def run_all():
+        async with app.router.lifespan_context(app):
+            levels = []
+            for concurrency in args.concurrency:
+                result = await run_level(app, users, tokens, concurrency, args.requests, args.mix, args.seed)
+                print(f"c={concurrency:<4} rps={result['rps']:<8} p50={result['p50_ms']}ms "
+                      f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms errors={result['errors']}")
+                levels.append(result)
+            return levels
+
+    try:
+        levels = asyncio.run(run_all())
+    finally:
+        restore()
+
+    results = {
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "levels": levels,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("REGRESSIONS:\n  " + "\n  ".join(regressions))
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Microbenchmark: per-row cost of serializing large list responses.
+
+Compares, on synthetic rows shaped like the database results:
+
+  model   - one Pydantic model per row (the old handlers), then FastAPI's
+            response_model validation + JSON dump (serialize_response)
+  dicts   - dict rows, still validated against the response_model
+  fast    - dict rows serialized directly (fast_json.rows_response path)
+
+for a flat route (GET /api/plots/) and a nested one (GET /api/community/).
+Database time is excluded on purpose; this isolates serialization.
+
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute, serialize_response
+
+from backend import fast_json
+from backend.routers.plots import PlotResponse
+from backend.routers.community import PostResponse, CommentResponse
+
+
+def plot_rows(n):
+    now = datetime(2025, 6, 1, 8, 30)
+    coords = json.dumps([{"lat": 21.1, "lng": 79.0}, {"lat": 21.1, "lng": 79.01}, {"lat": 21.11, "lng": 79.01},
+                         {"lat": 21.11, "lng": 79.0}])
+    return [(i, f"Plot {i}", coords, 2.5, "Wheat", 0.8, 31.5, now + timedelta(seconds=i)) for i in range(n)]
+
+
+def post_rows(n):
+    now = datetime(2025, 6, 1, 8, 30)
+    comments = [(j, "Sita", "Looks healthy", now) for j in range(2)]
+    return [(i, "Ramesh", "Nagpur", f"Field update #{i}", None, i % 7, now - timedelta(minutes=i), i % 3 == 0, comments)
+            for i in range(n)]
+
+
+def plots_as_models(rows):
+    return [PlotResponse(id=i, name=name, coordinates=json.loads(coords), area=area, crop_type=crop,
+                         health_score=health, moisture=moisture, created_at=created.isoformat())
+            for i, name, coords, area, crop, health, moisture, created in rows]
+
+
+def plots_as_dicts(rows):
+    return [{"id": i, "name": name,
+             "coordinates": [{"lat": float(c["lat"]), "lng": float(c["lng"])} for c in fast_json.loads(coords)],
+             "area": area, "crop_type": crop, "health_score": health, "moisture": moisture,
+             "created_at": created.isoformat(), "image_url": None, "last_scan_date": None}
+            for i, name, coords, area, crop, health, moisture, created in rows]
+
+
+def posts_as_models(rows):
+    return [PostResponse(id=i, user_name=user, user_district=district, content=content, image_url=image,
+                         likes_count=likes, comments_count=len(comments), created_at=created.isoformat(),
+                         liked_by_me=liked,
+                         comments=[CommentResponse(id=cid, user_name=cu, text=text, created_at=ct.isoformat())
+                                   for cid, cu, text, ct in comments])
+            for i, user, district, content, image, likes, created, liked, comments in rows]
+
+
+def posts_as_dicts(rows):
+    return [{"id": i, "user_name": user, "user_district": district, "content": content, "image_url": image,
+             "likes_count": likes, "comments_count": len(comments), "created_at": created.isoformat(),
+             "liked_by_me": liked,
+             "comments": [{"id": cid, "user_name": cu, "text": text, "created_at": ct.isoformat()}
+                          for cid, cu, text, ct in comments]}
+            for i, user, district, content, image, likes, created, liked, comments in rows]
+
+
+def response_field(model):
+    """The response field FastAPI builds for response_model=List[model]."""
+    app = FastAPI()
+    app.get("/", response_model=List[model])(lambda: [])
+    return next(r for r in app.routes if isinstance(r, APIRoute)).response_field
+
+
+def via_response_model(field, content):
+    return asyncio.run(serialize_response(field=field, response_content=content, dump_json=True))
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), len(body)
+
+
+def run(rows=10_000, repeat=5):
+    results = {}
+    for route, model, make_rows, as_models, as_dicts in (
+        ("GET /api/plots/", PlotResponse, plot_rows, plots_as_models, plots_as_dicts),
+        ("GET /api/community/", PostResponse, post_rows, posts_as_models, posts_as_dicts),
+    ):
+        data, field = make_rows(rows), response_field(model)
+        variants = {
+            "model": lambda: via_response_model(field, as_models(data)),
+            "dicts": lambda: via_response_model(field, as_dicts(data)),
+            "fast": lambda: fast_json.dumps(as_dicts(data)),
+        }
+        results[route] = {}
+        for name, fn in variants.items():
+            seconds, size = _time(fn, repeat)
+            results[route][name] = {"ms": seconds * 1000, "us_per_row": seconds / rows * 1e6, "bytes": size}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    print(f"{args.rows} rows, median of {args.repeat} (orjson {'on' if fast_json.orjson else 'off'})")
+    for route, variants in results.items():
+        print(f"\n{route}")
+        baseline = variants["model"]["ms"]
+        for name, r in variants.items():
+            print(f"  {name:<6} {r['ms']:9.1f} ms  {r['us_per_row']:7.2f} us/row  {baseline / r['ms']:5.1f}x  "
+                  f"{r['bytes'] / 1024:8.0f} KiB")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Cold-start benchmark for the FastAPI backend.
+
+Each run starts a fresh interpreter against an empty SQLite database and
+measures how long `import backend.main` takes (what uvicorn waits for
+before it can accept connections) and how long the background warm-up of
+Gemini / Earth Engine takes after startup (when /ready turns 200).
+Reports the median over several runs.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --importtime 15   # slowest modules by cumulative import time
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Runs inside the child interpreter; prints one JSON line
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import backend.main
+from fastapi.testclient import TestClient
+from backend.services.warmup import warmup
+imported = time.perf_counter() - started
+heavy = [m for m in ("google.generativeai", "ee") if m in sys.modules]
+with TestClient(backend.main.app) as client:
+    first = time.perf_counter()
+    client.get("/")
+    first_request = time.perf_counter() - first
+    warmup.wait()
+    ready = client.get("/ready")
+print(json.dumps({
+    "import": imported,
+    "first_request": first_request,
+    "warmup": {name: task["seconds"] for name, task in ready.json()["warmup"].items()},
+    "states": {name: task["state"] for name, task in ready.json()["warmup"].items()},
+    "ready_status": ready.status_code,
+    "heavy_modules_loaded": heavy,
+}))
+"""
+
+
+def _env(tmp, warmup):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+    env["WARMUP_ON_STARTUP"] = "1" if warmup else "0"
+    return env
+
+
+def run_once(warmup=True):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run([sys.executable, "-c", _CHILD], env=_env(tmp, warmup), capture_output=True, text=True,
+                             check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top=15):
+    """Slowest modules by cumulative import time, from `python -X importtime`."""
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import backend.main"],
+                             env=_env(tmp, False), capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative_us) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-warmup", action="store_true", help="measure with WARMUP_ON_STARTUP=0")
+    parser.add_argument("--importtime", type=int, metavar="N", help="also list the N slowest imports")
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    runs = [run_once(warmup=not args.no_warmup) for _ in range(args.runs)]
+    tasks = sorted({name for r in runs for name in r["warmup"]})
+    results = {
+        "runs": args.runs,
+        "import_s": statistics.median(r["import"] for r in runs),
+        "first_request_s": statistics.median(r["first_request"] for r in runs),
+        "warmup_s": {name: statistics.median(r["warmup"][name] or 0.0 for r in runs) for name in tasks},
+        "states": runs[-1]["states"],
+        "heavy_modules_loaded": runs[-1]["heavy_modules_loaded"],
+    }
+
+    print(f"import backend.main   {results['import_s'] * 1000:8.1f} ms (median of {args.runs})")
+    print(f"first request         {results['first_request_s'] * 1000:8.1f} ms")
+    for name in tasks:
+        print(f"warm-up {name:<14}{results['warmup_s'][name] * 1000:8.1f} ms  [{results['states'][name]}]")
+    print(f"heavy SDKs at import: {', '.join(results['heavy_modules_loaded']) or 'none'}")
+
+    if args.importtime:
+        print("\nslowest imports (cumulative):")
+        for seconds, name in import_profile(args.importtime):
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: bytes on the wire and encoding cost of GET /api/weather/current.
+
+For each response variant, from a recorded Open-Meteo forecast
+(weather_response.json):
+
+  full                 - the forecast as forwarded before fields=/format=
+  fields=current       - projection only
+  current+daily        - projection of the two sections the home screen uses
+  compact              - every section, compact columnar encoding
+  compact current      - both
+
+reports the JSON size, gzip / brotli sizes (brotli only if installed) and
+the median time to project + encode + serialize, and to compress.
+
+    python -m benchmarks.weather_payload --repeat 200
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from backend import compression, fast_json
+from backend.services import forecast
+
+SAMPLE = Path(__file__).resolve().parent.parent / "weather_response.json"
+
+VARIANTS = [
+    ("full", None, "full"),
+    ("fields=current", "current", "full"),
+    ("current+daily", "current,daily", "full"),
+    ("compact", None, "compact"),
+    ("compact current", "current", "compact"),
+]
+
+
+def render(data, fields, fmt):
+    """The handler's work after the upstream call."""
+    if fields:
+        data = forecast.project(data, forecast.parse_fields(fields))
+    if fmt == "compact":
+        data = forecast.encode_compact(data)
+    return fast_json.dumps(data)
+
+
+def _median_us(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e6
+
+
+def run(sample=SAMPLE, repeat=200):
+    data = json.loads(Path(sample).read_text())
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    results = {}
+    for name, fields, fmt in VARIANTS:
+        body = render(data, fields, fmt)
+        result = {"bytes": len(body), "encode_us": _median_us(lambda: render(data, fields, fmt), repeat)}
+        for encoding in encodings:
+            result[f"{encoding}_bytes"] = len(compression.compress(body, encoding))
+            result[f"{encoding}_us"] = _median_us(lambda: compression.compress(body, encoding), repeat)
+        results[name] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", default=str(SAMPLE), help="Open-Meteo forecast JSON to encode")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.sample, args.repeat)
+    baseline = results["full"]["bytes"]
+    print(f"median of {args.repeat} (orjson {'on' if fast_json.orjson else 'off'}, "
+          f"brotli {'on' if compression.brotli else 'off'})")
+    print(f"  {'variant':<16} {'json':>8} {'vs full':>8} {'encode':>9} {'gzip':>8} {'gzip time':>10}"
+          + (f" {'br':>8} {'br time':>9}" if compression.brotli else ""))
+    for name, r in results.items():
+        line = (f"  {name:<16} {r['bytes']:>8,} {r['bytes'] / baseline:>7.0%} {r['encode_us']:>7.0f}us "
+                f"{r['gzip_bytes']:>8,} {r['gzip_us']:>8.0f}us")
+        if "br_bytes" in r:
+            line += f" {r['br_bytes']:>8,} {r['br_us']:>7.0f}us"
+        print(line)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway database before backend.database is imported
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="krishi_test_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TEST_DB_DIR}/test.db")
+# No background Gemini / Earth Engine initialization during tests
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from backend.database import Base, engine
+    from backend.main import app
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Logs in a demo farmer with the master OTP and returns bearer headers."""
+    resp = client.post("/api/auth/verify-otp", json={"phone": "9000000001", "otp": "0000"})
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+@pytest.fixture
+def assert_max_queries():
+    """Context manager asserting an upper bound on SQL statements in a block."""
+    from backend.sql_profiler import assert_max_queries as _assert_max_queries
+    return _assert_max_queries
@@ -24,6 +24,7 @@ const CarbonVaultScreen: React.FC<CarbonVaultScreenProps> = ({ navigateTo, t })
    const [showEvidenceModal, setShowEvidenceModal] = useState(false);
    const [selectedProjectId, setSelectedProjectId] = useState<number | null>(null);
    const [evidenceDesc, setEvidenceDesc] = useState('');
+   const [evidenceFile, setEvidenceFile] = useState<File | null>(null);
 
    useEffect(() => {
       loadData();
@@ -59,18 +60,23 @@ const CarbonVaultScreen: React.FC<CarbonVaultScreenProps> = ({ navigateTo, t })
 
    const handleUploadEvidence = async () => {
       if (!selectedProjectId) return;
+      if (!evidenceFile) {
+         alert("Please select a photo to upload");
+         return;
+      }
       try {
          // Mock Geoloc
-         await carbonService.uploadEvidence(selectedProjectId, {
+         await carbonService.uploadEvidence(selectedProjectId, evidenceFile, {
             description: evidenceDesc,
             geo_lat: 21.1458,
             geo_lng: 79.0882
          });
          setShowEvidenceModal(false);
+         setEvidenceFile(null);
          alert("Evidence Uploaded! Sent for Verification.");
          loadData();
-      } catch (e) {
-         alert("Upload failed");
+      } catch (e: any) {
+         alert(e.response?.data?.detail || "Upload failed");
       }
    };
 
@@ -159,7 +165,7 @@ const CarbonVaultScreen: React.FC<CarbonVaultScreenProps> = ({ navigateTo, t })
                         <div className="space-y-3">
                            {proj.status === 'Enrolled' && (
                               <button
-                                 onClick={() => { setSelectedProjectId(proj.id); setShowEvidenceModal(true); }}
+                                 onClick={() => { setSelectedProjectId(proj.id); setEvidenceFile(null); setShowEvidenceModal(true); }}
                                  className="w-full py-3 bg-blue-600 hover:bg-blue-700 text-white rounded-xl text-xs font-bold flex items-center justify-center gap-2"
                               >
                                  <Upload size={16} /> Upload Evidence
@@ -312,10 +318,17 @@ const CarbonVaultScreen: React.FC<CarbonVaultScreenProps> = ({ navigateTo, t })
                            onChange={(e) => setEvidenceDesc(e.target.value)}
                         />
                      </div>
-                     <div className="border-2 border-dashed border-gray-200 rounded-xl p-6 flex flex-col items-center justify-center gap-2 text-gray-400 hover:bg-gray-50 hover:border-gray-300 transition-all cursor-pointer">
-                        <Upload size={24} />
-                        <span className="text-xs font-bold">Tap to Geotag & Upload Photo</span>
-                     </div>
+                     <label className={`border-2 border-dashed rounded-xl p-6 flex flex-col items-center justify-center gap-2 hover:bg-gray-50 hover:border-gray-300 transition-all cursor-pointer ${evidenceFile ? 'border-green-300 text-green-700' : 'border-gray-200 text-gray-400'}`}>
+                        {evidenceFile ? <CheckCircle2 size={24} /> : <Upload size={24} />}
+                        <span className="text-xs font-bold">{evidenceFile ? evidenceFile.name : 'Tap to Geotag & Upload Photo'}</span>
+                        <input
+                           type="file"
+                           accept="image/*"
+                           capture="environment"
+                           className="hidden"
+                           onChange={(e) => setEvidenceFile(e.target.files?.[0] ?? null)}
+                        />
+                     </label>
                   </div>
 
                   <div className="flex gap-3">
@@ -26,6 +26,8 @@ const ContractsScreen: React.FC<ContractsScreenProps> = ({ navigateTo, t }) => {
     const [loading, setLoading] = useState(true);
     const [selectedContract, setSelectedContract] = useState<any | null>(null);
     const [signing, setSigning] = useState(false);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         loadContracts();
@@ -35,8 +37,9 @@ const ContractsScreen: React.FC<ContractsScreenProps> = ({ navigateTo, t }) => {
         setLoading(true);
         try {
             const status = activeTab === 'market' ? 'Open' : 'Signed';
-            const data = await contractService.getContracts(status);
-            setContracts(data);
+            const page = await contractService.getContracts(status);
+            setContracts(page.items);
+            setNextCursor(page.nextCursor);
         } catch (e) {
             console.error(e);
         } finally {
@@ -44,6 +47,21 @@ const ContractsScreen: React.FC<ContractsScreenProps> = ({ navigateTo, t }) => {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const status = activeTab === 'market' ? 'Open' : 'Signed';
+            const page = await contractService.getContracts(status, nextCursor);
+            setContracts(prev => [...prev, ...page.items]);
+            setNextCursor(page.nextCursor);
+        } catch (e) {
+            console.error(e);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleSign = async () => {
         if (!selectedContract) return;
         setSigning(true);
@@ -130,7 +148,7 @@ const ContractsScreen: React.FC<ContractsScreenProps> = ({ navigateTo, t }) => {
                                     </div>
                                     <div>
                                         <p className="text-[9px] font-black text-gray-400 uppercase">Delivery</p>
-                                        <p className="text-sm font-black text-gray-800">{new Date(c.delivery_date).toLocaleDateString()}</p>
+                                        <p className="text-sm font-black text-gray-800">{c.delivery_date ? new Date(c.delivery_date).toLocaleDateString() : 'Flexible'}</p>
                                     </div>
                                 </div>
 
@@ -153,6 +171,15 @@ const ContractsScreen: React.FC<ContractsScreenProps> = ({ navigateTo, t }) => {
                                 )}
                             </div>
                         ))}
+                        {nextCursor && (
+                            <button
+                                onClick={loadMore}
+                                disabled={loadingMore}
+                                className="w-full py-3 bg-white text-indigo-700 rounded-xl text-xs font-black uppercase tracking-widest flex items-center justify-center gap-2 border border-gray-100"
+                            >
+                                {loadingMore ? <Loader2 size={14} className="animate-spin" /> : 'Load More'}
+                            </button>
+                        )}
                     </div>
                 )}
             </div>
@@ -1,12 +1,21 @@
 import sys
 import os
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
 
 # Add root directory to path so we can import backend modules
 sys.path.append(os.getcwd())
 
+import numpy as np
+from sqlalchemy import insert, func, select
 from sqlalchemy.orm import Session
 from backend.database import SessionLocal, engine, Base
-from backend.models import Scheme, CommunityPost, Listing, User, CommunityComment
+from backend.models import (
+    Scheme, CommunityPost, Listing, User, CommunityComment, CommunityLike,
+    Plot, ChatMessage, StressReport, Contract
+)
 
 # Create tables if they don't exist
 Base.metadata.create_all(bind=engine)
@@ -42,6 +51,7 @@ def seed_data():
                 deadline=None,
                 benefits="Financial assistance of ₹50,000 per hectare for 3 years.",
                 eligibility="Cluster of farmers required.",
+                eligibility_rules=json.dumps({"farming_types": ["Organic", "Mixed"]}),
                 link="https://pgsindia-ncof.gov.in/"
             )
         ]
@@ -161,8 +171,397 @@ def seed_data():
     else:
         print("Plots already exist.")
 
+    print("Seeding Contracts...")
+    if db.query(Contract).filter(Contract.status == "Open").count() == 0:
+        contracts = [
+            Contract(buyer_name="ITC Agribusiness", crop_type="Wheat", quantity=10, price_per_qt=2400, delivery_date=datetime(2026, 4, 15), terms="Moisture < 12%, Max 2% Foreign Matter", status="Open"),
+            Contract(buyer_name="Pepsico India", crop_type="Potato", quantity=50, price_per_qt=1800, delivery_date=datetime(2026, 3, 1), terms="Grade A Processable, Size > 45mm", status="Open"),
+            Contract(buyer_name="Reliance Fresh", crop_type="Tomato", quantity=5, price_per_qt=1500, delivery_date=datetime(2026, 2, 28), terms="Firm Red, No bruises", status="Open"),
+        ]
+        db.add_all(contracts)
+        db.commit()
+    else:
+        print("Open contracts already exist.")
+
     db.close()
     print("Seeding Complete!")
 
+# ---------------------------------------------------------------------------
+# Large-scale synthetic dataset
+#
+# Rows generated per table at --scale 1.0 (production-sized). Every table has
+# its own NumPy Generator derived from (seed, table), so a table's contents are
+# reproducible regardless of which other tables are generated.
+# ---------------------------------------------------------------------------
+
+SCALE_TARGETS = {
+    "users": 1_000_000,
+    "plots": 5_000_000,
+    "community_posts": 500_000,
+    "community_comments": 1_500_000,
+    "community_likes": 10_000_000,
+    "listings": 2_000_000,
+    "chat_messages": 5_000_000,
+    "stress_reports": 3_000_000,
+    "contracts": 50_000,
+}
+TABLE_ORDER = list(SCALE_TARGETS)
+CHUNK_SIZE = 50_000
+
+# (district, lat, lng) - centroids farms are scattered around
+DISTRICTS = [
+    ("Nagpur", 21.15, 79.09), ("Amravati", 20.93, 77.75), ("Wardha", 20.74, 78.60),
+    ("Yavatmal", 20.39, 78.12), ("Akola", 20.70, 77.00), ("Nashik", 20.00, 73.79),
+    ("Pune", 18.52, 73.86), ("Ahmednagar", 19.09, 74.74), ("Aurangabad", 19.88, 75.34),
+    ("Jalgaon", 21.00, 75.56), ("Solapur", 17.66, 75.91), ("Kolhapur", 16.70, 74.24),
+    ("Latur", 18.40, 76.56), ("Nanded", 19.14, 77.32), ("Indore", 22.72, 75.86),
+    ("Ludhiana", 30.90, 75.85), ("Guntur", 16.31, 80.44), ("Rajkot", 22.30, 70.80),
+]
+CROPS = ["Wheat", "Cotton", "Soybean", "Rice", "Sugarcane", "Orange", "Onion", "Tur", "Chana", "Maize"]
+CATEGORIES = (["General", "OBC", "SC", "ST"], [0.30, 0.45, 0.15, 0.10])
+FARMING_TYPES = (["Mixed", "Conventional", "Organic"], [0.50, 0.40, 0.10])
+FIRST_NAMES = ["Ramesh", "Sita", "Amit", "Sunita", "Vijay", "Lakshmi", "Rahul", "Kavita", "Suresh", "Anita",
+               "Ganesh", "Pooja", "Mahesh", "Rekha", "Prakash", "Meena", "Anil", "Savita", "Rajesh", "Geeta"]
+LAST_NAMES = ["Patil", "Devi", "Singh", "Deshmukh", "Jadhav", "Pawar", "Kale", "Shinde", "Yadav", "Reddy",
+              "Chavan", "More", "Gaikwad", "Sharma", "Thakur"]
+BUYERS = ["ITC Agribusiness", "Pepsico India", "Reliance Fresh", "Adani Wilmar", "Mahindra Agri", "BigBasket"]
+CHAT_TEMPLATES = [
+    "When should I irrigate my {crop}?", "What is the mandi price of {crop} today?",
+    "My {crop} leaves are turning yellow, what should I do?", "Which fertilizer is best for {crop}?",
+]
+STRESS_RECOMMENDATIONS = {
+    "Low": "Vegetation is healthy. Continue current practices.",
+    "Medium": "Mild stress detected. Check soil moisture and scout for pests.",
+    "High": "Critical stress. Irrigate immediately and consult the agronomist.",
+}
+ACRE_M2 = 4046.86
+DEG_PER_M = 1 / 111_320
+
+
+def _table_rng(seed, table):
+    return np.random.default_rng([seed, TABLE_ORDER.index(table)])
+
+
+def _home_district(user_ids):
+    """Deterministic district per user id, so plots land near their owner."""
+    return (np.asarray(user_ids, dtype=np.int64) * 2654435761 % len(DISTRICTS)).astype(int)
+
+
+def _random_polygons(rng, lats, lngs, areas):
+    """
+    Irregular 4-6 vertex polygons around each centroid whose size roughly
+    matches the plot area. Returns JSON strings in the plots.coordinates format.
+    """
+    n = len(lats)
+    radius_deg = np.sqrt(areas * ACRE_M2 / np.pi) * DEG_PER_M
+    vertices = rng.integers(4, 7, size=n)
+    coslat = np.cos(np.radians(lats))
+    out = []
+    for i in range(n):
+        k = vertices[i]
+        angles = np.sort(rng.uniform(0, 2 * np.pi, size=k))
+        r = radius_deg[i] * rng.uniform(0.75, 1.25, size=k)
+        vlat = lats[i] + r * np.sin(angles)
+        vlng = lngs[i] + r * np.cos(angles) / coslat[i]
+        out.append("[" + ", ".join(f'{{"lat": {a:.6f}, "lng": {b:.6f}}}' for a, b in zip(vlat, vlng)) + "]")
+    return out
+
+
+def _gen_users(rng, start, n, ctx):
+    ids = np.arange(start, start + n)
+    district_idx = _home_district(ids)
+    first = rng.integers(0, len(FIRST_NAMES), size=n)
+    last = rng.integers(0, len(LAST_NAMES), size=n)
+    land = np.round(rng.lognormal(mean=0.7, sigma=0.8, size=n), 2)
+    category = rng.choice(len(CATEGORIES[0]), size=n, p=CATEGORIES[1])
+    farming = rng.choice(len(FARMING_TYPES[0]), size=n, p=FARMING_TYPES[1])
+    n_crops = rng.integers(1, 4, size=n)
+    crop_idx = rng.integers(0, len(CROPS), size=(n, 3))
+    created = rng.integers(0, 3 * 365 * 24 * 3600, size=n)
+    return [{
+        "id": int(ids[i]),
+        "phone": f"7{ids[i]:09d}",
+        "name": f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]}",
+        "district": DISTRICTS[district_idx[i]][0],
+        "land_size": float(land[i]),
+        "category": CATEGORIES[0][category[i]],
+        "farming_type": FARMING_TYPES[0][farming[i]],
+        "language": "en",
+        "trust_score": 500,
+        "crops": ",".join(dict.fromkeys(CROPS[c] for c in crop_idx[i, :n_crops[i]])),
+        "created_at": ctx["epoch"] + timedelta(seconds=int(created[i])),
+    } for i in range(n)]
+
+
+def _gen_plots(rng, start, n, ctx):
+    user_ids = rng.integers(1, ctx["users"] + 1, size=n)
+    # Farms cluster around the district centroid of their owner
+    district_idx = _home_district(user_ids)
+    centers = np.array([(d[1], d[2]) for d in DISTRICTS])[district_idx]
+    lats = centers[:, 0] + rng.normal(0, 0.25, size=n)
+    lngs = centers[:, 1] + rng.normal(0, 0.25, size=n)
+    areas = np.round(np.clip(rng.lognormal(0.3, 0.7, size=n), 0.1, 50), 2)
+    polygons = _random_polygons(rng, lats, lngs, areas)
+    crops = rng.integers(0, len(CROPS), size=n)
+    health = np.round(np.clip(rng.normal(0.7, 0.12, size=n), 0.05, 0.99), 3)
+    moisture = np.round(rng.uniform(10, 60, size=n), 1)
+    scanned = rng.random(size=n) < 0.6
+    return [{
+        "id": start + i,
+        "user_id": int(user_ids[i]),
+        "name": f"Plot {start + i}",
+        "coordinates": polygons[i],
+        "area": float(areas[i]),
+        "crop_type": CROPS[crops[i]],
+        "health_score": float(health[i]),
+        "moisture": float(moisture[i]),
+        "organic_score": float(health[i] * 100),
+        "carbon_credits": 0.0,
+        "last_scan_date": ctx["now"] - timedelta(days=int(i % 30)) if scanned[i] else None,
+        "polygon_id": f"gee_{start + i}",
+        "created_at": ctx["now"] - timedelta(days=int(i % 700)),
+    } for i in range(n)]
+
+
+def _gen_community_posts(rng, start, n, ctx):
+    user_ids = rng.integers(1, ctx["users"] + 1, size=n)
+    ages = rng.integers(0, 365 * 24 * 3600, size=n)
+    crops = rng.integers(0, len(CROPS), size=n)
+    has_image = rng.random(size=n) < 0.4
+    return [{
+        "id": start + i,
+        "user_id": int(user_ids[i]),
+        "content": f"Update from my {CROPS[crops[i]].lower()} field - post #{start + i}",
+        "image_url": f"https://picsum.photos/seed/post{start + i}/800/800" if has_image[i] else None,
+        "likes_count": 0, # fixed up after likes are generated
+        "created_at": ctx["now"] - timedelta(seconds=int(ages[i])),
+    } for i in range(n)]
+
+
+def _gen_community_comments(rng, start, n, ctx):
+    post_ids = rng.integers(1, ctx["community_posts"] + 1, size=n)
+    user_ids = rng.integers(1, ctx["users"] + 1, size=n)
+    return [{
+        "id": start + i,
+        "post_id": int(post_ids[i]),
+        "user_id": int(user_ids[i]),
+        "text": "Very helpful, thanks for sharing!",
+        "created_at": ctx["now"],
+    } for i in range(n)]
+
+
+def _sorted_contains(sorted_keys, keys):
+    idx = np.minimum(np.searchsorted(sorted_keys, keys), max(len(sorted_keys) - 1, 0))
+    return (sorted_keys[idx] == keys) if len(sorted_keys) else np.zeros(len(keys), dtype=bool)
+
+
+def _gen_community_likes(rng, start, n, ctx):
+    # Skewed popularity: 30% of likes go to the top 1% of posts.
+    # like_post toggles a single row per (post, user), so pairs are unique: repeats of
+    # earlier chunks / existing rows (ctx["community_like_keys"], sorted) are dropped
+    # and topped up with fresh draws.
+    n_posts, n_users = ctx["community_posts"], ctx["users"]
+    taken = ctx.get("community_like_keys", np.empty(0, dtype=np.int64))
+    if len(taken) + n > n_posts * n_users:
+        raise ValueError(f"{n:,} more likes do not fit in {n_posts:,} posts x {n_users:,} users")
+
+    keys = np.empty(0, dtype=np.int64)
+    while len(keys) < n:
+        m = n - len(keys)
+        popular = rng.random(size=m) < 0.3
+        post_ids = np.where(
+            popular,
+            rng.integers(0, max(1, n_posts // 100), size=m) * 100 % n_posts,
+            rng.integers(0, n_posts, size=m)
+        ) + 1
+        user_ids = rng.integers(1, n_users + 1, size=m)
+        drawn = post_ids.astype(np.int64) * (n_users + 1) + user_ids
+        _, first = np.unique(drawn, return_index=True)
+        drawn = drawn[np.sort(first)] # first occurrence, in draw order
+        drawn = drawn[~_sorted_contains(taken, drawn)]
+        keys = np.concatenate([keys, drawn])
+        new = np.sort(drawn)
+        taken = np.insert(taken, np.searchsorted(taken, new), new)
+    ctx["community_like_keys"] = taken
+
+    post_ids, user_ids = np.divmod(keys, n_users + 1)
+    return [{"id": start + i, "post_id": int(post_ids[i]), "user_id": int(user_ids[i])} for i in range(n)]
+
+
+def _gen_listings(rng, start, n, ctx):
+    seller_ids = rng.integers(1, ctx["users"] + 1, size=n)
+    crops = rng.integers(0, len(CROPS), size=n)
+    qty = rng.integers(1, 100, size=n) * 100
+    price = rng.integers(15, 90, size=n)
+    district_idx = rng.integers(0, len(DISTRICTS), size=n)
+    organic = rng.random(size=n) < 0.15
+    grade = rng.choice(3, size=n, p=[0.5, 0.35, 0.15])
+    return [{
+        "id": start + i,
+        "seller_id": int(seller_ids[i]),
+        "crop_name": CROPS[crops[i]],
+        "quantity": f"{qty[i]}kg",
+        "price": f"{price[i]}/kg",
+        "location": f"{DISTRICTS[district_idx[i]][0]} Mandi",
+        "description": "Fresh harvest, cleaned and graded.",
+        "is_organic": bool(organic[i]),
+        "grade": "ABC"[grade[i]],
+        "verified": True,
+        "created_at": ctx["now"] - timedelta(hours=int(i % 2000)),
+    } for i in range(n)]
+
+
+def _gen_chat_messages(rng, start, n, ctx):
+    # Conversations come in user/model pairs
+    user_ids = np.repeat(rng.integers(1, ctx["users"] + 1, size=(n + 1) // 2), 2)[:n]
+    crops = np.repeat(rng.integers(0, len(CROPS), size=(n + 1) // 2), 2)[:n]
+    templates = np.repeat(rng.integers(0, len(CHAT_TEMPLATES), size=(n + 1) // 2), 2)[:n]
+    return [{
+        "id": start + i,
+        "user_id": int(user_ids[i]),
+        "role": "user" if (start + i) % 2 else "model",
+        "text": CHAT_TEMPLATES[templates[i]].format(crop=CROPS[crops[i]].lower()) if (start + i) % 2
+                else f"For {CROPS[crops[i]].lower()}, monitor soil moisture and follow local advisories.",
+        "timestamp": ctx["now"] - timedelta(seconds=int(n - i)),
+    } for i in range(n)]
+
+
+def _gen_stress_reports(rng, start, n, ctx):
+    user_ids = rng.integers(1, ctx["users"] + 1, size=n)
+    district_idx = rng.integers(0, len(DISTRICTS), size=n)
+    centers = np.array([(d[1], d[2]) for d in DISTRICTS])[district_idx]
+    lats = centers[:, 0] + rng.normal(0, 0.25, size=n)
+    lngs = centers[:, 1] + rng.normal(0, 0.25, size=n)
+    ndvi = np.round(rng.uniform(0.1, 0.9, size=n), 2)
+    stress = np.where(ndvi > 0.6, "Low", np.where(ndvi > 0.3, "Medium", "High"))
+    crops = rng.integers(0, len(CROPS), size=n)
+    return [{
+        "id": start + i,
+        "user_id": int(user_ids[i]),
+        "location_lat": float(lats[i]),
+        "location_lng": float(lngs[i]),
+        "crop_type": CROPS[crops[i]],
+        "ndvi_score": float(ndvi[i]),
+        "stress_level": str(stress[i]),
+        "recommendation": STRESS_RECOMMENDATIONS[stress[i]],
+        "created_at": ctx["now"] - timedelta(hours=int(i % 5000)),
+    } for i in range(n)]
+
+
+def _gen_contracts(rng, start, n, ctx):
+    crops = rng.integers(0, len(CROPS), size=n)
+    buyers = rng.integers(0, len(BUYERS), size=n)
+    signed = rng.random(size=n) < 0.4
+    farmers = rng.integers(1, ctx["users"] + 1, size=n)
+    days = rng.integers(15, 240, size=n)
+    return [{
+        "id": start + i,
+        "farmer_id": int(farmers[i]) if signed[i] else None,
+        "buyer_name": BUYERS[buyers[i]],
+        "crop_type": CROPS[crops[i]],
+        "quantity": float(rng.integers(1, 60)),
+        "price_per_qt": float(rng.integers(1200, 6000)),
+        "delivery_date": ctx["now"] + timedelta(days=int(days[i])),
+        "status": "Signed" if signed[i] else "Open",
+        "terms": "Grade A, Moisture < 12%",
+        "digital_signature": f"sig_{start + i}" if signed[i] else None,
+        "created_at": ctx["now"],
+    } for i in range(n)]
+
+
+GENERATORS = {
+    "users": (User, _gen_users),
+    "plots": (Plot, _gen_plots),
+    "community_posts": (CommunityPost, _gen_community_posts),
+    "community_comments": (CommunityComment, _gen_community_comments),
+    "community_likes": (CommunityLike, _gen_community_likes),
+    "listings": (Listing, _gen_listings),
+    "chat_messages": (ChatMessage, _gen_chat_messages),
+    "stress_reports": (StressReport, _gen_stress_reports),
+    "contracts": (Contract, _gen_contracts),
+}
+
+
+def seed_large(scale=0.001, seed=42, tables=None, chunk_size=CHUNK_SIZE, bind=None):
+    """
+    Bulk-loads a synthetic dataset of SCALE_TARGETS * scale rows per table using
+    Core insert() executemany batches, committing every chunk_size rows.
+    Rows are appended after any existing ids, so it can run on a seeded DB.
+    Returns {table: rows_inserted}.
+    """
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+    tables = tables or TABLE_ORDER
+    counts = {t: max(1, int(SCALE_TARGETS[t] * scale)) for t in TABLE_ORDER}
+
+    if bind.dialect.name == "sqlite":
+        with bind.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+    with bind.connect() as conn:
+        max_ids = {t: conn.execute(select(func.max(GENERATORS[t][0].id))).scalar() or 0 for t in TABLE_ORDER}
+
+    # Referenced tables may exist already; foreign keys point at the full id range
+    ctx = {
+        "now": datetime(2026, 1, 1),
+        "epoch": datetime(2023, 1, 1),
+        **{t: max_ids[t] + (counts[t] if t in tables else 0) for t in TABLE_ORDER},
+    }
+    if "community_likes" in tables and max_ids["community_likes"]:
+        # Appending: new likes must not repeat a (post, user) pair that is already there
+        with bind.connect() as conn:
+            existing = conn.execute(
+                select(CommunityLike.post_id * (ctx["users"] + 1) + CommunityLike.user_id)
+                .where(CommunityLike.post_id.is_not(None), CommunityLike.user_id.is_not(None))
+            ).scalars().all()
+        ctx["community_like_keys"] = np.unique(np.array(existing, dtype=np.int64))
+
+    inserted = {}
+    for table in tables:
+        model, generate = GENERATORS[table]
+        rng = _table_rng(seed, table)
+        total = counts[table]
+        started = time.perf_counter()
+        for offset in range(0, total, chunk_size):
+            n = min(chunk_size, total - offset)
+            rows = generate(rng, max_ids[table] + offset + 1, n, ctx)
+            with bind.begin() as conn:
+                if bind.dialect.name == "sqlite":
+                    conn.exec_driver_sql("PRAGMA synchronous=OFF")
+                conn.execute(insert(model), rows)
+            print(f"  {table}: {offset + n:,}/{total:,}", end="\r")
+        elapsed = time.perf_counter() - started
+        print(f"  {table}: {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+        inserted[table] = total
+
+    if "community_likes" in tables:
+        # Keep the denormalized counter consistent with the generated likes
+        with bind.begin() as conn:
+            conn.exec_driver_sql("""
+                UPDATE community_posts SET likes_count = agg.n
+                FROM (SELECT post_id, COUNT(*) AS n FROM community_likes GROUP BY post_id) AS agg
+                WHERE community_posts.id = agg.post_id
+            """)
+
+    return inserted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the Krishi-Drishti database.")
+    parser.add_argument("--scale", type=float, default=None,
+                        help="generate a synthetic dataset at this fraction of production size (1.0 = 1M users, 5M plots, ...)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for reproducible datasets")
+    parser.add_argument("--tables", nargs="+", choices=TABLE_ORDER, help="only generate these tables")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.scale is None:
+        seed_data()
+        return
+
+    print(f"Generating synthetic dataset at scale {args.scale} (seed={args.seed})...")
+    seed_large(scale=args.scale, seed=args.seed, tables=args.tables, chunk_size=args.chunk_size)
+    print("Synthetic dataset complete!")
+
 if __name__ == "__main__":
-    seed_data()
+    main()
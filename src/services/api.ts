@@ -144,14 +144,14 @@ export const aiService = {
 
 export const financeService = {
   getStatus: async () => {
-    const response = await api.get<{ trust_score: number, rainfall_mm: number, payout_eligible: boolean }>('/finance/status');
+    const response = await api.get<{ trust_score: number, rainfall_mm: number | null, payout_eligible: boolean, trigger?: string | null, deficit_pct?: number | null, heat_days?: number }>('/finance/status');
     return response.data;
   },
   getSchemes: async () => {
     // This was the old finance schemes. We now have a dedicated schemes router.
     // Keeping this for backward compatibility if needed, or redirecting.
     const response = await api.get('/finance/schemes');
-    return JSON.parse(response.data.schemes);
+    return response.data.schemes;
   }
 };
 
@@ -265,12 +265,23 @@ export const carbonService = {
     const response = await api.get('/carbon/projects');
     return response.data;
   },
+  getPortfolio: async () => {
+    const response = await api.get('/carbon/portfolio');
+    return response.data;
+  },
   enrollPlot: async (plotId: number, methodology: string) => {
     const response = await api.post('/carbon/enroll', { plot_id: plotId, methodology });
     return response.data;
   },
-  uploadEvidence: async (projectId: number, data: { description: string, geo_lat: number, geo_lng: number }) => {
-    const response = await api.post(`/carbon/${projectId}/evidence`, data);
+  uploadEvidence: async (projectId: number, file: Blob, data: { description: string, geo_lat: number, geo_lng: number }) => {
+    const form = new FormData();
+    form.append('file', file);
+    form.append('description', data.description);
+    form.append('geo_lat', String(data.geo_lat));
+    form.append('geo_lng', String(data.geo_lng));
+    const response = await api.post(`/carbon/${projectId}/evidence`, form, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
     return response.data;
   },
   verifyProject: async (projectId: number) => {
@@ -280,13 +291,18 @@ export const carbonService = {
 };
 
 export const contractService = {
-  getContracts: async (status: 'Open' | 'Signed' = 'Open') => {
-    const response = await api.get('/contracts/', { params: { status } });
-    return response.data;
+  getContracts: async (status: 'Open' | 'Signed' = 'Open', cursor?: string) => {
+    // Keyset pagination: pass back the X-Next-Cursor of the previous page
+    const response = await api.get('/contracts/', { params: { status, ...(cursor ? { cursor } : {}) } });
+    return { items: response.data, nextCursor: (response.headers['x-next-cursor'] as string | undefined) || null };
   },
   signContract: async (contractId: number, signatureHash: string) => {
     const response = await api.post('/contracts/sign', { contract_id: contractId, signature_hash: signatureHash });
     return response.data;
+  },
+  getMatches: async (limit: number = 20) => {
+    const response = await api.get('/contracts/matches', { params: { limit } });
+    return response.data;
   }
 };
 
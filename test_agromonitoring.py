@@ -0,0 +1,146 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from backend.services.agromonitoring import SatelliteService
+
+COORDS = [{"lat": 21.146, "lng": 79.089}, {"lat": 21.147, "lng": 79.089}, {"lat": 21.147, "lng": 79.090}]
+
+
+class StubAgroHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the AgroMonitoring REST API."""
+    delay = 0.0
+    fail_first = 0
+    requests = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _should_fail(self):
+        with StubAgroHandler.lock:
+            StubAgroHandler.requests.append(self.path)
+            if StubAgroHandler.fail_first > 0:
+                StubAgroHandler.fail_first -= 1
+                return True
+        return False
+
+    def do_POST(self):
+        if self._should_fail():
+            return self._send(503, {"message": "busy"})
+        length = int(self.headers["Content-Length"])
+        payload = json.loads(self.rfile.read(length))
+        self._send(201, {"id": f"poly-{payload['name']}"})
+
+    def do_GET(self):
+        if self._should_fail():
+            return self._send(503, {"message": "busy"})
+        time.sleep(StubAgroHandler.delay)
+        if self.path.startswith("/agro/1.0/ndvi/history"):
+            self._send(200, [{"dt": 1, "data": {"mean": 0.42}}, {"dt": 2, "data": {"mean": 0.61}}])
+        elif self.path.startswith("/agro/1.0/image/search"):
+            self._send(200, [{"cl": 5, "image": {"truecolor": "http://img/1.png"}}, {"cl": 80, "image": {"truecolor": "http://img/2.png"}}])
+        else:
+            self._send(404, {})
+
+
+@pytest.fixture
+def stub_server():
+    StubAgroHandler.delay = 0.0
+    StubAgroHandler.fail_first = 0
+    StubAgroHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAgroHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/agro/1.0"
+    server.shutdown()
+    server.server_close()
+
+
+def _service(base_url, **kwargs):
+    return SatelliteService(api_key="test", base_url=base_url, retry_backoff=0.01, **kwargs)
+
+
+def test_analysis_runs_lookups_concurrently(stub_server):
+    StubAgroHandler.delay = 0.3
+
+    async def run():
+        service = _service(stub_server)
+        try:
+            started = time.perf_counter()
+            result = await service.get_analysis("poly-1", COORDS)
+            return result, time.perf_counter() - started
+        finally:
+            await service.aclose()
+
+    result, elapsed = asyncio.run(run())
+    assert result["source"] == "AgroMonitoring API"
+    assert result["health_score"] == 0.61
+    assert result["image_url"] == "http://img/1.png"
+    assert elapsed < 0.55  # two 0.3s lookups in parallel, not in sequence
+
+
+def test_retries_transient_errors(stub_server):
+    StubAgroHandler.fail_first = 2
+
+    async def run():
+        service = _service(stub_server, max_retries=2)
+        try:
+            return await service.register_polygon("north", COORDS)
+        finally:
+            await service.aclose()
+
+    assert asyncio.run(run()) == "poly-north"
+    assert len(StubAgroHandler.requests) == 3
+
+
+def test_gives_up_after_bounded_retries_and_simulates(stub_server):
+    StubAgroHandler.fail_first = 100
+
+    async def run():
+        service = _service(stub_server, max_retries=1)
+        try:
+            return await service.get_analysis("poly-1", COORDS, "Wheat")
+        finally:
+            await service.aclose()
+
+    result = asyncio.run(run())
+    assert result["source"] == "Digital Twin Simulation"
+    assert len(StubAgroHandler.requests) == 4  # 2 lookups x (1 try + 1 retry)
+
+
+def test_timeouts_fall_back_to_simulation(stub_server):
+    StubAgroHandler.delay = 0.5
+
+    async def run():
+        service = _service(stub_server, max_retries=0, timeout=httpx.Timeout(0.1))
+        try:
+            return await service.get_analysis("poly-1", COORDS)
+        finally:
+            await service.aclose()
+
+    assert asyncio.run(run())["source"] == "Digital Twin Simulation"
+
+
+def test_register_polygons_batch(stub_server):
+    async def run():
+        service = _service(stub_server)
+        try:
+            return await service.register_polygons([(f"plot{i}", COORDS) for i in range(25)], concurrency=5)
+        finally:
+            await service.aclose()
+
+    assert asyncio.run(run()) == [f"poly-plot{i}" for i in range(25)]
@@ -0,0 +1,91 @@
+import threading
+from datetime import datetime, timedelta
+
+from backend.database import SessionLocal
+from backend.models import Contract
+
+
+def _add_contracts(n, crop="Wheat"):
+    db = SessionLocal()
+    try:
+        rows = [Contract(buyer_name=f"Buyer {i}", crop_type=crop if i % 2 == 0 else "Cotton", quantity=10,
+                         price_per_qt=2000, delivery_date=datetime(2026, 1, 1) + timedelta(days=i // 3),
+                         terms="Grade A", status="Open") for i in range(n)]
+        db.add_all(rows)
+        db.commit()
+        return [r.id for r in rows]
+    finally:
+        db.close()
+
+
+def _login(client, phone):
+    token = client.post("/api/auth/verify-otp", json={"phone": phone, "otp": "0000"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_listing_does_not_seed_and_paginates(client, auth_headers):
+    assert client.get("/api/contracts/", headers=auth_headers).json() == []
+
+    ids = _add_contracts(25)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        resp = client.get("/api/contracts/", params=params, headers=auth_headers)
+        seen += [c["id"] for c in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(ids) and len(seen) == len(set(seen))
+
+    wheat = client.get("/api/contracts/", params={"crop": "Wheat", "limit": 200}, headers=auth_headers).json()
+    assert len(wheat) == 13 and {c["crop_type"] for c in wheat} == {"Wheat"}
+    assert client.get("/api/contracts/", params={"cursor": "nope"}, headers=auth_headers).status_code == 400
+
+
+def test_pagination_covers_undated_contracts(client, auth_headers):
+    dated = _add_contracts(3)
+    db = SessionLocal()
+    try:
+        undated = [Contract(buyer_name=f"Undated {i}", crop_type="Wheat", quantity=10, price_per_qt=2000,
+                            terms="Grade A", status="Open") for i in range(3)]
+        db.add_all(undated)
+        db.commit()
+        undated = [c.id for c in undated]
+    finally:
+        db.close()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = client.get("/api/contracts/", params=params, headers=auth_headers)
+        assert resp.status_code == 200
+        seen += resp.json()
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    # Undated contracts come first and paging carries on into the dated ones
+    assert [c["id"] for c in seen] == undated + dated
+    assert [c["delivery_date"] for c in seen[:3]] == [None] * 3
+
+
+def test_concurrent_signing_has_one_winner(client):
+    contract_id = _add_contracts(1)[0]
+    farmers = [_login(client, f"90000001{i:02d}") for i in range(8)]
+    barrier = threading.Barrier(len(farmers))
+    statuses = []
+
+    def sign(headers):
+        barrier.wait()
+        resp = client.post("/api/contracts/sign", json={"contract_id": contract_id, "signature_hash": "sig"},
+                           headers=headers)
+        statuses.append(resp.status_code)
+
+    threads = [threading.Thread(target=sign, args=(h,)) for h in farmers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(statuses) == [200] + [400] * (len(farmers) - 1)
+    assert client.post("/api/contracts/sign", json={"contract_id": 99999, "signature_hash": "x"},
+                       headers=farmers[0]).status_code == 404
@@ -0,0 +1,120 @@
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services.eligibility import BulkEvaluator, compile_rules, parse_rules, precompute_matches
+
+RULES = [
+    {},
+    {"districts": ["Nagpur", "Wardha"], "max_land_size": 5},
+    {"categories": ["SC", "ST"], "crops": ["Cotton", "soybean"]},
+    {"farming_types": ["Organic"], "min_land_size": 2.0},
+    {"crops": ["Grapes"]},
+]
+
+
+def _random_users(n, seed=7):
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            district=rng.choice(["Nagpur", "wardha", "Pune", None]),
+            category=rng.choice(["General", "OBC", "SC", "ST"]),
+            farming_type=rng.choice(["Organic", "Conventional", "Mixed"]),
+            land_size=rng.choice([None, 0.5, 2.0, 5.0, 9.0]),
+            crops=rng.choice(["", "Cotton,Wheat", '["Soybean"]', "Rice", "Grapes, Onion"]),
+        )
+        for _ in range(n)
+    ]
+
+
+def test_compiled_predicates():
+    farmer = SimpleNamespace(district="Nagpur", category="SC", farming_type="Mixed", land_size=3.0, crops="Wheat, Cotton")
+    assert compile_rules(json.dumps(RULES[0]))(farmer)
+    assert compile_rules(json.dumps(RULES[1]))(farmer)
+    assert compile_rules(json.dumps(RULES[2]))(farmer)
+    assert not compile_rules(json.dumps(RULES[3]))(farmer)
+    with pytest.raises(ValueError):
+        parse_rules({"income": 100})
+
+
+def test_bulk_evaluation_matches_predicates():
+    users = _random_users(500)
+    schemes = [SimpleNamespace(id=i, eligibility_rules=json.dumps(r)) for i, r in enumerate(RULES)]
+    masks = BulkEvaluator(schemes).evaluate({
+        attr: [getattr(u, attr) for u in users]
+        for attr in ("district", "category", "farming_type", "land_size", "crops")
+    })
+    for scheme in schemes:
+        predicate = compile_rules(scheme.eligibility_rules)
+        assert masks[scheme.id].tolist() == [predicate(u) for u in users]
+
+
+def test_schemes_filtered_per_user_and_precomputed(client, auth_headers):
+    from backend.database import SessionLocal
+    from backend.models import SchemeMatch
+
+    client.post("/api/schemes/", json={"title": "Open", "description": "-", "tag": "NEW"})
+    client.post("/api/schemes/", json={"title": "Organic only", "description": "-", "tag": "NEW",
+                                       "eligibility_rules": {"farming_types": ["Organic"]}})
+    assert client.post("/api/schemes/", json={"title": "Bad", "description": "-", "tag": "NEW",
+                                              "eligibility_rules": {"income": 1}}).status_code == 400
+
+    titles = [s["title"] for s in client.get("/api/schemes/", headers=auth_headers).json()]
+    assert titles == ["Open"]
+    everything = client.get("/api/schemes/?show_all=true", headers=auth_headers).json()
+    assert everything[1]["eligibility_rules"] == {"farming_types": ["Organic"]}
+
+    db = SessionLocal()
+    try:
+        # The list above was served from (and built into) scheme_matches
+        assert [m.scheme_id for m in db.query(SchemeMatch).all()] == [everything[0]["id"]]
+        assert precompute_matches(db, chunk_size=1) == 1
+        assert [m.scheme_id for m in db.query(SchemeMatch).all()] == [everything[0]["id"]]
+    finally:
+        db.close()
+
+    # A profile change makes the user's matches stale
+    client.put("/api/users/me", json={"farming_type": "Organic"}, headers=auth_headers)
+    titles = [s["title"] for s in client.get("/api/schemes/", headers=auth_headers).json()]
+    assert titles == ["Open", "Organic only"]
+
+    # So does a new scheme
+    client.post("/api/schemes/", json={"title": "Organic too", "description": "-", "tag": "NEW",
+                                       "eligibility_rules": {"farming_types": ["organic"]}})
+    titles = [s["title"] for s in client.get("/api/schemes/", headers=auth_headers).json()]
+    assert titles == ["Open", "Organic only", "Organic too"]
+
+
+def test_precompute_is_atomic(client, auth_headers, monkeypatch):
+    from backend.database import SessionLocal
+    from backend.models import SchemeMatch, User
+
+    client.post("/api/schemes/", json={"title": "Open", "description": "-", "tag": "NEW"})
+    db = SessionLocal()
+    try:
+        db.add_all([User(phone=f"90000001{i:02d}") for i in range(3)])
+        db.commit()
+        assert precompute_matches(db) == 4
+
+        calls = []
+        original = BulkEvaluator.evaluate
+
+        def fail_on_second_chunk(self, users):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("worker died")
+            return original(self, users)
+
+        monkeypatch.setattr(BulkEvaluator, "evaluate", fail_on_second_chunk)
+        with pytest.raises(RuntimeError):
+            precompute_matches(db, chunk_size=2)
+        # Readers still see the previous, complete table
+        other = SessionLocal()
+        try:
+            assert other.query(SchemeMatch).count() == 4
+        finally:
+            other.close()
+    finally:
+        db.close()
@@ -0,0 +1,124 @@
+import hashlib
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from backend.database import SessionLocal
+from backend.models import User, Plot, CarbonProject, CarbonEvidence
+from backend.services import evidence_store
+
+SQUARE = '[{"lat": 21.1, "lng": 79.0}, {"lat": 21.1, "lng": 79.01}, {"lat": 21.11, "lng": 79.01}]'
+
+
+@pytest.fixture
+def store_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(evidence_store, "EVIDENCE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def project_id(client):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.phone == "9000000001").first()
+        plot = Plot(user_id=user.id, name="North", coordinates=SQUARE, area=4.0)
+        db.add(plot)
+        db.flush()
+        project = CarbonProject(plot_id=plot.id, user_id=user.id, methodology="No-Till", status="Enrolled")
+        db.add(project)
+        db.commit()
+        return project.id
+    finally:
+        db.close()
+
+
+def _photo(lat=None, lng=None, size=(1200, 900)):
+    image = Image.new("RGB", size, (40, 140, 60))
+    exif = Image.Exif()
+    if lat is not None:
+        def dms(value):
+            value = abs(value)
+            minutes = (value - int(value)) * 60
+            return (float(int(value)), float(int(minutes)), round((minutes - int(minutes)) * 60, 4))
+        exif[evidence_store._GPS_IFD] = {
+            evidence_store._GPS_LAT_REF: "N" if lat >= 0 else "S", evidence_store._GPS_LAT: dms(lat),
+            evidence_store._GPS_LNG_REF: "E" if lng >= 0 else "W", evidence_store._GPS_LNG: dms(lng),
+        }
+    buf = io.BytesIO()
+    image.save(buf, "JPEG", exif=exif)
+    return buf.getvalue()
+
+
+def _upload(client, auth_headers, project_id, content, name="field.jpg", content_type="image/jpeg", lat=21.105, lng=79.005):
+    return client.post(
+        f"/api/carbon/{project_id}/evidence",
+        data={"description": "Cover crop established", "geo_lat": lat, "geo_lng": lng},
+        files={"file": (name, content, content_type)},
+        headers=auth_headers,
+    )
+
+
+def test_upload_is_hashed_stored_and_thumbnailed(client, auth_headers, project_id, store_dir):
+    content = _photo(21.1052, 79.0048)
+    response = _upload(client, auth_headers, project_id, content)
+    assert response.status_code == 200
+    data = response.json()
+
+    sha = hashlib.sha256(content).hexdigest()
+    assert data["sha256"] == sha
+    assert data["size"] == len(content)
+    assert data["status"] == "Evidence_Pending"
+    assert data["gps_match"] is True
+    assert data["gps_distance_m"] < 100
+    assert abs(data["exif_location"]["lat"] - 21.1052) < 1e-3
+
+    with open(store_dir / sha[:2] / sha, "rb") as f:
+        assert f.read() == content
+    assert evidence_store.verify_blob(sha)
+    with Image.open(evidence_store.thumbnail_path(sha)) as thumb:
+        assert max(thumb.size) <= max(evidence_store.THUMBNAIL_SIZE)
+    assert not [n for n in os.listdir(store_dir) if n.startswith(".upload-")]
+
+    file_response = client.get(data["image_url"], headers=auth_headers)
+    assert file_response.content == content
+    assert client.get(data["thumbnail_url"], headers=auth_headers).headers["content-type"] == "image/jpeg"
+
+
+def test_duplicate_and_far_away_uploads(client, auth_headers, project_id, store_dir):
+    content = _photo(22.5, 80.0)
+    first = _upload(client, auth_headers, project_id, content).json()
+    assert first["gps_match"] is False
+    assert first["gps_distance_m"] > 100_000
+
+    duplicate = _upload(client, auth_headers, project_id, content)
+    assert duplicate.status_code == 409
+
+    # Non-image evidence (lab report) is stored without EXIF or a thumbnail
+    report = _upload(client, auth_headers, project_id, b"%PDF-1.4 soil organic carbon 1.2%", "lab.pdf", "application/pdf")
+    assert report.status_code == 200
+    assert report.json()["thumbnail_url"] is None
+    assert report.json()["gps_match"] is None
+
+    db = SessionLocal()
+    try:
+        assert db.query(CarbonEvidence).filter(CarbonEvidence.project_id == project_id).count() == 2
+    finally:
+        db.close()
+
+
+def test_oversized_upload_is_rejected(client, auth_headers, project_id, store_dir, monkeypatch):
+    monkeypatch.setattr(evidence_store, "MAX_EVIDENCE_BYTES", 1000)
+    monkeypatch.setattr(evidence_store, "CHUNK_SIZE", 256)
+    response = _upload(client, auth_headers, project_id, b"x" * 5000, "big.bin", "application/octet-stream")
+    assert response.status_code == 413
+    assert os.listdir(store_dir) == []
+
+
+def test_tampered_blob_fails_verification(client, auth_headers, project_id, store_dir):
+    content = _photo()
+    sha = _upload(client, auth_headers, project_id, content).json()["sha256"]
+    with open(evidence_store.blob_path(sha), "ab") as f:
+        f.write(b"edited")
+    assert not evidence_store.verify_blob(sha)
@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from backend import fast_json
+from backend.database import SessionLocal
+from backend.models import User, Plot, Listing, CommunityPost, CommunityComment, CommunityLike, CarbonEvidence
+from backend.routers.plots import PlotResponse
+from backend.routers.community import PostResponse
+from backend.routers.market import ListingResponse
+from backend.routers.carbon import ProjectResponse
+
+SQUARE = '[{"lat": 21, "lng": 79.0}, {"lat": 21.1, "lng": 79.01}, {"lat": 21.11, "lng": 79.01}]'
+
+ROUTES = [
+    ("/api/plots/", PlotResponse),
+    ("/api/community/", PostResponse),
+    ("/api/market/", ListingResponse),
+    ("/api/carbon/projects", ProjectResponse),
+]
+
+
+def _seed(client, auth_headers):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.phone == "9000000001").first()
+        user.name = "Ramesh"
+        other = User(phone="9000000002", name=None, district="Wardha")
+        db.add(other)
+        db.flush()
+        plots = [Plot(user_id=user.id, name=f"Plot {i}", coordinates=SQUARE if i else "not json", area=2.5,
+                      crop_type="Wheat", health_score=0.8, moisture=31.5) for i in range(3)]
+        db.add_all(plots)
+        posts = [CommunityPost(user_id=uid, content=f"Post {i}", likes_count=i,
+                               created_at=datetime(2025, 1, 1, 9, i, 0, 1234 * i))
+                 for i, uid in enumerate([user.id, other.id, user.id])]
+        db.add_all(posts)
+        db.flush()
+        db.add_all([CommunityComment(post_id=posts[0].id, user_id=other.id, text="Nice"),
+                    CommunityComment(post_id=posts[0].id, user_id=user.id, text="Thanks"),
+                    CommunityLike(post_id=posts[1].id, user_id=user.id)])
+        db.add_all([Listing(seller_id=user.id, crop_name="Wheat", quantity="10kg", price="20/kg", location="Nagpur",
+                            description=None, is_organic=True, grade="A"),
+                    Listing(seller_id=None, crop_name="Rice", quantity="5kg", price="40/kg", location="Pune",
+                            description="Basmati", is_organic=False, grade="B")])
+        db.commit()
+        plot_ids = [p.id for p in plots]
+    finally:
+        db.close()
+
+    for plot_id in plot_ids[1:]:
+        client.post("/api/carbon/enroll", json={"plot_id": plot_id, "methodology": "No-Till"}, headers=auth_headers)
+    db = SessionLocal()
+    try:
+        db.add(CarbonEvidence(project_id=1, description="soil report"))
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("path,model", ROUTES, ids=[p for p, _ in ROUTES])
+def test_fast_rows_match_response_model(client, auth_headers, path, model):
+    _seed(client, auth_headers)
+    response = client.get(path, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+    # The hand-shaped rows are exactly what response_model validation would have produced
+    body = response.json()
+    assert body
+    adapter = TypeAdapter(List[model])
+    assert adapter.dump_python(adapter.validate_python(body), mode="json") == body
+
+
+def test_feed_shape(client, auth_headers):
+    _seed(client, auth_headers)
+    feed = client.get("/api/community/", headers=auth_headers).json()
+    assert [p["content"] for p in feed] == ["Post 2", "Post 1", "Post 0"]
+    assert [p["liked_by_me"] for p in feed] == [False, True, False]
+    assert feed[1]["user_name"] == "Unknown"
+    assert feed[2]["comments_count"] == 2
+    assert [c["text"] for c in feed[2]["comments"]] == ["Nice", "Thanks"]
+
+    plots = client.get("/api/plots/", headers=auth_headers).json()
+    assert plots[0]["coordinates"] == []
+    assert plots[1]["coordinates"][0] == {"lat": 21.0, "lng": 79.0}
+
+    listings = client.get("/api/market/").json()
+    assert [(l["seller_name"], l["seller_phone"]) for l in listings] == [("Ramesh", "9000000001"), ("Unknown", None)]
+
+
+def test_openapi_keeps_response_models(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    for path, model in ROUTES:
+        schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema["items"]["$ref"].endswith(f"/{model.__name__}")
+
+
+def test_dumps_without_orjson(monkeypatch):
+    row = {"id": 1, "created_at": datetime(2025, 1, 2, 3, 4, 5, 6), "tags": ["a"], "score": 0.5}
+    fast = fast_json.dumps(row)
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert fast_json.dumps(row) == fast
+    assert fast_json.loads(fast)["created_at"] == "2025-01-02T03:04:05.000006"
@@ -0,0 +1,75 @@
+import threading
+import time
+
+from backend.routers import finance
+from backend.services import gemini
+from backend.services.cache import TTLCache
+
+
+class FakeModel:
+    calls = 0
+
+    def __init__(self, name):
+        pass
+
+    def generate_content(self, prompt):
+        FakeModel.calls += 1
+
+        class Response:
+            text = '```json [{"name": "PM-KISAN", "benefits": "Income support", "link": "https://pmkisan.gov.in/"}] ```'
+        return Response()
+
+
+def test_recommendations_cached_per_profile_bucket(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(gemini, "model", FakeModel)
+    finance.scheme_cache.invalidate()
+    FakeModel.calls = 0
+
+    first = client.get("/api/finance/schemes", headers=auth_headers).json()
+    assert first["schemes"][0]["name"] == "PM-KISAN"  # parsed JSON, not a string
+    assert first["cached"] is False
+
+    # A second farmer in the same bucket is served from cache
+    other = client.post("/api/auth/verify-otp", json={"phone": "9000000002", "otp": "0000"}).json()
+    second = client.get("/api/finance/schemes", headers={"Authorization": f"Bearer {other['access_token']}"}).json()
+    assert second["cached"] is True
+    assert FakeModel.calls == 1
+    assert client.get("/api/finance/schemes/cache").json()["hit_rate"] == 0.5
+
+
+def test_stale_entries_refresh_in_background():
+    now = [0.0]
+    cache = TTLCache("test", ttl=10, stale_grace=10, clock=lambda: now[0])
+    refreshed = threading.Event()
+
+    assert cache.get_or_load("k", lambda: 1) == (1, False)
+    now[0] = 15  # stale: old value served, refresh scheduled
+    assert cache.get_or_load("k", lambda: (refreshed.set(), 2)[1]) == (1, True)
+    assert refreshed.wait(2)
+    for _ in range(200):
+        if not cache._refreshing:
+            break
+        time.sleep(0.01)
+    assert cache.get_or_load("k", lambda: 3) == (2, True)
+
+    now[0] = 100  # past the grace period: loaded inline
+    assert cache.get_or_load("k", lambda: 4) == (4, False)
+
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache("test", ttl=60)
+    calls = []
+    gate = threading.Event()
+
+    def loader():
+        calls.append(1)
+        gate.wait(2)
+        return "v"
+
+    threads = [threading.Thread(target=cache.get_or_load, args=("k", loader)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
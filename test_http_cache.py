@@ -0,0 +1,124 @@
+from backend.database import SessionLocal
+from backend.models import User, Listing
+from backend.services.http_cache import etag_matches, make_etag
+from backend.sql_profiler import capture_queries
+
+LISTING = {"crop_name": "Onion", "quantity": "50kg", "price": "18/kg", "location": "Nashik"}
+SCHEME = {"title": "Drip Subsidy", "description": "55% off drip kits", "tag": "NEW"}
+
+
+def _get(client, path, etag=None, **kwargs):
+    headers = dict(kwargs.pop("headers", {}))
+    if etag:
+        headers["If-None-Match"] = etag
+    return client.get(path, headers=headers, **kwargs)
+
+
+def test_conditional_get_and_cached_body(client, auth_headers):
+    client.post("/api/market/", json=LISTING, headers=auth_headers)
+
+    first = _get(client, "/api/market/")
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+    assert first.headers["Cache-Control"] == "no-cache"
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    again = _get(client, "/api/market/")
+    assert again.headers["X-Cache"] == "HIT"
+    assert again.headers["ETag"] == etag
+    assert again.content == first.content
+
+    # Revalidation only reads table_versions: no listing query, empty body
+    with capture_queries() as profile:
+        not_modified = _get(client, "/api/market/", etag=etag)
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    assert all("table_versions" in sql for sql in profile.grouped())
+
+    # Filters are part of the ETag
+    filtered = _get(client, "/api/market/", etag=etag, params={"crop": "Onion"})
+    assert filtered.status_code == 200
+    assert filtered.headers["ETag"] != etag
+
+
+def test_writes_change_the_etag(client, auth_headers):
+    etag = _get(client, "/api/market/").headers["ETag"]
+
+    client.post("/api/market/", json=LISTING, headers=auth_headers)
+    fresh = _get(client, "/api/market/", etag=etag)
+    assert fresh.status_code == 200
+    assert [l["crop_name"] for l in fresh.json()] == ["Onion"]
+    etag = fresh.headers["ETag"]
+
+    # Seller details are part of the listing payload
+    client.put("/api/users/me", json={"name": "Ramesh"}, headers=auth_headers)
+    renamed = _get(client, "/api/market/", etag=etag)
+    assert renamed.status_code == 200
+    assert renamed.json()[0]["seller_name"] == "Ramesh"
+    etag = renamed.headers["ETag"]
+
+    # Writes outside the request cycle are seen too (triggers, not handler hooks)
+    db = SessionLocal()
+    try:
+        db.query(Listing).update({Listing.price: "20/kg"})
+        db.query(User).update({User.trust_score: 600}) # not shown with listings
+        db.commit()
+    finally:
+        db.close()
+    repriced = _get(client, "/api/market/", etag=etag)
+    assert repriced.status_code == 200
+    assert repriced.json()[0]["price"] == "20/kg"
+    assert _get(client, "/api/market/", etag=repriced.headers["ETag"]).status_code == 304
+
+
+def test_schemes_are_private_per_profile(client, auth_headers):
+    public = _get(client, "/api/schemes/", params={"show_all": True}, headers=auth_headers)
+    assert public.headers["Cache-Control"] == "no-cache"
+    mine = _get(client, "/api/schemes/", headers=auth_headers)
+    assert mine.headers["Cache-Control"] == "private, no-cache"
+    assert "Authorization" in mine.headers["Vary"]
+    assert mine.headers["ETag"] != public.headers["ETag"]
+
+    assert client.post("/api/schemes/", json=SCHEME).status_code == 201
+    after = _get(client, "/api/schemes/", etag=public.headers["ETag"], params={"show_all": True},
+                 headers=auth_headers)
+    assert after.status_code == 200
+    assert "Drip Subsidy" in [s["title"] for s in after.json()]
+
+
+def test_insurance_enrollment_changes_the_etag(client, auth_headers):
+    params = {"query": "coconut"}
+    anonymous = _get(client, "/api/insurance/search", params=params).headers["ETag"]
+    signed_in = _get(client, "/api/insurance/search", params=params, headers=auth_headers)
+    assert signed_in.headers["ETag"] != anonymous
+    assert signed_in.json()[0]["is_enrolled"] is False
+
+    enroll = {"scheme_id": 3, "farmer_name": "Ramesh", "aadhar_number": "123412341234",
+              "survey_number": "12/A", "land_area": 2.5, "crop": "Coconut"}
+    assert client.post("/api/insurance/enroll", json=enroll, headers=auth_headers).status_code == 200
+
+    after = _get(client, "/api/insurance/search", etag=signed_in.headers["ETag"], params=params,
+                 headers=auth_headers)
+    assert after.status_code == 200
+    assert after.json()[0]["is_enrolled"] is True
+
+
+def test_openapi_keeps_response_models(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    for path in ("/api/market/", "/api/schemes/", "/api/insurance/search"):
+        responses = paths[path]["get"]["responses"]
+        assert "$ref" in responses["200"]["content"]["application/json"]["schema"]["items"]
+        assert "304" in responses
+
+
+def test_etag_matching():
+    etag = make_etag("market", (3, 7), ("Onion", None))
+    assert etag != make_etag("market", (4, 7), ("Onion", None))
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
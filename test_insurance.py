@@ -0,0 +1,36 @@
+from backend.routers.insurance import search_index
+
+
+def _names(resp):
+    return [s["name"] for s in resp.json()]
+
+
+def test_search_uses_prefix_index(client):
+    assert len(client.get("/api/insurance/search").json()) == 6
+
+    # word prefixes across name / type / provider / crops, AND-ed per term
+    assert _names(client.get("/api/insurance/search", params={"query": "cocon"})) == ["Coconut Palm Insurance Scheme (CPIS)"]
+    weather = client.get("/api/insurance/search", params={"query": "weather param"}).json()
+    assert [s["id"] for s in weather] == [2, 6]
+    assert [s["id"] for s in client.get("/api/insurance/search", params={"query": "Commercial Cr"}).json()] == [6]
+    assert client.get("/api/insurance/search", params={"query": "zzz"}).json() == []
+
+
+def test_enrollment_is_persisted_per_user(client, auth_headers):
+    enroll = {"scheme_id": 3, "farmer_name": "Ramesh", "aadhar_number": "123412341234",
+              "survey_number": "12/A", "land_area": 2.5, "crop": "Coconut"}
+    resp = client.post("/api/insurance/enroll", json=enroll, headers=auth_headers)
+    assert resp.status_code == 200
+    assert "aadhar_number" not in resp.json()["details"]
+    assert client.post("/api/insurance/enroll", json=enroll, headers=auth_headers).status_code == 409
+
+    mine = client.get("/api/insurance/search", params={"query": "coconut"}, headers=auth_headers).json()
+    assert mine[0]["is_enrolled"] is True
+
+    # Other users (and anonymous callers) don't see someone else's enrollment
+    other = client.post("/api/auth/verify-otp", json={"phone": "9000000002", "otp": "0000"}).json()
+    theirs = client.get("/api/insurance/search", params={"query": "coconut"},
+                        headers={"Authorization": f"Bearer {other['access_token']}"}).json()
+    assert theirs[0]["is_enrolled"] is False
+    assert client.get("/api/insurance/search", params={"query": "coconut"}).json()[0]["is_enrolled"] is False
+    assert "is_enrolled" not in search_index.get(3)
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DatabaseError
+
+from backend.database import SessionLocal
+from backend.models import User, Plot, CarbonProject, CarbonLedgerEntry, CarbonPortfolioSummary
+from backend.services import ledger
+
+
+def _verified_project(db, issued=100.0, locked=15.0, vesting_end=None):
+    user = db.query(User).filter(User.phone == "9000000001").first()
+    plot = Plot(user_id=user.id, name="North", coordinates="[]", area=10.0)
+    db.add(plot)
+    db.flush()
+    project = CarbonProject(plot_id=plot.id, user_id=user.id, methodology="No-Till", status="Verified",
+                            vesting_end_date=vesting_end or datetime.utcnow() + timedelta(days=5 * 365))
+    db.add(project)
+    db.flush()
+    ledger.post(db, [ledger.issuance(user.id, project.id, issued), ledger.buffer_lock(user.id, project.id, locked)])
+    db.commit()
+    return user.id, project.id
+
+
+def _buyer(db):
+    buyer = User(phone="9000000002", name="Buyer")
+    db.add(buyer)
+    db.commit()
+    return buyer.id
+
+
+def _balances(db, table_key):
+    kind, key = table_key
+    if kind == "project":
+        row = db.get(CarbonProject, key)
+    else:
+        row = db.query(CarbonPortfolioSummary).filter(CarbonPortfolioSummary.user_id == key).one()
+    db.refresh(row)
+    return row.available_credits, row.locked_credits, row.verified_credits
+
+
+def test_issuance_and_transfer(client, auth_headers):
+    db = SessionLocal()
+    try:
+        user_id, project_id = _verified_project(db)
+        buyer_id = _buyer(db)
+        assert _balances(db, ("project", project_id)) == (85.0, 15.0, 100.0)
+        assert _balances(db, ("user", user_id)) == (85.0, 15.0, 100.0)
+
+        response = client.post(f"/api/carbon/{project_id}/transfer", json={"to_user_id": buyer_id, "amount": 30},
+                               headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["project_available_credits"] == 55.0
+
+        # Locked buffer credits cannot be sold
+        response = client.post(f"/api/carbon/{project_id}/transfer", json={"to_user_id": buyer_id, "amount": 60},
+                               headers=auth_headers)
+        assert response.status_code == 400
+
+        assert _balances(db, ("project", project_id)) == (55.0, 15.0, 100.0)
+        assert _balances(db, ("user", user_id)) == (55.0, 15.0, 100.0)
+        assert _balances(db, ("user", buyer_id)) == (30.0, 0.0, 0.0)
+        assert db.query(CarbonLedgerEntry).count() == 4
+
+        history = client.get("/api/carbon/ledger", headers=auth_headers).json()
+        assert [e["entry_type"] for e in history] == [ledger.TRANSFER, ledger.BUFFER_LOCK, ledger.ISSUANCE]
+        assert history[0]["available_delta"] == -30.0
+        assert history[0]["counterparty_id"] == buyer_id
+
+        report = ledger.verify_balances(db, chunk_size=3)
+        assert report["ok"] and report["entries"] == 4
+    finally:
+        db.close()
+
+
+def test_vesting_release(client, auth_headers):
+    db = SessionLocal()
+    try:
+        user_id, project_id = _verified_project(db, vesting_end=datetime.utcnow() - timedelta(days=1))
+        assert ledger.release_vested(db) == 1
+        db.commit()
+        assert ledger.release_vested(db) == 0
+        assert _balances(db, ("project", project_id)) == (100.0, 0.0, 100.0)
+        assert ledger.verify_balances(db)["ok"]
+    finally:
+        db.close()
+
+
+def test_ledger_is_append_only(client, auth_headers):
+    db = SessionLocal()
+    try:
+        _verified_project(db)
+        with pytest.raises(DatabaseError, match="append-only"):
+            db.execute(text("UPDATE carbon_ledger SET amount = 1000"))
+        db.rollback()
+        with pytest.raises(DatabaseError, match="append-only"):
+            db.execute(text("DELETE FROM carbon_ledger"))
+        db.rollback()
+        assert db.query(CarbonLedgerEntry).count() == 2
+    finally:
+        db.close()
+
+
+def test_verifier_reports_drift_and_backfill(client, auth_headers):
+    db = SessionLocal()
+    try:
+        user_id, project_id = _verified_project(db)
+        db.query(CarbonProject).filter(CarbonProject.id == project_id).update({CarbonProject.available_credits: 500.0})
+        db.commit()
+        report = ledger.verify_balances(db)
+        assert not report["ok"]
+        assert report["mismatches"] == [{"kind": "project", "id": project_id, "field": "available_credits",
+                                         "ledger": 85.0, "materialized": 500.0}]
+
+        # A project verified before the ledger existed: balances set directly, no entries
+        plot = Plot(user_id=user_id, name="Legacy", coordinates="[]", area=5.0)
+        db.add(plot)
+        db.flush()
+        legacy = CarbonProject(plot_id=plot.id, user_id=user_id, methodology="Cover-Crop", status="Verified",
+                               verified_credits=4.0, locked_credits=0.6, available_credits=3.4)
+        db.add(legacy)
+        db.query(CarbonProject).filter(CarbonProject.id == project_id).update({CarbonProject.available_credits: 85.0})
+        db.commit()
+        assert ledger.backfill_from_projects(db) == 1
+        db.commit()
+        assert ledger.backfill_from_projects(db) == 0
+        assert _balances(db, ("project", legacy.id)) == (3.4, 0.6, 4.0)
+        assert _balances(db, ("user", user_id)) == (88.4, 15.6, 104.0)
+        assert ledger.verify_balances(db)["ok"]
+    finally:
+        db.close()
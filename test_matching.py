@@ -0,0 +1,76 @@
+import json
+import time
+from datetime import datetime, timedelta, date
+
+from backend.database import SessionLocal
+from backend.models import Contract
+from backend.services.matching import ContractMatcher, contract_matcher, score_matches
+
+SQUARE = [{"lat": 21.1, "lng": 79.1}, {"lat": 21.11, "lng": 79.1}, {"lat": 21.11, "lng": 79.11}]
+
+
+def _add(crop, quantity, days_out, status="Open"):
+    db = SessionLocal()
+    try:
+        c = Contract(buyer_name=f"{crop} buyer", crop_type=crop, quantity=quantity, price_per_qt=2000,
+                     delivery_date=datetime.combine(date.today(), datetime.min.time()) + timedelta(days=days_out),
+                     terms="Grade A", status=status)
+        db.add(c)
+        db.commit()
+        db.refresh(c)
+        return c
+    finally:
+        db.close()
+
+
+def test_score_prefers_capacity_and_health():
+    small, large = score_matches([1.0, 10.0], [0.8, 0.8], [1, 1], "wheat", [10, 10])
+    assert large > small
+    healthy, sick = score_matches([5.0, 5.0], [0.9, 0.3], [1, 1], "wheat", [10, 10])
+    assert healthy > sick
+
+
+def test_matches_follow_contracts_and_plots(client, auth_headers):
+    wheat_small = _add("Wheat", 2, 30)
+    wheat_big = _add("Wheat", 500, 60)
+    _add("Wheat", 5, 900)     # beyond the delivery horizon
+    _add("Wheat", 5, -10)     # delivery already passed
+    tomato = _add("Tomato", 5, 20)
+    db = SessionLocal()
+    contract_matcher.build(db)
+    db.close()
+
+    # Only listed in the profile so far
+    client.put("/api/users/me", json={"crops": ["Wheat"]}, headers=auth_headers)
+    ids = [m["id"] for m in client.get("/api/contracts/matches", headers=auth_headers).json()]
+    assert ids == [wheat_small.id, wheat_big.id]
+
+    # A healthy wheat + tomato plot raises scores and adds tomato contracts
+    client.post("/api/plots/", json={"name": "North", "coordinates": SQUARE, "area": 6, "crop_type": "Tomato"},
+                headers=auth_headers)
+    matches = client.get("/api/contracts/matches", headers=auth_headers).json()
+    assert matches[0]["id"] == tomato.id
+    assert {m["id"] for m in matches} == {wheat_small.id, wheat_big.id, tomato.id}
+
+    # Signed contracts drop out of everyone's matches immediately
+    client.post("/api/contracts/sign", json={"contract_id": tomato.id, "signature_hash": "s"}, headers=auth_headers)
+    assert tomato.id not in [m["id"] for m in client.get("/api/contracts/matches", headers=auth_headers).json()]
+
+    candidates = client.get(f"/api/contracts/{wheat_small.id}/candidates", headers=auth_headers).json()
+    assert [c["user_id"] for c in candidates] == [1]
+    assert client.get(f"/api/contracts/{tomato.id}/candidates", headers=auth_headers).status_code == 404
+
+
+def test_ranked_matches_are_fast_at_scale():
+    matcher = ContractMatcher()
+    today = date.today()
+    for i in range(20000):
+        matcher._add_contract(Contract(id=i + 1, crop_type=["Wheat", "Rice", "Cotton", "Onion"][i % 4],
+                                       quantity=1 + i % 50, delivery_date=datetime.combine(today, datetime.min.time()) + timedelta(days=i % 300)))
+    matcher._set_farmer(1, {"wheat": (4.0, 0.8, 1), "onion": (1.0, 0.6, 1)})
+
+    started = time.perf_counter()
+    matches = matcher.matches_for(None, 1, today=today)
+    elapsed = time.perf_counter() - started
+    assert len(matches) == 50 and elapsed < 0.1
+    assert matches == matcher.matches_for(None, 1, today=today)  # cached until something changes
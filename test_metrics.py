@@ -0,0 +1,34 @@
+from backend.metrics import Histogram, record_scheme_cache
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("demo_seconds", "demo", ("route",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 3.0):
+        h.observe("/x", value=v)
+    lines = h.render()
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{route="/x"} 4' in lines
+
+
+def test_metrics_endpoint_reports_routes_sql_and_providers(client, auth_headers):
+    client.get("/api/plots/", headers=auth_headers)
+    client.get("/api/plots/", headers=auth_headers)
+    client.get("/api/plots/999/carbon", headers=auth_headers)
+    record_scheme_cache(hit=True)
+    record_scheme_cache(hit=False)
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/plots/",status="200"}' in text
+    # Path parameters are collapsed into the route template
+    assert 'route="/api/plots/{plot_id}/carbon",status="404"' in text
+    assert 'http_requests_in_flight{method="GET",route="/api/plots/"} 0' in text
+    assert 'db_statements_total{operation="SELECT"}' in text
+    assert 'db_statement_duration_seconds_bucket{operation="SELECT",le="+Inf"}' in text
+    assert 'finance_scheme_cache_requests_total{result="hit"}' in text
+    assert "\nfinance_scheme_cache_hit_ratio " in text
@@ -0,0 +1,152 @@
+import json
+from datetime import date
+
+import numpy as np
+
+from backend.database import SessionLocal
+from backend.models import User, Plot, CarbonProject, CarbonEvidence, CarbonPortfolioSummary, MRVRun
+from backend.services import mrv, ledger
+
+AS_OF = date(2025, 12, 1)
+
+
+def _square(lat, lng, size=0.01):
+    return json.dumps([{"lat": lat, "lng": lng}, {"lat": lat + size, "lng": lng},
+                       {"lat": lat + size, "lng": lng + size}, {"lat": lat, "lng": lng + size}])
+
+
+def _pending_projects(count, evidence=2):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.phone == "9000000001").first()
+        user.district = "Nagpur"
+        ids = []
+        for i in range(count):
+            plot = Plot(user_id=user.id, name=f"Plot {i}", coordinates=_square(20.0 + i * 0.05, 78.0 + i * 0.07), area=4.0)
+            db.add(plot)
+            db.flush()
+            project = CarbonProject(plot_id=plot.id, user_id=user.id, methodology="No-Till", status="Evidence_Pending",
+                                    projected_sequestration=4.8)
+            db.add(project)
+            db.flush()
+            db.add_all([CarbonEvidence(project_id=project.id, description="soil report") for _ in range(evidence)])
+            ids.append(project.id)
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def test_season_windows():
+    windows = mrv.season_windows(AS_OF)
+    assert len(windows) == mrv.HISTORY_YEARS * 2 + mrv.MONITORED_SEASONS
+    assert windows[-1] == (date(2025, 8, 1), date(2025, 10, 31))
+    assert windows[-2] == (date(2025, 1, 1), date(2025, 3, 31))
+    assert windows[0] == (date(2022, 1, 1), date(2022, 3, 31))
+    assert all(a[1] < b[0] for a, b in zip(windows, windows[1:]))
+
+
+def test_assess_is_vectorised():
+    baseline, nan = [0.4] * 6, [np.nan] * 6
+    histories = [
+        baseline + [0.55, 0.55], # full uplift
+        baseline + [0.45, 0.45], # half uplift
+        baseline + [0.41, 0.41], # below MIN_UPLIFT
+        baseline + [0.55, 0.55], # common practice in the district
+        baseline + [0.55, 0.55], # not enough soil reports
+        nan + [0.55, 0.55], # no baseline imagery
+    ]
+    result = mrv.assess(histories, areas=[10] * 6, rates=[1.2] * 6, adoption=[0.1, 0.1, 0.1, 0.8, 0.1, 0.1],
+                        buffer_pct=[15] * 6, evidence_counts=[2, 2, 2, 2, 1, 2], requires_soil=[True] * 6)
+    assert list(result["outcome"]) == [mrv.VERIFIED, mrv.VERIFIED, mrv.REJECTED, mrv.REJECTED, None, None]
+    assert result["credits"][0] == 12.0
+    assert result["credits"][1] == 6.0
+    assert result["locked"][0] == 1.8
+    assert result["available"][0] == 10.2
+    assert result["credits"][2] == result["credits"][3] == 0.0
+
+
+def test_simulated_histories_are_deterministic():
+    seasons = mrv.season_windows(AS_OF)
+    lats, lngs = np.array([20.0, 21.5, 22.25]), np.array([78.0, 79.5, 80.1])
+    first = mrv.simulated_source.histories(None, lats, lngs, seasons)
+    again = mrv.simulated_source.histories(None, lats[::-1], lngs[::-1], seasons)
+    assert first.shape == (3, len(seasons))
+    np.testing.assert_array_equal(first, again[::-1])
+
+
+def test_unavailable_earth_engine_falls_back_to_simulation():
+    class Broken:
+        name = "broken"
+
+        def histories(self, *args):
+            raise RuntimeError("not authenticated")
+
+    seasons = mrv.season_windows(AS_OF)
+    histories, source = mrv.fetch_histories(Broken(), [], [20.0], [78.0], seasons)
+    assert source == mrv.simulated_source.name
+    np.testing.assert_array_equal(histories, mrv.simulated_source.histories(None, [20.0], [78.0], seasons))
+
+
+def test_batch_run_resumes_and_updates_projects(client, auth_headers):
+    ids = _pending_projects(5)
+    skipped = _pending_projects(1, evidence=0)[0]
+
+    db = SessionLocal()
+    try:
+        run = mrv.run_batch(db, as_of=AS_OF, source_name="simulator", chunk_size=2, max_chunks=1)
+        assert (run.status, run.total, run.processed, run.last_project_id) == ("running", 6, 2, ids[1])
+        run_id = run.id
+    finally:
+        db.close()
+
+    # A new invocation picks the interrupted run up from its cursor
+    db = SessionLocal()
+    try:
+        run = mrv.run_batch(db, as_of=date(2030, 1, 1), source_name="earth_engine", chunk_size=2)
+        assert run.id == run_id
+        assert (run.status, run.as_of, run.source, run.processed) == ("completed", AS_OF, "simulator", 6)
+        assert run.verified + run.rejected == 5
+        assert run.skipped == 1
+
+        projects = {p.id: p for p in db.query(CarbonProject).all()}
+        assert projects[skipped].status == "Evidence_Pending"
+        for project_id in ids:
+            p = projects[project_id]
+            assert p.status in (mrv.VERIFIED, mrv.REJECTED)
+            assert p.mrv_run_id == run_id
+            assert p.baseline_ndvi is not None and p.current_ndvi is not None
+            if p.status == mrv.VERIFIED:
+                assert p.current_ndvi - p.baseline_ndvi >= mrv.MIN_UPLIFT
+                assert abs(p.available_credits + p.locked_credits - p.verified_credits) < 1e-6
+                assert p.plot.organic_score == 100.0
+            else:
+                assert p.verified_credits == 0.0
+
+        summary = db.query(CarbonPortfolioSummary).one()
+        assert summary.verified_project_count == run.verified
+        assert abs(summary.verified_credits - sum(p.verified_credits for p in projects.values())) < 1e-6
+        assert db.query(MRVRun).count() == 1
+        assert ledger.verify_balances(db)["ok"]
+    finally:
+        db.close()
+
+
+def test_bad_plot_coordinates_do_not_block_the_chunk(client, auth_headers):
+    good = _pending_projects(1)[0]
+    bad = _pending_projects(2)[:2]
+    db = SessionLocal()
+    try:
+        for project_id, raw in zip(bad, ("not json", "[[79.1, 21.1]]")):
+            plot = db.query(CarbonProject).get(project_id).plot
+            plot.coordinates = raw
+        db.commit()
+
+        run = mrv.run_batch(db, as_of=AS_OF, source_name="simulator", chunk_size=10)
+        assert (run.status, run.processed, run.skipped) == ("completed", 3, 2)
+        projects = {p.id: p for p in db.query(CarbonProject).all()}
+        assert projects[good].status in (mrv.VERIFIED, mrv.REJECTED)
+        # Unlocated plots stay pending for a later run once their coordinates are fixed
+        assert [projects[i].status for i in bad] == ["Evidence_Pending"] * 2
+    finally:
+        db.close()
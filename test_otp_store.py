@@ -0,0 +1,80 @@
+import multiprocessing
+
+import pytest
+
+from backend.services import otp
+from backend.services.otp import (
+    OTPService, MemoryOTPStore, SQLiteOTPStore, OTPThrottledError, VALID, INVALID, EXPIRED, LOCKED,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def service(request, tmp_path):
+    now = [1000.0]
+    store = MemoryOTPStore() if request.param == "memory" else SQLiteOTPStore(str(tmp_path / "otp.db"))
+    svc = OTPService(store, clock=lambda: now[0])
+    svc.now = now
+    return svc
+
+
+def test_code_is_single_use(service):
+    code = service.send("9000000001")
+    assert service.verify("9000000001", "9999") == INVALID
+    assert service.verify("9000000001", code) == VALID
+    assert service.verify("9000000001", code) == INVALID
+
+
+def test_code_expires(service):
+    code = service.send("9000000001")
+    service.now[0] += otp.OTP_TTL_SECONDS
+    assert service.verify("9000000001", code) == EXPIRED
+
+
+def test_too_many_wrong_attempts_lock_the_code(service):
+    code = service.send("9000000001")
+    for _ in range(otp.MAX_VERIFY_ATTEMPTS):
+        assert service.verify("9000000001", "0001") == INVALID
+    assert service.verify("9000000001", code) == LOCKED
+
+
+def test_send_throttling(service):
+    service.send("9000000001")
+    with pytest.raises(OTPThrottledError) as exc:
+        service.send("9000000001")
+    assert 0 < exc.value.retry_after <= otp.SEND_COOLDOWN_SECONDS
+    service.send("9000000002")  # other phones are unaffected
+
+    for _ in range(otp.MAX_SENDS_PER_WINDOW - 1):
+        service.now[0] += otp.SEND_COOLDOWN_SECONDS
+        service.send("9000000001")
+    service.now[0] += otp.SEND_COOLDOWN_SECONDS
+    with pytest.raises(OTPThrottledError):
+        service.send("9000000001")
+
+    service.now[0] += otp.SEND_WINDOW_SECONDS
+    service.send("9000000001")
+
+
+def _send_from_worker(path):
+    return OTPService(SQLiteOTPStore(path)).send("9000000001")
+
+
+def test_sqlite_store_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "otp.db")
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        code = pool.apply(_send_from_worker, (path,))
+    assert OTPService(SQLiteOTPStore(path)).verify("9000000001", code) == VALID
+
+
+def test_login_flow(client, monkeypatch):
+    monkeypatch.setattr("backend.routers.auth.otp_service", OTPService(MemoryOTPStore()))
+
+    assert client.post("/api/auth/send-otp", json={"phone": "9000000005"}).status_code == 200
+    throttled = client.post("/api/auth/send-otp", json={"phone": "9000000005"})
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) > 0
+
+    assert client.post("/api/auth/verify-otp", json={"phone": "9000000005", "otp": "5555"}).status_code == 400
+    resp = client.post("/api/auth/verify-otp", json={"phone": "9000000005", "otp": otp.DEMO_CODE})
+    assert resp.status_code == 200
+    assert resp.json()["access_token"]
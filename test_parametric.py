@@ -0,0 +1,97 @@
+import json
+from datetime import date, timedelta
+
+import httpx
+
+from backend.database import SessionLocal
+from backend.models import User, Plot
+from backend.services import weather_archive
+from backend.services.parametric import evaluate_payouts, RAINFALL_DEFICIT, HEAT_STRESS
+
+AS_OF = date(2025, 7, 31)
+DROUGHT_CELL = (21.125, 79.125)
+HOT_CELL = (20.875, 77.875)
+
+
+def _history(cell, rain_now, rain_normal, hot_days=0):
+    days = [AS_OF - timedelta(days=i) for i in range(6 * 366 + 40)][::-1]
+    this_year = AS_OF - timedelta(days=60)
+    return {
+        "cell_lat": cell[0], "cell_lng": cell[1],
+        "daily": {
+            "time": [d.isoformat() for d in days],
+            "precipitation_sum": [rain_now if d > this_year else rain_normal for d in days],
+            "temperature_2m_max": [42.0 if (AS_OF - d).days < hot_days else 34.0 for d in days],
+        },
+    }
+
+
+def _square(lat, lng):
+    return json.dumps([{"lat": lat, "lng": lng}, {"lat": lat + 0.01, "lng": lng},
+                       {"lat": lat + 0.01, "lng": lng + 0.01}, {"lat": lat, "lng": lng + 0.01}])
+
+
+def test_fetch_archive_batches_cells(monkeypatch):
+    monkeypatch.setattr(weather_archive, "CELLS_PER_REQUEST", 2)
+    requests = []
+
+    def handler(request):
+        lats = request.url.params["latitude"].split(",")
+        requests.append(lats)
+        daily = {"time": ["2025-07-01"], "precipitation_sum": [1.0], "temperature_2m_max": [30.0]}
+        return httpx.Response(200, json=[{"daily": daily} for _ in lats])
+
+    cells = [(21.125, 79.125), (21.375, 79.125), (21.625, 79.125)]
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        payloads = weather_archive.fetch_archive(cells, date(2025, 7, 1), date(2025, 7, 1), client=client)
+    assert [len(r) for r in requests] == [2, 1]
+    assert [(p["cell_lat"], p["cell_lng"]) for p in payloads] == cells
+
+
+def test_payouts_from_replayed_archive(client, auth_headers, tmp_path):
+    archive = tmp_path / "archive.json"
+    weather_archive.save_archive_file(archive, [
+        _history(DROUGHT_CELL, rain_now=1.0, rain_normal=5.0),
+        _history(HOT_CELL, rain_now=5.0, rain_normal=5.0, hot_days=6),
+    ])
+
+    db = SessionLocal()
+    try:
+        farmer = db.query(User).filter(User.phone == "9000000001").first()
+        other = User(phone="9000000002")
+        db.add(other)
+        db.flush()
+        db.add_all([
+            Plot(user_id=farmer.id, name="North", coordinates=_square(21.2, 79.2)),
+            Plot(user_id=other.id, name="East", coordinates=_square(20.9, 77.9)),
+            # Malformed or wrongly shaped plots are skipped, not fatal for the whole batch
+            Plot(user_id=other.id, name="Broken", coordinates="not json"),
+            Plot(user_id=other.id, name="Pairs", coordinates="[[79.1, 21.1]]"),
+            Plot(user_id=other.id, name="Object", coordinates='{"lat": 21.1, "lng": 79.1}'),
+        ])
+        db.commit()
+
+        assert weather_archive.plot_cells(db) == sorted([HOT_CELL, DROUGHT_CELL])
+
+        assert weather_archive.ingest(db, weather_archive.load_archive_file(archive)) > 0
+        assert evaluate_payouts(db, as_of=AS_OF) == 2
+    finally:
+        db.close()
+
+    status = client.get("/api/finance/status", headers=auth_headers).json()
+    assert status["payout_eligible"] is True
+    assert status["trigger"] == RAINFALL_DEFICIT
+    assert status["rainfall_mm"] == 30.0
+    assert status["normal_rainfall_mm"] == 150.0
+    assert status["deficit_pct"] == 80.0
+
+    token = client.post("/api/auth/verify-otp", json={"phone": "9000000002", "otp": "0000"}).json()["access_token"]
+    hot = client.get("/api/finance/status", headers={"Authorization": f"Bearer {token}"}).json()
+    assert hot["trigger"] == HEAT_STRESS
+    assert hot["heat_days"] == 6
+
+
+def test_status_without_evaluation(client, auth_headers):
+    status = client.get("/api/finance/status", headers=auth_headers).json()
+    assert status["payout_eligible"] is False
+    assert status["rainfall_mm"] is None
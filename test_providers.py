@@ -0,0 +1,80 @@
+import pytest
+
+from backend.services import providers
+from backend.services.providers import ProviderRegistry, CircuitOpenError, EARTH_ENGINE
+
+
+def _fail(registry, name):
+    with pytest.raises(RuntimeError):
+        with registry.track(name):
+            raise RuntimeError("timeout")
+
+
+def test_circuit_opens_after_repeated_failures_and_recovers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(providers.time, "monotonic", lambda: now[0])
+    registry = ProviderRegistry()
+
+    for _ in range(providers.FAILURE_THRESHOLD):
+        _fail(registry, "gemini")
+    assert registry.get("gemini").state == "open"
+    assert not registry.available("gemini")
+
+    # Open circuit: rejected without calling the provider
+    with pytest.raises(CircuitOpenError):
+        with registry.track("gemini"):
+            pytest.fail("provider should not be called while open")
+
+    # After the recovery timeout a single probe is let through
+    now[0] += providers.RECOVERY_TIMEOUT
+    assert registry.available("gemini")
+    with registry.track("gemini"):
+        assert not registry.available("gemini")  # probe in flight
+    assert registry.get("gemini").state == "closed"
+
+
+def test_failed_probe_reopens_circuit(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(providers.time, "monotonic", lambda: now[0])
+    registry = ProviderRegistry()
+    for _ in range(providers.FAILURE_THRESHOLD):
+        _fail(registry, "open_meteo")
+
+    now[0] += providers.RECOVERY_TIMEOUT
+    with registry.track("open_meteo") as call:
+        call.fail()
+    snapshot = registry.snapshot()["open_meteo"]
+    assert snapshot["state"] == "open"
+    assert snapshot["error_rate"] == 1.0
+
+
+def test_open_gee_circuit_skips_straight_to_simulation(client, auth_headers, monkeypatch):
+    from backend.routers import plots
+
+    calls = []
+    monkeypatch.setattr(plots.earth_engine_service, "get_analysis", lambda **kw: calls.append(kw) or {"error": "GEE not initialized"})
+    monkeypatch.setattr(plots, "provider_registry", ProviderRegistry())
+
+    plot = client.post("/api/plots/", json={
+        "name": "North Field",
+        "coordinates": [{"lat": 21.146, "lng": 79.089}, {"lat": 21.147, "lng": 79.090}, {"lat": 21.146, "lng": 79.090}],
+        "area": 2.5,
+        "crop_type": "Cotton"
+    }, headers=auth_headers).json()
+
+    for _ in range(providers.FAILURE_THRESHOLD + 3):
+        resp = client.get(f"/api/plots/{plot['id']}/analyze", headers=auth_headers)
+        assert resp.json()["source"] == "Simulation (GEE Failed)"
+
+    assert len(calls) == providers.FAILURE_THRESHOLD
+    assert plots.provider_registry.snapshot()[EARTH_ENGINE]["rejected"] == 3
+
+
+def test_health_reports_provider_state(client):
+    providers.provider_registry.reset()
+    with providers.provider_registry.track("gemini"):
+        pass
+    body = client.get("/health").json()
+    assert body["status"] == "ok"
+    assert body["providers"]["gemini"]["state"] == "closed"
+    assert body["providers"]["gemini"]["calls"] == 1
@@ -0,0 +1,160 @@
+"""
+Query plan regression tests: every SELECT a handler runs against a seeded
+database must be served by an index. Fails on full table scans, automatic
+indexes and temp B-tree sorts (see sql_profiler.plan_regressions), except
+where a handler is expected to read the whole table.
+"""
+import os
+import shutil
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+from backend.database import SessionLocal, engine
+from backend.models import User, StressReport
+from backend.services import gemini
+from backend.sql_profiler import capture_queries, explain_query_plan, plan_regressions
+
+SQUARE = [{"lat": 21.1, "lng": 79.0}, {"lat": 21.1, "lng": 79.01}, {"lat": 21.11, "lng": 79.01}]
+
+
+class FakeModel:
+    def __init__(self, name):
+        pass
+
+    def generate_content(self, prompt):
+        class Response:
+            text = "Irrigate tomorrow morning."
+        return Response()
+
+
+# (method, path, json body, tables the handler is expected to scan in full)
+ROUTES = [
+    ("GET", "/api/users/me", None, set()),
+    ("GET", "/api/plots/", None, set()),
+    ("GET", "/api/plots/{plot_id}/carbon", None, set()),
+    ("GET", "/api/carbon/projects", None, set()),
+    ("GET", "/api/carbon/portfolio", None, set()),
+    ("GET", "/api/carbon/ledger", None, set()),
+    ("GET", "/api/contracts/", None, set()),
+    ("GET", "/api/contracts/?crop=Wheat", None, set()),
+    ("GET", "/api/contracts/?status=Signed", None, set()),
+    ("GET", "/api/contracts/matches", None, set()),
+    ("GET", "/api/community/", None, set()),
+    ("POST", "/api/community/1/like", None, set()),
+    ("POST", "/api/ai/chat", {"message": "When should I irrigate?"}, set()),
+    ("GET", "/api/finance/status", None, set()),
+    ("GET", "/api/insurance/search?query=wheat", None, {"insurance_schemes"}), # search index rebuilt after a write
+    ("GET", "/api/market/", None, {"listings"}), # full catalogue / substring search
+    ("GET", "/api/schemes/", None, {"schemes"}), # eligibility is evaluated over every scheme
+]
+
+
+@pytest.fixture
+def seeded(client, auth_headers, monkeypatch):
+    from seed_data import seed_large
+
+    seed_large(scale=0.0002)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.phone == "9000000001").first()
+        user.crops = "Wheat"
+        db.commit()
+    finally:
+        db.close()
+    plot = client.post("/api/plots/", json={"name": "North", "coordinates": SQUARE, "area": 4.0, "crop_type": "Wheat"},
+                       headers=auth_headers).json()
+    assert client.post("/api/carbon/enroll", json={"plot_id": plot["id"], "methodology": "No-Till"},
+                       headers=auth_headers).status_code == 200
+    monkeypatch.setattr(gemini, "model", FakeModel)
+    return {"plot_id": plot["id"]}
+
+
+def _selects(profile):
+    seen = {}
+    for normalized, statement, parameters, _ in profile.statements:
+        if normalized.upper().startswith("SELECT") and normalized not in seen:
+            seen[normalized] = (statement, parameters)
+    return seen.values()
+
+
+@pytest.mark.parametrize("method,path,body,allowed", ROUTES, ids=[f"{m} {p}" for m, p, _, _ in ROUTES])
+def test_route_queries_use_indexes(client, auth_headers, seeded, method, path, body, allowed):
+    with capture_queries() as profile:
+        response = client.request(method, path.format(**seeded), json=body, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    failures = []
+    for statement, parameters in _selects(profile):
+        plan = explain_query_plan(statement, parameters)
+        bad = [step for table, step in plan_regressions(plan) if table not in allowed]
+        if bad:
+            failures.append(f"{statement}\n    " + "\n    ".join(plan))
+    assert not failures, "Query plan regressed to a scan:\n" + "\n\n".join(failures)
+
+
+def test_stress_reports_by_user_use_index(seeded):
+    db = SessionLocal()
+    try:
+        query = db.query(StressReport).filter(StressReport.user_id == 1).order_by(StressReport.id)
+        statement = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    finally:
+        db.close()
+    plan = explain_query_plan(statement, None)
+    assert plan_regressions(plan) == [], plan
+
+
+def test_legacy_database_is_migrated_to_model_schema(tmp_path):
+    from sqlalchemy import create_engine
+    from backend import migrations
+
+    # The checked-in dev database predates migrations: older tables without the added columns and indexes
+    legacy, fresh = tmp_path / "legacy.db", tmp_path / "fresh.db"
+    shutil.copy(os.path.join(os.path.dirname(__file__), "krishi_drishti.db"), legacy)
+    legacy_engine, fresh_engine = create_engine(f"sqlite:///{legacy}"), create_engine(f"sqlite:///{fresh}")
+
+    migrations.upgrade(legacy_engine)
+    assert migrations.upgrade(legacy_engine) == []
+    assert migrations.upgrade(fresh_engine) == [1, 2, 3, 4, 5, 6]
+
+    def schema(path):
+        with sqlite3.connect(path) as conn:
+            objects = set(conn.execute(
+                "SELECT tbl_name, name FROM sqlite_master WHERE type IN ('index', 'trigger') AND name NOT LIKE 'sqlite_%'"))
+            tables = [t for (t,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()]
+            columns = {(t, row[1]) for t in tables for row in conn.execute(f"PRAGMA table_info({t})")}
+        return objects, columns
+
+    assert schema(legacy) == schema(fresh)
+    assert [applied is not None for _, _, applied in migrations.status(legacy_engine)] == [True] * migrations.HEAD
+
+
+def test_seeded_likes_follow_the_toggle_rules(client, auth_headers, seeded):
+    from seed_data import seed_large
+
+    # Appending more likes (small chunks) never repeats an existing (post, user) pair
+    seed_large(scale=0.0002, tables=["community_likes"], chunk_size=300)
+    db = SessionLocal()
+    try:
+        total, pairs = db.execute(text(
+            "SELECT COUNT(*), COUNT(DISTINCT post_id * 1000000 + user_id) FROM community_likes")).one()
+        assert total == 2 * int(0.0002 * 10_000_000) and pairs == total
+        assert db.execute(text(
+            "SELECT COUNT(*) FROM community_posts p WHERE likes_count != "
+            "(SELECT COUNT(*) FROM community_likes l WHERE l.post_id = p.id)")).scalar() == 0
+        liker = db.execute(text("SELECT post_id, user_id FROM community_likes LIMIT 1")).one()
+        phone = db.execute(text("SELECT phone FROM users WHERE id = :id"), {"id": liker.user_id}).scalar()
+    finally:
+        db.close()
+
+    # Unliking a seeded like removes it for good
+    token = client.post("/api/auth/verify-otp", json={"phone": phone, "otp": "0000"}).json()["access_token"]
+    unliked = client.post(f"/api/community/{liker.post_id}/like", headers={"Authorization": f"Bearer {token}"})
+    assert unliked.json()["message"] == "Post unliked"
+    db = SessionLocal()
+    try:
+        assert db.execute(text("SELECT COUNT(*) FROM community_likes WHERE post_id = :p AND user_id = :u"),
+                          {"p": liker.post_id, "u": liker.user_id}).scalar() == 0
+    finally:
+        db.close()
@@ -0,0 +1,55 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.simulator import digital_twin, parse_coordinates, plot_centroids
+from backend.services.satellite import get_simulated_satellite_data
+
+
+def test_points_are_deterministic_and_in_range():
+    lats = np.linspace(18.0, 22.0, 1000)
+    lngs = np.linspace(72.0, 80.0, 1000)
+    a = digital_twin.simulate_points(lats, lngs)
+    b = digital_twin.simulate_points(lats, lngs)
+
+    assert np.array_equal(a["ndvi"], b["ndvi"])
+    assert a["ndvi"].min() >= 0.1 and a["ndvi"].max() <= 0.9
+    assert a["soil_moisture"].min() >= 10 and a["soil_moisture"].max() <= 60
+    assert set(a["stress_level"]) <= {"Low", "Medium", "High"}
+
+
+def test_batch_matches_single_point():
+    lats, lngs = [21.1458, 19.076, 18.52], [79.0882, 72.8777, 73.8567]
+    batch = digital_twin.simulate_points(lats, lngs)
+    for i, (lat, lng) in enumerate(zip(lats, lngs)):
+        single = get_simulated_satellite_data(lat, lng)
+        assert single["ndvi"] == batch["ndvi"][i]
+        assert single["stress_level"] == batch["stress_level"][i]
+
+
+def test_concurrent_calls_do_not_interfere():
+    expected = get_simulated_satellite_data(21.1458, 79.0882)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: get_simulated_satellite_data(21.1458 + (i % 2) * 0.5, 79.0882), range(200)))
+    assert all(r == expected for r in results[::2])
+
+
+def test_plots_vary_by_day_but_not_within_day():
+    lats, lngs = np.array([21.146, 21.144]), np.array([79.089, 79.088])
+    day1 = digital_twin.simulate_plots(lats, lngs, ["Cotton", "Wheat"], day_of_year=10)
+    again = digital_twin.simulate_plots(lats, lngs, ["Cotton", "Wheat"], day_of_year=10)
+    day2 = digital_twin.simulate_plots(lats, lngs, ["Cotton", "Wheat"], day_of_year=11)
+
+    assert np.array_equal(day1["health_score"], again["health_score"])
+    assert not np.array_equal(day1["health_score"], day2["health_score"])
+    assert ((day1["health_score"] >= 0.1) & (day1["health_score"] <= 0.99)).all()
+
+
+def test_parse_coordinates_tolerates_bad_plots():
+    good = parse_coordinates('[{"lat": "21.1", "lng": 79.1}, {"lat": 21.3, "lng": 79.3}]')
+    assert good == [{"lat": 21.1, "lng": 79.1}, {"lat": 21.3, "lng": 79.3}]
+    for raw in (None, "", "not json", "[[79.1, 21.1]]", '{"lat": 21.1, "lng": 79.1}', '[{"lat": 21.1}]', "42"):
+        assert parse_coordinates(raw) == [], raw
+
+    lats, lngs = plot_centroids([good, parse_coordinates("[[79.1, 21.1]]")])
+    assert np.allclose([lats[0], lngs[0]], [21.2, 79.2])
+    assert np.isnan(lats[1]) and np.isnan(lngs[1])
@@ -0,0 +1,82 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.database import SessionLocal
+from backend.models import Listing, User
+from backend.sql_profiler import SQLProfilerMiddleware, capture_queries, normalize_sql
+
+
+def test_normalize_sql_groups_repeated_shapes():
+    a = normalize_sql("SELECT * FROM users WHERE users.id = 12 AND name = 'Ramesh'")
+    b = normalize_sql("SELECT *  FROM users\nWHERE users.id = ? AND name = 'Sita'")
+    assert a == b == "SELECT * FROM users WHERE users.id = ? AND name = ?"
+    assert normalize_sql("SELECT 1 FROM t WHERE id IN (?, ?, ?)") == "SELECT ? FROM t WHERE id IN (?)"
+
+
+def _seed_listings(n):
+    db = SessionLocal()
+    try:
+        for i in range(n):
+            seller = User(phone=f"80000000{i:02d}", name=f"Seller {i}")
+            db.add(seller)
+            db.flush()
+            db.add(Listing(seller_id=seller.id, crop_name="Wheat", quantity="10kg", price="20/kg", location="Nagpur", description=""))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _seller_names():
+    """Lazy-loads each listing's seller: the classic N+1."""
+    db = SessionLocal()
+    try:
+        return [listing.seller.name for listing in db.query(Listing).all()]
+    finally:
+        db.close()
+
+
+def test_detects_n_plus_one(client):
+    _seed_listings(6)
+    with capture_queries() as profile:
+        _seller_names()
+
+    suspects = profile.n_plus_one_suspects()
+    assert any("FROM users" in sql for sql in suspects)
+
+
+def test_assert_max_queries_helper(client, auth_headers, assert_max_queries):
+    # First read builds the farmer's scheme_matches: user, versions, schemes, delete, marker, matched schemes
+    with assert_max_queries(7):
+        client.get("/api/schemes/", headers=auth_headers)
+    # user + table_versions, then served from the response cache
+    with assert_max_queries(2):
+        client.get("/api/schemes/", headers=auth_headers)
+
+    _seed_listings(6)
+    # Sellers are joined into the listing query (plus the table_versions lookup)
+    with assert_max_queries(2):
+        client.get("/api/market/")
+    # Served from the response cache until a listing or user changes
+    with assert_max_queries(1):
+        client.get("/api/market/")
+    with pytest.raises(AssertionError, match="Expected at most 2 queries"):
+        with assert_max_queries(2):
+            _seller_names()
+
+
+def test_middleware_reports_query_count(client, capsys):
+    _seed_listings(6)
+    n_plus_one = FastAPI()
+    n_plus_one.get("/sellers")(_seller_names)
+    profiled = TestClient(SQLProfilerMiddleware(n_plus_one))
+    resp = profiled.get("/sellers")
+
+    assert int(resp.headers["x-sql-queries"]) >= 7
+    assert "possible N+1" in capsys.readouterr().out
+
+
+def test_explain_query_plan(client):
+    from backend.sql_profiler import explain_query_plan
+    plan = explain_query_plan("SELECT * FROM users WHERE phone = ?", ("9000000001",))
+    assert any("INDEX" in step for step in plan)
@@ -0,0 +1,57 @@
+import threading
+
+from backend.models import StressReport
+from backend.database import SessionLocal
+from backend.services import gemini
+
+
+class FakeModel:
+    calls = 0
+    lock = threading.Lock()
+
+    def __init__(self, name):
+        pass
+
+    def generate_content(self, prompt):
+        with FakeModel.lock:
+            FakeModel.calls += 1
+
+        class Response:
+            text = '```json {"stress_level": "Medium", "recommendation": "Irrigate within 3 days"} ```'
+        return Response()
+
+
+def test_batch_groups_points_into_model_calls(client, auth_headers, monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr(gemini, "model", FakeModel)
+    FakeModel.calls = 0
+
+    # 300 points over two crops, many sharing indicator buckets
+    points = [
+        {"lat": 21.0 + (i % 50) * 0.01, "lng": 79.0, "crop_type": "Cotton" if i % 2 else "Wheat"}
+        for i in range(300)
+    ]
+    resp = client.post("/api/ai/analyze/stress/batch", json={"points": points}, headers=auth_headers)
+    assert resp.status_code == 200
+    body = resp.json()
+
+    assert body["count"] == 300
+    assert body["model_calls"] == body["buckets"] == FakeModel.calls
+    assert FakeModel.calls < 300
+    assert body["results"][0]["ai_analysis"]["recommendation"] == "Irrigate within 3 days"
+
+    db = SessionLocal()
+    try:
+        assert db.query(StressReport).count() == 300
+    finally:
+        db.close()
+
+
+def test_batch_without_api_key_uses_satellite_analysis(client, auth_headers, monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    points = [{"lat": 21.1, "lng": 79.1, "crop_type": "Wheat"}, {"lat": 19.0, "lng": 72.8, "crop_type": "Rice"}]
+    body = client.post("/api/ai/analyze/stress/batch", json={"points": points}, headers=auth_headers).json()
+
+    assert body["model_calls"] == 0
+    for r in body["results"]:
+        assert r["ai_analysis"]["stress_level"] in {"Low", "Medium", "High"}
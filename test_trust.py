@@ -0,0 +1,131 @@
+from datetime import datetime
+
+from backend.database import SessionLocal
+from backend.models import User, Contract, Listing
+from backend.services import trust
+
+
+def _score(phone="9000000001"):
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.phone == phone).first().trust_score
+    finally:
+        db.close()
+
+
+def _make_verifier(phone):
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.phone == phone).update({User.is_verifier: True})
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_events_update_score_incrementally(client, auth_headers):
+    assert _score() == trust.BASE_SCORE
+
+    client.put("/api/users/me", json={"name": "Ramesh", "district": "Nagpur", "land_size": 4.0}, headers=auth_headers)
+    assert _score() == trust.BASE_SCORE + 3 * trust.PROFILE_FIELD_POINTS
+
+    listing = client.post("/api/market/", json={"crop_name": "Wheat", "quantity": "500kg", "price": "25/kg",
+                                                "location": "Nagpur"}, headers=auth_headers).json()
+    # Posting a listing earns nothing; an inspection by a verifier does, once
+    assert _score() == trust.BASE_SCORE + 3 * trust.PROFILE_FIELD_POINTS
+    verify = f"/api/market/{listing['id']}/verify"
+    assert client.post(verify, headers=auth_headers).status_code == 403
+    inspector = client.post("/api/auth/verify-otp", json={"phone": "9000000002", "otp": "0000"}).json()
+    inspector_headers = {"Authorization": f"Bearer {inspector['access_token']}"}
+    # Any other account is not enough
+    assert client.post(verify, headers=inspector_headers).status_code == 403
+    assert _score() == trust.BASE_SCORE + 3 * trust.PROFILE_FIELD_POINTS
+    _make_verifier("9000000002")
+    assert client.post(verify, headers=inspector_headers).status_code == 200
+    db = SessionLocal()
+    try:
+        # Listings keep defaulting to verified; verified_by records the inspection
+        assert db.query(Listing.verified, Listing.verified_by).one() == (True, 2)
+    finally:
+        db.close()
+    assert client.post(verify, headers=inspector_headers).status_code == 400
+
+    db = SessionLocal()
+    try:
+        contract = Contract(buyer_name="ITC Agribusiness", crop_type="Wheat", quantity=10, price_per_qt=2400,
+                            delivery_date=datetime(2026, 4, 15), terms="Moisture < 12%", status="Open")
+        db.add(contract)
+        db.commit()
+        contract_id = contract.id
+    finally:
+        db.close()
+    client.post("/api/contracts/sign", json={"contract_id": contract_id, "signature_hash": "abc"}, headers=auth_headers)
+
+    expected = (trust.BASE_SCORE + 3 * trust.PROFILE_FIELD_POINTS
+                + trust.EVENT_WEIGHTS[trust.LISTING_VERIFIED] + trust.EVENT_WEIGHTS[trust.CONTRACT_SIGNED])
+    assert _score() == expected
+
+    # A full rebuild from the tables lands on the same score
+    db = SessionLocal()
+    try:
+        db.query(User).update({User.trust_score: 0})
+        db.commit()
+        assert trust.rebuild_scores(db, chunk_size=1) == 2
+    finally:
+        db.close()
+    assert _score() == expected
+
+
+def test_fulfilled_contracts_score_the_same_incrementally_and_rebuilt(client, auth_headers):
+    verifier = client.post("/api/auth/verify-otp", json={"phone": "9000000002", "otp": "0000"}).json()
+    verifier_headers = {"Authorization": f"Bearer {verifier['access_token']}"}
+    db = SessionLocal()
+    try:
+        contracts = [Contract(buyer_name="ITC Agribusiness", crop_type="Wheat", quantity=10, price_per_qt=2400,
+                              delivery_date=datetime(2026, 4, 15 + i), terms="-", status="Open") for i in range(3)]
+        db.add_all(contracts)
+        db.commit()
+        ids = [c.id for c in contracts]
+    finally:
+        db.close()
+
+    for contract_id in ids:
+        client.post("/api/contracts/sign", json={"contract_id": contract_id, "signature_hash": "abc"},
+                    headers=auth_headers)
+    fulfill = f"/api/contracts/{ids[0]}/fulfill"
+    assert client.post(fulfill, headers=auth_headers).status_code == 403
+    assert client.post(fulfill, headers=verifier_headers).status_code == 403
+    _make_verifier("9000000002")
+    _make_verifier("9000000001")
+    # A verifier still cannot confirm their own delivery
+    assert client.post(fulfill, headers=auth_headers).status_code == 403
+    assert client.post(fulfill, headers=verifier_headers).status_code == 200
+    assert client.post(fulfill, headers=verifier_headers).status_code == 400
+    assert client.post(f"/api/contracts/{ids[1]}/fulfill", headers=verifier_headers).status_code == 200
+
+    incremental = _score()
+    assert incremental == (trust.BASE_SCORE + 3 * trust.EVENT_WEIGHTS[trust.CONTRACT_SIGNED]
+                           + 2 * trust.EVENT_WEIGHTS[trust.CONTRACT_FULFILLED])
+    db = SessionLocal()
+    try:
+        db.query(User).update({User.trust_score: 0})
+        db.commit()
+        trust.rebuild_scores(db)
+    finally:
+        db.close()
+    assert _score() == incremental
+
+
+def test_scores_are_clamped(client, auth_headers):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.phone == "9000000001").first()
+        trust.record_event(db, user.id, trust.CARBON_VERIFIED, count=100)
+        db.commit()
+        db.refresh(user)
+        assert user.trust_score == trust.MAX_SCORE
+        trust.apply_delta(db, user.id, -10_000)
+        db.commit()
+        db.refresh(user)
+        assert user.trust_score == trust.MIN_SCORE
+    finally:
+        db.close()
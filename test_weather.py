@@ -0,0 +1,154 @@
+import gzip
+import json
+import types
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import pytest
+
+from backend import compression
+from backend.routers import weather
+from backend.services import forecast
+
+SAMPLE = json.loads((Path(__file__).parent / "weather_response.json").read_text())
+LEGACY_URL = ("https://api.open-meteo.com/v1/forecast?latitude=21.1458&longitude=79.0882&current=temperature_2m,"
+              "relative_humidity_2m,rain,precipitation,weather_code,is_day,wind_speed_10m,soil_temperature_0cm"
+              "&hourly=temperature_2m,weather_code,is_day&daily=weather_code,temperature_2m_max,temperature_2m_min,"
+              "sunrise,sunset,uv_index_max,precipitation_sum,wind_speed_10m_max&timezone=auto")
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Serves weather_response.json for every forecast request; records the URLs asked for."""
+    urls = []
+
+    def handler(request):
+        urls.append(str(request.url))
+        return httpx.Response(200, json=SAMPLE)
+
+    class FakeAsyncClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(weather, "httpx", types.SimpleNamespace(AsyncClient=FakeAsyncClient))
+    return urls
+
+
+def test_default_response_is_unchanged(client, upstream):
+    response = client.get("/api/weather/current")
+    assert response.status_code == 200
+    assert response.json() == SAMPLE
+    assert upstream == [LEGACY_URL]
+
+
+def test_fields_projection(client, upstream):
+    current = client.get("/api/weather/current", params={"fields": "current"}).json()
+    assert set(current) == {"latitude", "longitude", "utc_offset_seconds", "timezone", "current", "current_units"}
+    assert current["current"] == SAMPLE["current"]
+    assert "hourly" not in upstream[-1] and "daily" not in upstream[-1]
+
+    daily = client.get("/api/weather/current", params={"fields": "daily.temperature_2m_min, daily.sunrise"}).json()
+    assert list(daily["daily"]) == ["time", "temperature_2m_min", "sunrise"]
+    assert list(daily["daily_units"]) == ["time", "temperature_2m_min", "sunrise"]
+    assert upstream[-1].endswith("&daily=temperature_2m_min,sunrise&timezone=auto")
+
+
+def test_unknown_field_is_rejected_before_calling_upstream(client, upstream):
+    for fields in ("weekly", "current.snowfall"):
+        response = client.get("/api/weather/current", params={"fields": fields})
+        assert response.status_code == 400
+        assert fields in response.json()["detail"]
+    assert client.get("/api/weather/current", params={"format": "csv"}).status_code == 422
+    assert upstream == []
+
+
+def test_compact_round_trip(client, upstream):
+    full = client.get("/api/weather/current")
+    compact = client.get("/api/weather/current", params={"format": "compact"})
+    payload = compact.json()
+    assert len(compact.content) < len(full.content) / 2
+
+    # Regular series share the time base instead of repeating timestamps
+    assert {"start", "step"} <= set(payload["hourly"]) and "time" not in payload["hourly"]
+    assert payload["hourly"]["step"] == 60 and payload["daily"]["step"] == 24 * 60
+    assert all(isinstance(v, int) for v in payload["hourly"]["temperature_2m"])
+
+    decoded = forecast.decode_compact(payload, SAMPLE["utc_offset_seconds"])
+    for section in forecast.SECTIONS:
+        for name, original in SAMPLE[section].items():
+            values = original if isinstance(original, list) else [original]
+            got = decoded[section][name]
+            got = got if isinstance(got, list) else [got]
+            if name in forecast.TIME_VARIABLES:
+                assert got == [datetime.fromisoformat(v) for v in values], name
+            elif name in forecast.DECIMALS:
+                assert got == pytest.approx(values, abs=0.5 / 10 ** forecast.DECIMALS[name]), name
+            else:
+                assert got == values, name
+
+    # Projection and compact encoding compose
+    current = client.get("/api/weather/current", params={"format": "compact", "fields": "current"}).json()
+    assert set(current) == {"v", "lat", "lng", "tz", "t0", "decimals", "current"}
+    assert current["current"]["temperature_2m"] == round(SAMPLE["current"]["temperature_2m"] * 10)
+
+
+def test_irregular_series_keep_offsets():
+    data = {"utc_offset_seconds": 19800,
+            "hourly": {"time": ["2026-02-12T00:00", "2026-02-12T01:00", "2026-02-12T03:00"],
+                       "temperature_2m": [17.2, None, 16.8]}}
+    payload = forecast.encode_compact(data)
+    assert payload["hourly"] == {"time": [0, 60, 180], "temperature_2m": [172, None, 168]}
+    # 00:00 IST is 18:30 UTC the day before
+    assert payload["t0"] == (datetime(2026, 2, 11, 18, 30) - datetime(1970, 1, 1)).total_seconds()
+
+
+def test_compression_negotiation(client, upstream):
+    # httpx decompresses transparently; the headers show what went over the wire
+    gzipped = client.get("/api/weather/current", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in gzipped.headers["vary"]
+    assert gzipped.json() == SAMPLE
+
+    plain = client.get("/api/weather/current", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert int(gzipped.headers["content-length"]) < int(plain.headers["content-length"]) / 3
+
+    # Small bodies are not worth compressing
+    tiny = client.get("/api/weather/current", params={"fields": "current", "format": "compact"},
+                      headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in tiny.headers
+
+
+def test_brotli_response(client, upstream):
+    brotli = pytest.importorskip("brotli")
+    assert compression.brotli is brotli
+
+    br = client.get("/api/weather/current", headers={"Accept-Encoding": "gzip, br"})
+    assert br.headers["content-encoding"] == "br"
+    assert "Accept-Encoding" in br.headers["vary"]
+    assert br.json() == SAMPLE
+
+    gzipped = client.get("/api/weather/current", headers={"Accept-Encoding": "gzip"})
+    assert int(br.headers["content-length"]) < int(gzipped.headers["content-length"])
+
+    # Raw bytes on the wire are a brotli stream of the plain body
+    plain = client.get("/api/weather/current", headers={"Accept-Encoding": "identity"})
+    with client.stream("GET", "/api/weather/current", headers={"Accept-Encoding": "br"}) as raw:
+        assert brotli.decompress(b"".join(raw.iter_raw())) == plain.content
+
+
+def test_choose_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert compression.choose_encoding("gzip, deflate, br") == "gzip"
+    assert compression.choose_encoding("br") is None
+    assert compression.choose_encoding("gzip;q=0") is None
+    assert compression.choose_encoding("*") == "gzip"
+    assert compression.choose_encoding(None) is None
+
+    fake_brotli = types.SimpleNamespace(compress=lambda body, quality: b"br:" + body)
+    monkeypatch.setattr(compression, "brotli", fake_brotli)
+    assert compression.choose_encoding("gzip, br") == "br"
+    assert compression.choose_encoding("gzip, br;q=0.5") == "gzip"
+    assert compression.compress(b"{}", "br") == b"br:{}"
+    assert gzip.decompress(compression.compress(b"{}", "gzip")) == b"{}"